@@ -0,0 +1,79 @@
+"""
+Benchmark: cost of propagating control values to the filters, over the number of controls.
+
+Before every run, HeadlessPipeline.update_parameters_from_controls pushes the control
+values to their filters. A tick moves a single control, like a slider being dragged
+or a key held down. Compares the current propagation (only the controls changed since
+the last run) with the previous one, which rebuilt and assigned the whole parameters
+dict once per control.
+
+    python benchmarks/control_sync.py --controls 10 50 150 500 --ticks 50
+"""
+
+import argparse
+import time
+
+from interactive_pipe.core.filter import FilterCore
+from interactive_pipe.headless.control import Control
+from interactive_pipe.headless.pipeline import HeadlessPipeline
+
+CONTROLS_PER_FILTER = 5
+
+
+def amplify(img, gain_0=1.0, gain_1=1.0, gain_2=1.0, gain_3=1.0, gain_4=1.0):
+    return img
+
+
+def build_pipeline(num_controls: int) -> HeadlessPipeline:
+    num_filters = -(-num_controls // CONTROLS_PER_FILTER)
+    filters = [
+        FilterCore(apply_fn=amplify, name=f"filter_{idx}", inputs=[idx], outputs=[idx + 1])
+        for idx in range(num_filters)
+    ]
+    pip = HeadlessPipeline(filters=filters, inputs=[0], outputs=[num_filters])
+    pip.controls = [
+        Control(
+            1.0,
+            [0.0, 2.0],
+            name=f"control_{idx}",
+            filter_to_connect=filters[idx // CONTROLS_PER_FILTER],
+            parameter_name_to_connect=f"gain_{idx % CONTROLS_PER_FILTER}",
+        )
+        for idx in range(num_controls)
+    ]
+    return pip
+
+
+def previous_sync(pip: HeadlessPipeline) -> None:
+    for ctrl in pip.controls:
+        current_params = pip.parameters
+        current_params[ctrl.filter_to_connect.name][ctrl.parameter_name_to_connect] = ctrl.value
+        pip.parameters = current_params
+
+
+def measure(sync, num_controls: int, ticks: int) -> float:
+    pip = build_pipeline(num_controls)
+    sync(pip)
+    tic = time.perf_counter()
+    for tick in range(ticks):
+        pip.controls[tick % num_controls].value = tick / ticks  # a key press moving one control
+        sync(pip)
+    return (time.perf_counter() - tic) / ticks
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cost of propagating control values to the filters")
+    parser.add_argument("--controls", type=int, nargs="+", default=[10, 50, 150, 500], help="numbers of controls")
+    parser.add_argument("--ticks", type=int, default=50, help="number of measured ticks")
+    args = parser.parse_args()
+    for num_controls in args.controls:
+        current = measure(HeadlessPipeline.update_parameters_from_controls, num_controls, args.ticks)
+        previous = measure(previous_sync, num_controls, args.ticks)
+        print(
+            f"{num_controls:5d} controls: {1e6 * current:9.1f} us per tick "
+            f"(previously {1e6 * previous:10.1f} us, x{previous / current:6.0f})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark: framework overhead per run on a long pipeline of trivial filters.
+
+A chain of cheap filters runs on a tiny image, so that the time per run is spent in
+the engine (scheduling, cache decisions, routing) rather than in the filters. Each run
+moves the parameter of a single filter, like a TimeControl ticking, so that the
+filters before it are served from cache and the ones after it are recomputed.
+Moving a filter near the end shows the cost of the unchanged part of the graph.
+
+    python benchmarks/run_overhead.py --filters 200 --runs 200
+    python benchmarks/run_overhead.py --filters 200 --moving 199
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from interactive_pipe.core.filter import FilterCore
+from interactive_pipe.core.pipeline import PipelineCore
+
+
+def tick(img, time_step=0.0):
+    return [img]
+
+
+def passthrough(img, amount=1.0):
+    return [img]
+
+
+def build_pipeline(num_filters: int, cache, moving_filter: int) -> PipelineCore:
+    filters = []
+    for idx in range(num_filters):
+        apply_fn = tick if idx == moving_filter else passthrough
+        filters.append(FilterCore(apply_fn=apply_fn, name=f"filter_{idx}", inputs=[idx], outputs=[idx + 1]))
+    pip = PipelineCore(filters=filters, inputs=[0], outputs=[num_filters], cache=cache)
+    pip.inputs = [np.zeros((4, 4), dtype=np.float32)]
+    return pip
+
+
+def measure(num_filters: int, runs: int, cache, moving_filter: int) -> float:
+    pip = build_pipeline(num_filters, cache, moving_filter)
+    pip.run()  # warm-up
+    tic = time.perf_counter()
+    for run in range(runs):
+        pip.parameters = {f"filter_{moving_filter}": {"time_step": run / runs}}
+        pip.run()
+    return (time.perf_counter() - tic) / runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Framework overhead per run on a chain of trivial filters")
+    parser.add_argument("--filters", type=int, default=200, help="number of chained filters")
+    parser.add_argument("--runs", type=int, default=200, help="number of measured runs")
+    parser.add_argument("--moving", type=int, default=None, help="filter changed on every run (default: middle)")
+    args = parser.parse_args()
+    moving_filter = args.filters // 2 if args.moving is None else args.moving
+    print(f"{args.filters} filters, parameter of filter {moving_filter} changed on every run")
+    for cache in (False, True, "graph"):
+        seconds_per_run = measure(args.filters, args.runs, cache, moving_filter)
+        per_filter_us = 1e6 * seconds_per_run / args.filters
+        print(f"cache={cache!r:>8}: {1000 * seconds_per_run:7.2f} ms per run, {per_filter_us:6.1f} us per filter")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,108 @@
 import logging
+import re
+import sys
+import weakref
+from collections import OrderedDict
 from copy import deepcopy
-from typing import Any, Optional
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Hashable, List, Optional, Set, Tuple, Union
+
+from interactive_pipe.core.fingerprint import _fingerprint
+
+if TYPE_CHECKING:
+    from interactive_pipe.core.disk_cache import DiskCache
+
+_MISSING = object()
+
+_SIZE_UNITS = {
+    "": 1,
+    "B": 1,
+    "KB": 10**3,
+    "MB": 10**6,
+    "GB": 10**9,
+    "TB": 10**12,
+    "KIB": 2**10,
+    "MIB": 2**20,
+    "GIB": 2**30,
+    "TIB": 2**40,
+}
+
+
+def parse_size(size: Union[int, float, str]) -> int:
+    """Number of bytes from an int or a human readable size ("512MB", "2GB", "1.5GiB")."""
+    if isinstance(size, (int, float)) and not isinstance(size, bool):
+        if size < 0:
+            raise ValueError(f"size must be positive, got {size}")
+        return int(size)
+    if not isinstance(size, str):
+        raise TypeError(f"size must be a number of bytes or a string like '2GB', got {type(size)}")
+    match = re.fullmatch(r"\s*([0-9]*\.?[0-9]+)\s*([a-zA-Z]*)\s*", size)
+    if match is None or match.group(2).upper() not in _SIZE_UNITS:
+        raise ValueError(f"cannot parse size {size!r}, expected e.g. '512MB' or '2GB'")
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2).upper()])
+
+
+def nbytes_of(value: Any) -> int:
+    """Approximate memory held by a (possibly nested) filter result.
+
+    numpy arrays and torch tensors count their buffer (duck-typed, torch is never
+    imported); lists, tuples and dicts are summed; other objects count sys.getsizeof.
+    """
+    value_type = type(value)
+    if value_type.__module__ == "numpy" and value_type.__name__ == "ndarray":
+        return int(value.nbytes)
+    if value_type.__module__.split(".")[0] == "torch" and hasattr(value, "element_size"):
+        return int(value.element_size() * value.nelement())
+    if isinstance(value, (list, tuple)):
+        return sum(nbytes_of(item) for item in value)
+    if isinstance(value, dict):
+        return sum(nbytes_of(item) for item in value.values())
+    return sys.getsizeof(value)
+
+
+_IMMUTABLE_TYPES = (type(None), bool, int, float, complex, str, bytes)
+
+
+def freeze(value: Any) -> Any:
+    """Read-only version of a (possibly nested) filter result, cached by reference.
+
+    Replaces the deep copy of the cached outputs (copy-on-write: whoever needs to
+    write gets a copy, e.g. inplace=True filters).
+
+    - numpy arrays owning their buffer, or viewing read-only data, are made read-only
+      in place (no copy)
+    - views of a writable numpy array are copied: its owner may still write to it
+    - lists, tuples and dicts are rebuilt with frozen items
+    - immutable scalars pass through, anything else is deep-copied
+    """
+    value_type = type(value)
+    if value_type.__module__ == "numpy" and value_type.__name__ in ("ndarray", "memmap"):
+        base = value.base
+        if base is not None and type(base).__module__ == "numpy" and base.flags.writeable:
+            value = deepcopy(value)
+        value.flags.writeable = False
+        return value
+    if isinstance(value, _IMMUTABLE_TYPES) or (value_type.__module__ == "numpy" and hasattr(value, "dtype")):
+        return value  # numpy scalars are immutable too
+    if value_type in (list, tuple):
+        return value_type(freeze(item) for item in value)
+    if value_type is dict:
+        return {key: freeze(item) for key, item in value.items()}
+    return deepcopy(value)
+
+
+@dataclass
+class EntryStats:
+    """Bookkeeping of a stored result, used by CacheBudget to pick what to evict."""
+
+    nbytes: int
+    cost: float  # seconds it took to compute
+    hits: int = 0
+
+    @property
+    def score(self) -> float:
+        """Value of keeping the result: recompute time x reuse / size (lowest evicted first)."""
+        return self.cost * (self.hits + 1) / max(self.nbytes, 1)
 
 
 class CachedResults:
@@ -18,6 +120,19 @@ class CachedResults:
     - update results only when the state of the sliders has been changed
     - keep cached Filters results in memory
 
+    With max_entries > 1, the results of the last max_entries executions are kept in a
+    least-recently-used store, indexed by a key the engine derives from everything the
+    result depends on (parameters, upstream results, context). Going back to a setting
+    seen recently (A/B toggling, scrubbing a slider back and forth) becomes a lookup.
+    `result` always holds the current (most recently used) result. Each result is
+    stored with the context writes of the execution which produced it
+    (`context_writes`, opaque to this class): the engine replays them when the result
+    is reused, so that later filters read what this execution wrote.
+
+    An optional disk tier (`disk`, a DiskCache shared by the filters of a pipeline)
+    backs the keyed store: a lookup missing in memory falls back to the results saved
+    by previous sessions, and fresh results are saved for the next ones.
+
     Please note that if you use safe_buffer_deepcopy=False,
     only pointers are copied when updating the cache, no deepcopy is performed here.
     You should only use safe_buffer_deepcopy=False
@@ -26,12 +141,31 @@ class CachedResults:
     Underlying class used in the interactive pipe cache mechanism.
     """
 
-    def __init__(self, name: Optional[str] = None, safe_buffer_deepcopy: bool = True):
+    def __init__(self, name: Optional[str] = None, safe_buffer_deepcopy: bool = True, max_entries: int = 1):
+        if max_entries < 1:
+            raise ValueError(f"max_entries must be a positive integer, got {max_entries}")
         self.name = name
         self.result = None
+        self.key: Optional[Hashable] = None  # key of the current result (None: not keyed)
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()  # least recently used first
+        self._writes: dict = {}  # key -> context writes of the stored results which made some
+        self.context_writes: Any = None  # context writes of the current result (None: none)
+        self._stats: dict = {}  # key -> EntryStats of stored results
+        self._current_stats: Optional[EntryStats] = None  # stats of the current result
+        self._evicted = False  # current result dropped to honour a memory budget
+        self._stale = False  # inputs of the current result changed (see invalidate)
         self.state_change = StateChange(name=name)
         self._force_change = False
         self.safe_buffer_deepcopy = safe_buffer_deepcopy
+        self.disk: Optional["DiskCache"] = None  # optional DiskCache (persistent tier), attached by the engine
+        # names of the filters to check again at the next run, attached by the engine:
+        # invalidations report the filter there (dirty-set propagation)
+        self.dirty_sink: Optional[Set[Any]] = None
+
+    def _report(self) -> None:
+        if self.dirty_sink is not None:
+            self.dirty_sink.add(self.name)
 
     @property
     def force_change(self) -> bool:
@@ -40,6 +174,13 @@ class CachedResults:
     @force_change.setter
     def force_change(self, value: bool) -> None:
         self._force_change = value
+        if value:
+            self._report()
+
+    @property
+    def evicted(self) -> bool:
+        """Whether the current result was dropped to honour a memory budget."""
+        return self._evicted
 
     def has_changed(self, new_params: Any) -> bool:
         """
@@ -53,32 +194,214 @@ class CachedResults:
             self.state_change.update_needed = True
             self.force_change = False
             change_state_from_params_check = True
+            # stored results may depend on state their key does not capture
+            self._entries.clear()
+            self._stats.clear()
+            self._writes.clear()
+        if self._evicted or self._stale:
+            # the current result was dropped (memory budget) or its inputs changed:
+            # it has to be looked up again or recomputed
+            self.state_change.update_needed = True
+            change_state_from_params_check = True
         return change_state_from_params_check
 
-    def update(self, new_result: Any) -> None:
+    def invalidate(self) -> None:
+        """
+        Mark the current result as stale (the pipeline inputs it derives from changed).
+
+        Unlike force_change, stored results are kept: their keys tell apart the input
+        content they were computed from, so going back to a previous input finds them.
+        """
+        self._stale = True
+        self._report()
+
+    def lookup(self, key: Optional[Hashable]) -> bool:
+        """
+        Make the result stored under key the current one.
+
+        :param key: The key computed for the upcoming execution (None: cannot be cached).
+        :return: True if a result was found (no need to compute) or False otherwise.
+        """
+        if key is None:
+            return False
+        if key not in self._entries:
+            if self.disk is None or not isinstance(key, bytes):  # disk entries: digest keys only
+                return False
+            found, result, cost, context_writes = self.disk.get(key)
+            if not found:
+                return False
+            logging.debug(f"LOAD CACHE RESULTS FROM DISK - {self.name}")
+            # read-only memory-mapped arrays: no copy needed
+            self._insert(result, key, cost, context_writes)
+        self._entries.move_to_end(key)
+        self.result = self._entries[key]
+        self.context_writes = self._writes.get(key)
+        self.key = key
+        self._current_stats = self._stats.get(key)
+        self._evicted = False
+        self._stale = False
+        self.record_hit()
+        return True
+
+    def peek(self, key: Optional[Hashable]) -> Tuple[bool, Any, Any]:
+        """
+        Result stored under key, leaving the cache untouched (safe from other threads).
+
+        :param key: The key computed for an execution (None: cannot be cached).
+        :return: (True, result, context writes) if a result is stored in memory,
+            (False, None, None) otherwise.
+        """
+        if key is None:
+            return False, None, None
+        result = self._entries.get(key, _MISSING)
+        if result is _MISSING:
+            return False, None, None
+        return True, result, self._writes.get(key)
+
+    def record_hit(self) -> None:
+        """Count a reuse of the current result (feeds the eviction policy of CacheBudget)."""
+        if self._current_stats is not None:
+            self._current_stats.hits += 1
+
+    def update(
+        self,
+        new_result: Any,
+        key: Optional[Hashable] = None,
+        cost: float = 0.0,
+        persist: bool = True,
+        copy: bool = True,
+        context_writes: Any = None,
+    ) -> None:
         """
         Update the result.
 
         :param new_result: The new result to store.
+        :param key: Key of the execution which produced it, to find it later with lookup.
+        :param cost: Time (in seconds) it took to compute, used by the eviction policy.
+        :param persist: Save it to the disk tier as well (if any). The engine disables it
+            when the key does not capture everything the result depends on yet.
+        :param copy: False stores new_result itself, the caller guarantees it is never
+            mutated (e.g. frozen, see freeze).
+        :param context_writes: Context values the execution wrote, replayed by the engine
+            when the result is reused (copied unless safe_buffer_deepcopy is False).
         """
         if self.name is not None:
             logging.debug(f"OVERRIDE CACHE RESULTS - {self.name}")
-        self.result = new_result if not self.safe_buffer_deepcopy else deepcopy(new_result)
+        if context_writes is not None and self.safe_buffer_deepcopy:
+            # later filters may modify the context values in place
+            context_writes = deepcopy(context_writes)
+        copy = copy and self.safe_buffer_deepcopy
+        self._insert(deepcopy(new_result) if copy else new_result, key, cost, context_writes)
+        if self.disk is not None and persist and isinstance(key, bytes):
+            self.disk.put(key, self.result, cost, self.context_writes)
+
+    def _insert(self, result: Any, key: Optional[Hashable], cost: float, context_writes: Any = None) -> None:
+        """Make result the current one and store it under key (evicting beyond max_entries)."""
+        self.result = result
+        self.context_writes = context_writes
+        self.key = key
+        self._current_stats = EntryStats(nbytes=nbytes_of(self.result), cost=cost)
+        self._evicted = False
+        self._stale = False
+        if key is not None:
+            self._entries[key] = self.result
+            self._stats[key] = self._current_stats
+            if context_writes is not None:
+                self._writes[key] = context_writes
+            else:
+                self._writes.pop(key, None)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                evicted_key, _ = self._entries.popitem(last=False)
+                self._stats.pop(evicted_key, None)
+                self._writes.pop(evicted_key, None)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the stored results (current one included)."""
+        total = sum(stats.nbytes for stats in self._stats.values())
+        if self._current_stats is not None and (self.key is None or self.key not in self._stats):
+            total += self._current_stats.nbytes
+        return total
+
+    def eviction_candidates(self) -> List[Tuple[bool, float, Any]]:
+        """(is current result, score, key) of every stored result."""
+        candidates = [(key == self.key, stats.score, key) for key, stats in self._stats.items()]
+        if self._current_stats is not None and (self.key is None or self.key not in self._stats):
+            candidates.append((True, self._current_stats.score, self.key))
+        return candidates
+
+    def evict(self, key: Optional[Hashable]) -> int:
+        """
+        Drop a stored result and return the number of bytes released.
+
+        Dropping the current result makes the next run recompute the filter.
+        """
+        released = 0
+        stats = self._stats.pop(key, None) if key is not None else None
+        if stats is not None:
+            self._entries.pop(key, None)
+            self._writes.pop(key, None)
+            released = stats.nbytes
+        if key == self.key and self._current_stats is not None:
+            released = self._current_stats.nbytes
+            self.result = None
+            self.context_writes = None
+            self.key = None
+            self._current_stats = None
+            self._evicted = True
+            self._report()
+        return released
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Whether a result is stored under key (lookup would find it)."""
+        return key in self._entries
 
     def __repr__(self) -> str:
         return self.name if self.name is not None else "CachedResults"
 
 
+_PRIMITIVE_TYPES = frozenset((type(None), bool, int, float, str))
+
+
+def _params_fingerprint(params: Any) -> Any:
+    """Typed fingerprint of filter parameters, compared run after run by StateChange.
+
+    A parameter dict is fingerprinted value by value (see _fingerprint): primitives
+    are kept as they are, so the usual slider values cost no serialization. The
+    unique marker of _fingerprint is returned when one of the values has none.
+    """
+    if type(params) is not dict:
+        return _fingerprint(params)
+    fingerprints = []
+    for name, value in params.items():
+        value_type = type(value)
+        if value_type in _PRIMITIVE_TYPES:
+            fingerprints.append((name, value_type, value))
+            continue
+        fingerprint = _fingerprint(value)
+        if type(fingerprint) is object:
+            return fingerprint
+        fingerprints.append((name, value_type, fingerprint))
+    return tuple(fingerprints)
+
+
 class StateChange:
     """
     Helper class to check whether or not input parameters have been updated.
 
+    Only a fingerprint of the parameters is kept (primitives compared directly, numpy
+    arrays by shape/dtype/digest, other values by digest): no copy of the values, and
+    array parameters compare without ambiguity. Parameters which cannot be
+    fingerprinted (unpicklable objects) fall back to comparing a private deep copy.
+
     Underlying class used in the interactive pipe cache mechanism.
     """
 
     def __init__(self, name: Optional[str] = None):
         self.name = name
-        self._stored_params = None
+        self._stored_fingerprint: Any = None
+        self._stored_params = None  # private copy, only for parameters without fingerprint
         self._update_needed = False
 
     def has_changed(self, new_params: Any) -> bool:
@@ -88,11 +411,20 @@ class StateChange:
         :param new_params: The new parameters to check.
         :return: True if the parameters have changed or False otherwise.
         """
-        if self._stored_params is None or new_params != self._stored_params:
+        fingerprint = _params_fingerprint(new_params)
+        if type(fingerprint) is not object:
+            self._update_needed = self._stored_fingerprint is None or fingerprint != self._stored_fingerprint
+            self._stored_fingerprint = fingerprint
+            self._stored_params = None
+            return self._update_needed
+        try:
+            changed = self._stored_params is None or bool(new_params != self._stored_params)
+        except ValueError:  # ambiguous comparison (e.g. numpy arrays in a custom object)
+            changed = True
+        if changed:
             self._stored_params = deepcopy(new_params)
-            self._update_needed = True
-        else:
-            self._update_needed = False
+        self._stored_fingerprint = None
+        self._update_needed = changed
         return self._update_needed
 
     @property
@@ -106,3 +438,58 @@ class StateChange:
     def __repr__(self) -> str:
         name_str = self.name if self.name is not None else "StateChange"
         return f"{name_str}: " + ("needs update" if self.update_needed else "no update needed")
+
+
+class CacheBudget:
+    """
+    Memory budget shared by the filter caches of a pipeline.
+
+    Caches register themselves when they store a result. When the bytes they hold
+    exceed the limit, the stored results with the lowest value are evicted first,
+    value being recompute time x (hits + 1) / size: cheap, large and rarely reused
+    results go first. Results kept for a later lookup (cache_max_entries > 1) are
+    evicted before the current results, which are only dropped between runs
+    (the filter is then recomputed at the next run).
+
+    Underlying class used in the interactive pipe cache mechanism.
+    """
+
+    def __init__(self, limit: Union[int, float, str]):
+        self.limit = parse_size(limit)
+        self._caches: "weakref.WeakSet[CachedResults]" = weakref.WeakSet()
+
+    def register(self, cache: CachedResults) -> None:
+        self._caches.add(cache)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory currently held by the registered caches."""
+        return sum(cache.nbytes for cache in self._caches)
+
+    def enforce(self, include_current: bool = True) -> int:
+        """
+        Evict stored results until the budget is met and return the number of bytes released.
+
+        :param include_current: Allow dropping current results (only safe between runs).
+        """
+        caches = list(self._caches)
+        excess = sum(cache.nbytes for cache in caches) - self.limit
+        if excess <= 0:
+            return 0
+        candidates = [
+            (is_current, score, order, cache, key)
+            for order, cache in enumerate(caches)
+            for is_current, score, key in cache.eviction_candidates()
+            if include_current or not is_current
+        ]
+        candidates.sort(key=lambda candidate: candidate[:3])
+        released = 0
+        for _, _, _, cache, key in candidates:
+            if released >= excess:
+                break
+            logging.debug(f"Cache budget: evicting a result of {cache}")
+            released += cache.evict(key)
+        return released
+
+    def __repr__(self) -> str:
+        return f"CacheBudget({self.nbytes}/{self.limit} bytes)"
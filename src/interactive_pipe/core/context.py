@@ -12,6 +12,7 @@ Internal implementation uses contextvars to maintain separate framework and user
 from contextvars import ContextVar
 from typing import Any, Dict, List, Optional, Union
 
+from interactive_pipe.core.context_tracking import ContextTracker
 from interactive_pipe.core.framework_state import FrameworkState
 
 # ============================================================================
@@ -389,6 +390,26 @@ class _ContextProxy:
         """Get item from context with default value."""
         return get_context().get(key, default)
 
+    def publish(self, key: str, value: Any, immutable: bool = False) -> None:
+        """Store a value compared by version instead of content (see ContextTracker.publish).
+
+        With cache="graph", readers of a published key are invalidated each time it is
+        published (or assigned), without hashing the value: large values cost nothing
+        per run. Publish the value again after modifying it in place. Without graph
+        cache, this is a plain assignment.
+
+        Args:
+            key: Context key.
+            value: Value to store.
+            immutable: Make the numpy arrays of the value read-only, so that modifying
+                them in place raises.
+        """
+        ctx = get_context()
+        if isinstance(ctx, ContextTracker):
+            ctx.publish(key, value, immutable=immutable)
+        else:
+            ctx[key] = value
+
     def setdefault(self, key: str, default: Any = None) -> Any:
         """Set default value if key doesn't exist."""
         return get_context().setdefault(key, default)
@@ -9,7 +9,10 @@ has been updated - even though this data dependency is invisible to the AST call
 Change detection combines two mechanisms:
 
 - dict instrumentation attributes reads and writes to the running filter;
-- content fingerprints (:func:`_fingerprint`) catch what instrumentation cannot see:
+- values published with :meth:`ContextTracker.publish` carry a version, bumped on every
+  publication: their changes are decided by comparing versions, and they are never
+  fingerprinted (the cost per run does not depend on their size);
+- content fingerprints (see :mod:`interactive_pipe.core.fingerprint`) catch what instrumentation cannot see:
   in-place mutation of stored objects (``context["boxes"].append(...)``) is detected by
   re-fingerprinting every key a filter accessed when it finishes, and mutations happening
   outside any filter (GUI callbacks, stashed references) are detected at the start of the
@@ -21,13 +24,17 @@ Known limitations (conservative by design, documented for users of ``cache="grap
   next run start: the runs in between may serve one stale frame for its readers.
 - ``dict(context)`` style copies bypass instrumentation; prefer explicit key access or
   ``context.items()`` which registers the filter as a reader of every key.
-- Unpicklable values cannot be fingerprinted: their key counts as changed on every check,
-  so their readers are recomputed on every run (never stale, but never cached either).
+- Unpicklable values cannot be fingerprinted (unless they define ``__ip_fingerprint__``):
+  their key counts as changed on every check, so their readers are recomputed on every
+  run (never stale, but never cached either).
 """
 
-import hashlib
-import pickle
-from typing import Any, Dict, Optional, Set
+import os
+import threading
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, Mapping, Optional, Set, Tuple
+
+from interactive_pipe.core.fingerprint import _fingerprint
 
 # cache modes enabling dependency-aware caching; "graph-strict" additionally returns
 # numpy arrays as read-only views so in-place mutation raises at the offending line
@@ -36,28 +43,32 @@ GRAPH_CACHE_MODES = ("graph", "graph-strict")
 _UNSET = object()
 
 
-def _fingerprint(value: Any) -> Any:
-    """Content digest used to decide whether a context value actually changed.
-
-    Detects in-place mutation that dict instrumentation alone cannot see, and
-    avoids spurious invalidation when a filter rewrites an equal value.
-
-    - primitives: the value itself (with its type, so True != 1)
-    - numpy arrays: shape + dtype + hash of the raw buffer (one fast memory pass)
-    - anything else: hash of its pickle serialization
-    - unpicklable values: a unique marker that never compares equal, so the key is
-      conservatively considered changed on every check (extra recompute, never stale)
-    """
-    if value is None or isinstance(value, (bool, int, float, str, bytes)):
-        return ("primitive", type(value).__name__, value)
+def _freeze_arrays(value: Any) -> Any:
+    """Make the numpy arrays of an immutable published value read-only, in place."""
     value_type = type(value)
-    if value_type.__module__ == "numpy" and value_type.__name__ == "ndarray":
-        return ("ndarray", value.shape, str(value.dtype), hashlib.sha1(value.tobytes()).digest())
-    try:
-        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
-    except Exception:
-        return object()
-    return ("pickle", hashlib.sha1(payload).digest())
+    if value_type.__module__ == "numpy" and value_type.__name__ in ("ndarray", "memmap"):
+        value.flags.writeable = False
+    elif value_type in (list, tuple):
+        for item in value:
+            _freeze_arrays(item)
+    elif value_type is dict:
+        for item in value.values():
+            _freeze_arrays(item)
+    return value
+
+
+class _FilterScope(threading.local):
+    """Per-thread attribution state: which filter runs in this thread and what it touched.
+
+    Thread-local so that filters executed concurrently (``executor="threads"``) each get
+    their own reads/writes attributed, while the read/write registries stay shared.
+    """
+
+    def __init__(self):
+        self.name: Optional[str] = None  # name of the filter currently running
+        self.touched: Set[Any] = set()  # keys accessed by the current filter
+        self.written: Set[Any] = set()  # keys assigned or deleted by the current filter
+        self.read_all = False  # current filter enumerated the whole context
 
 
 class ContextTracker(dict):
@@ -75,6 +86,8 @@ class ContextTracker(dict):
       baseline (the net effect of the filter, judged at the filter boundary), so
       rewriting an equal value never invalidates readers, while in-place mutations
       are reliably detected.
+    - Keys stored with :meth:`publish` are compared by version instead: never
+      fingerprinted, every assignment counts as a change.
     """
 
     def __init__(
@@ -90,10 +103,14 @@ class ContextTracker(dict):
         self._strict = strict
         self._reads: Dict[str, Set[Any]] = {}  # filter name -> keys it reads
         self._reads_all: Set[str] = set()  # filters enumerating the whole context
-        self._current: Optional[str] = None  # name of the filter currently running
+        self._writes: Dict[str, Set[Any]] = {}  # filter name -> keys it writes
+        # inverted indexes, maintained as accesses are recorded: key -> filter names
+        self._readers: Dict[Any, Set[str]] = {}
+        self._writers: Dict[Any, Set[str]] = {}
+        self._observed: Set[str] = set()  # filters which ran at least once under tracking
+        self._last_writes: Dict[str, Set[Any]] = {}  # filter name -> keys written by its last execution
+        self._scope = _FilterScope()  # per-thread current filter attribution
         self._external_changes: Set[Any] = set()  # keys changed outside any filter
-        self._current_touched: Set[Any] = set()  # keys accessed by the current filter
-        self._current_read_all = False  # current filter enumerated the whole context
         # keys starting with this prefix are not tracked at all
         # (defensive exclusion of framework-internal keys when wrapping shared dicts)
         self._ignore_prefix = ignore_prefix
@@ -102,10 +119,61 @@ class ContextTracker(dict):
         for key in dict.keys(self):
             if not self._ignored(key):
                 self._digests[key] = _fingerprint(dict.__getitem__(self, key))
+        # published keys: version of their current value (compared instead of fingerprints)
+        self._versions: Dict[Any, int] = {}
+        self._immutable: Set[Any] = set()  # published keys whose arrays are made read-only
+        self._clock = 0
+        # versions only mean something within this tracker: they are tagged with a random
+        # session so that persisted cache keys never match a value of another session
+        self._session = os.urandom(8).hex()
 
     def _ignored(self, key: Any) -> bool:
         return self._ignore_prefix is not None and isinstance(key, str) and key.startswith(self._ignore_prefix)
 
+    def _digest_of(self, key: Any) -> Any:
+        """Change detection token of a present key: its version when published, else its fingerprint."""
+        version = self._versions.get(key)
+        if version is not None:
+            return ("published", self._session, version)
+        return _fingerprint(dict.__getitem__(self, key))
+
+    def _new_version(self, key: Any, value: Any) -> Any:
+        """Bump the version of a published key for the value about to be stored."""
+        self._clock += 1
+        self._versions[key] = self._clock
+        return _freeze_arrays(value) if key in self._immutable else value
+
+    def _forget_version(self, key: Any) -> None:
+        self._versions.pop(key, None)
+        self._immutable.discard(key)
+
+    def publish(self, key: Any, value: Any, immutable: bool = False) -> None:
+        """Store a value under a new version: readers are invalidated without fingerprinting it.
+
+        From then on, the key is compared by version: every assignment (``publish`` or
+        ``context[key] = ...``) counts as a change, and the value is never hashed, so
+        large values (models, volumes, look-up tables) cost nothing per run. Modifying
+        the value in place goes unnoticed: publish it again afterwards.
+
+        :param key: context key
+        :param value: value to store
+        :param immutable: the value will not be modified in place: its numpy arrays
+            (the value itself, or the items of a list, tuple or dict) are made read-only
+            so that a modification raises instead of going unnoticed
+        """
+        if self._ignored(key):
+            raise ValueError(f"Cannot publish {key!r}: keys starting with {self._ignore_prefix!r} are reserved")
+        self._versions.setdefault(key, 0)
+        if immutable:
+            self._immutable.add(key)
+        else:
+            self._immutable.discard(key)
+        self[key] = value
+
+    def version(self, key: Any) -> Optional[int]:
+        """Version of a published key (None when the key is not published)."""
+        return self._versions.get(key)
+
     def _wrap_readonly(self, value: Any) -> Any:
         if not self._strict:
             return value
@@ -120,10 +188,12 @@ class ContextTracker(dict):
     # Engine hooks
     # ------------------------------------------------------------------
     def begin_filter(self, name: str) -> None:
-        """Attribute subsequent context accesses to the given filter."""
-        self._current = name
-        self._current_touched = set()
-        self._current_read_all = False
+        """Attribute subsequent context accesses (from the calling thread) to the given filter."""
+        self._observed.add(name)
+        self._scope.name = name
+        self._scope.touched = set()
+        self._scope.written = set()
+        self._scope.read_all = False
 
     def finish_filter(self) -> Set[Any]:
         """Stop attributing accesses and return the keys the filter NET-changed.
@@ -136,13 +206,13 @@ class ContextTracker(dict):
           value (context["boxes"] = []; ...append(...)) leaves the key unchanged,
           which lets feedback/self loops converge instead of recomputing forever.
         """
-        touched = self._current_touched
-        if self._current_read_all:
+        touched = self._scope.touched
+        if self._scope.read_all:
             touched = touched | {key for key in dict.keys(self) if not self._ignored(key)}
         changes: Set[Any] = set()
         for key in touched:
             if dict.__contains__(self, key):
-                new_digest = _fingerprint(dict.__getitem__(self, key))
+                new_digest = self._digest_of(key)
                 old_digest = self._digests.get(key, _UNSET)
                 self._digests[key] = new_digest
                 if old_digest is _UNSET or old_digest != new_digest:
@@ -150,9 +220,12 @@ class ContextTracker(dict):
             elif self._digests.pop(key, _UNSET) is not _UNSET:
                 # key deleted by this filter
                 changes.add(key)
-        self._current = None
-        self._current_touched = set()
-        self._current_read_all = False
+        if self._scope.name is not None:
+            self._last_writes[self._scope.name] = self._scope.written
+        self._scope.name = None
+        self._scope.touched = set()
+        self._scope.written = set()
+        self._scope.read_all = False
         return changes
 
     def detect_silent_changes(self) -> Set[Any]:
@@ -160,16 +233,16 @@ class ContextTracker(dict):
         content changed through untracked paths since the last check (in-place mutation
         of a stored object between runs: GUI callbacks, stashed references...).
 
-        Called by the engine at the start of each run.
+        Called by the engine at the start of each run. Published keys are skipped: their
+        changes are known from their versions.
         """
-        monitored: Set[Any] = set()
-        for keys in self._reads.values():
-            monitored |= keys
         if self._reads_all:
-            monitored |= {key for key in dict.keys(self) if not self._ignored(key)}
+            monitored: Iterable[Any] = [key for key in dict.keys(self) if not self._ignored(key)]
+        else:
+            monitored = list(self._readers)
         changed = set()
         for key in monitored:
-            if not dict.__contains__(self, key):
+            if key in self._versions or not dict.__contains__(self, key):
                 continue
             new_digest = _fingerprint(dict.__getitem__(self, key))
             old_digest = self._digests.get(key, _UNSET)
@@ -200,35 +273,106 @@ class ContextTracker(dict):
             return False
         if filter_name in self._reads_all:
             return True
-        return bool(self._reads.get(filter_name, set()) & changed_keys)
+        readers = self._readers
+        return any(filter_name in readers.get(key, ()) for key in changed_keys)
 
     def readers_of(self, key: Any) -> Set[str]:
         """Names of all filters known to read the given key."""
+        return self._readers.get(key, set()) | self._reads_all
+
+    def readers_of_keys(self, keys: Iterable[Any]) -> Set[str]:
+        """Names of all filters known to read any of the given keys."""
         readers = set(self._reads_all)
-        for name, keys in self._reads.items():
-            if key in keys:
-                readers.add(name)
+        for key in keys:
+            readers |= self._readers.get(key, set())
         return readers
 
+    def writers_of(self, key: Any) -> Set[str]:
+        """Names of all filters known to write the given key."""
+        return set(self._writers.get(key, set()))
+
+    @property
+    def readers_index(self) -> Mapping[Any, Set[str]]:
+        """Read-only view of the inverted read index: key -> names of the filters reading it.
+
+        Filters enumerating the whole context are not listed under every key, see
+        :meth:`readers_of`. The sets are live: do not modify them.
+        """
+        return MappingProxyType(self._readers)
+
+    def last_writes(self, filter_name: str) -> Set[Any]:
+        """Keys assigned or deleted by the last execution of a filter (equal values included)."""
+        return set(self._last_writes.get(filter_name, set()))
+
+    def observed(self, filter_name: str) -> bool:
+        """Whether the filter already ran under tracking (its accesses are known)."""
+        return filter_name in self._observed
+
+    def reads_of(self, filter_name: str) -> Tuple[Set[Any], bool]:
+        """Keys known to be read by a filter, and whether it enumerates the whole context."""
+        return set(self._reads.get(filter_name, set())), filter_name in self._reads_all
+
+    def read_digests(self, filter_name: str) -> Optional[tuple]:
+        """Fingerprints of the keys a filter is known to read, as sorted (key, digest) pairs.
+
+        Part of the key under which the filter's results are cached. None when one of
+        the values cannot be fingerprinted (such a result can never be reused).
+        """
+        keys = set(self._reads.get(filter_name, set()))
+        if filter_name in self._reads_all:
+            keys |= {key for key in dict.keys(self) if not self._ignored(key)}
+        pairs = []
+        for key in keys:
+            digest = self._digests.get(key)  # None: key absent from the context
+            if type(digest) is object:
+                return None
+            pairs.append((repr(key), digest))
+        return tuple(sorted(pairs, key=lambda pair: pair[0]))
+
+    def accessors(self) -> Set[str]:
+        """Names of all filters known to read or write the context."""
+        return set(self._reads) | self._reads_all | set(self._writes)
+
+    def conflicts(self, filter_a: str, filter_b: str) -> bool:
+        """Whether two filters access a common key, at least one of them writing it.
+
+        Conflicting filters must run in pipeline order (a reader scheduled before its
+        writer would see a stale value). Whole-context readers conflict with any writer.
+        """
+        writes_a = self._writes.get(filter_a, set())
+        writes_b = self._writes.get(filter_b, set())
+        if (filter_a in self._reads_all and writes_b) or (filter_b in self._reads_all and writes_a):
+            return True
+        accessed_a = self._reads.get(filter_a, set()) | writes_a
+        accessed_b = self._reads.get(filter_b, set()) | writes_b
+        return bool((writes_a & accessed_b) or (writes_b & accessed_a))
+
     # ------------------------------------------------------------------
     # Recording helpers
     # ------------------------------------------------------------------
     def _record_read(self, key: Any) -> None:
-        if self._current is not None and not self._ignored(key):
-            self._reads.setdefault(self._current, set()).add(key)
-            self._current_touched.add(key)
+        scope = self._scope
+        if scope.name is not None and not self._ignored(key):
+            self._reads.setdefault(scope.name, set()).add(key)
+            self._readers.setdefault(key, set()).add(scope.name)
+            scope.touched.add(key)
 
     def _record_read_all(self) -> None:
-        if self._current is not None:
-            self._reads_all.add(self._current)
-            self._current_read_all = True
+        scope = self._scope
+        if scope.name is not None:
+            self._reads_all.add(scope.name)
+            scope.read_all = True
 
     def _record_write(self, key: Any, new_value: Any = _UNSET) -> None:
         if self._ignored(key):
             return
-        if self._current is not None:
+        scope = self._scope
+        if scope.name is not None:
             # net change decided at finish_filter by fingerprint comparison
-            self._current_touched.add(key)
+            self._writes.setdefault(scope.name, set()).add(key)
+            self._writers.setdefault(key, set()).add(scope.name)
+            scope.touched.add(key)
+            scope.written.add(key)
             return
         # write outside any filter (GUI events, user code between runs)
         if new_value is _UNSET:
@@ -236,7 +380,8 @@ class ContextTracker(dict):
             if self._digests.pop(key, _UNSET) is not _UNSET:
                 self._external_changes.add(key)
         else:
-            new_digest = _fingerprint(new_value)
+            version = self._versions.get(key)
+            new_digest = _fingerprint(new_value) if version is None else ("published", self._session, version)
             old_digest = self._digests.get(key, _UNSET)
             self._digests[key] = new_digest
             if old_digest is _UNSET or old_digest != new_digest:
@@ -260,6 +405,8 @@ class ContextTracker(dict):
         return dict.__contains__(self, key)
 
     def __setitem__(self, key, value):
+        if key in self._versions:
+            value = self._new_version(key, value)
         self._record_write(key, value)
         dict.__setitem__(self, key, value)
 
@@ -273,22 +420,27 @@ class ContextTracker(dict):
         if dict.__contains__(self, key):
             self._record_write(key)
         dict.__delitem__(self, key)
+        self._forget_version(key)
 
     def pop(self, key, *args):
         self._record_read(key)
         if dict.__contains__(self, key):
             self._record_write(key)
+        self._forget_version(key)
         return dict.pop(self, key, *args)
 
     def popitem(self):
         self._record_read_all()
         key, value = dict.popitem(self)
         self._record_write(key)
+        self._forget_version(key)
         return key, value
 
     def update(self, *args, **kwargs):
         incoming = dict(*args, **kwargs)
         for key, value in incoming.items():
+            if key in self._versions:
+                incoming[key] = value = self._new_version(key, value)
             self._record_write(key, value)
         dict.update(self, incoming)
 
@@ -296,6 +448,8 @@ class ContextTracker(dict):
         for key in list(dict.keys(self)):
             self._record_write(key)
         dict.clear(self)
+        self._versions.clear()
+        self._immutable.clear()
 
     def keys(self):
         self._record_read_all()
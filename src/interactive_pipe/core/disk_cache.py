@@ -0,0 +1,229 @@
+"""Persistent on-disk tier of the filter caches (``cache_dir=...``).
+
+Results are content-addressed: the directory of an entry is named after the cache key
+the engine computes for a filter execution, which digests the filter identity (name and
+source code), its parameters, the context values it reads and - chaining through the
+keys of upstream results - the content of the pipeline inputs. A restarted session
+computing the same thing finds the same key, so the front of the pipeline loads from
+disk instead of being recomputed.
+
+Layout of an entry (``<cache_dir>/<key[:2]>/<key>/``):
+
+- ``result.pkl``: the result structure, numpy arrays being replaced by placeholders,
+  the time it took to compute and the context values the execution wrote (replayed
+  when the result is loaded, see CachedResults.context_writes);
+- ``<n>.npy``: one file per numpy array, loaded memory-mapped and read-only.
+
+Entries are written by a background thread (into a temporary directory renamed once
+complete, so readers never see partial entries). The least recently used entries are
+removed when the directory grows beyond its size limit. Entries are plain pickles:
+only point cache_dir to a directory you trust.
+"""
+
+import logging
+import os
+import pickle
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+import numpy as np
+
+from interactive_pipe.core.cache import parse_size
+
+_RESULT_FILE = "result.pkl"
+
+
+@dataclass(frozen=True)
+class _NpyRef:
+    """Placeholder of a numpy array saved next to the result structure."""
+
+    index: int
+
+
+def _split_arrays(value: Any, arrays: list) -> Any:
+    """Replace numpy arrays by placeholders (recursing into lists/tuples/dicts)."""
+    value_type = type(value)
+    if value_type.__module__ == "numpy" and value_type.__name__ in ("ndarray", "memmap") and not value.dtype.hasobject:
+        arrays.append(value)
+        return _NpyRef(len(arrays) - 1)
+    if isinstance(value, (list, tuple)):
+        return type(value)(_split_arrays(item, arrays) for item in value)
+    if isinstance(value, dict):
+        return {key: _split_arrays(item, arrays) for key, item in value.items()}
+    return value
+
+
+def _join_arrays(value: Any, entry: Path) -> Any:
+    if isinstance(value, _NpyRef):
+        # plain ndarray backed by the memory map (read-only)
+        return np.load(entry / f"{value.index}.npy", mmap_mode="r").view(np.ndarray)
+    if isinstance(value, (list, tuple)):
+        return type(value)(_join_arrays(item, entry) for item in value)
+    if isinstance(value, dict):
+        return {key: _join_arrays(item, entry) for key, item in value.items()}
+    return value
+
+
+def _directory_size(path: Path) -> int:
+    return sum(item.stat().st_size for item in path.iterdir() if item.is_file())
+
+
+class DiskCache:
+    """
+    Content-addressed store of filter results in a directory, shared across sessions.
+
+    :param path: Directory holding the entries (created if needed).
+    :param max_size: Size limit (bytes or a string like "20GB"); None for no limit.
+    :param min_compute_time: Only results which took at least this long (seconds) to
+        compute are written: reloading a cheap result is not worth the disk traffic.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, os.PathLike],
+        max_size: Union[int, str, None] = "10GB",
+        min_compute_time: float = 0.1,
+    ):
+        self.path = Path(path).expanduser()
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.max_size = parse_size(max_size) if max_size is not None else None
+        self.min_compute_time = min_compute_time
+        self._lock = threading.Lock()
+        self._index: Optional[Dict[str, Tuple[int, float]]] = None  # key -> (bytes, last use)
+        self._writer: Optional[ThreadPoolExecutor] = None
+        self._pending: list = []
+
+    def _entry(self, key: bytes) -> Path:
+        name = key.hex()
+        return self.path / name[:2] / name
+
+    def _load_index(self) -> Dict[str, Tuple[int, float]]:
+        """Lazily scan the directory (entries written by previous sessions)."""
+        if self._index is None:
+            index = {}
+            for entry in self.path.glob("??/*"):
+                if (entry / _RESULT_FILE).is_file():
+                    index[entry.name] = (_directory_size(entry), entry.stat().st_mtime)
+            self._index = index
+        return self._index
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the stored entries."""
+        with self._lock:
+            return sum(size for size, _ in self._load_index().values())
+
+    def __contains__(self, key: bytes) -> bool:
+        return (self._entry(key) / _RESULT_FILE).is_file()
+
+    def get(self, key: Optional[bytes]) -> Tuple[bool, Any, float, Any]:
+        """
+        Load a stored result.
+
+        :param key: Cache key of the filter execution.
+        :return: (found, result, compute time of the result, context writes of its execution).
+        """
+        if key is None:
+            return False, None, 0.0, None
+        entry = self._entry(key)
+        try:
+            with open(entry / _RESULT_FILE, "rb") as result_file:
+                structure, cost, writes_structure = pickle.load(result_file)
+            result = _join_arrays(structure, entry)
+            context_writes = _join_arrays(writes_structure, entry)
+        except FileNotFoundError:
+            return False, None, 0.0, None
+        except Exception as e:
+            # Broad on purpose: a truncated or foreign entry must never break a run
+            logging.warning(f"Ignoring unreadable disk cache entry {entry}: {e}")
+            self._remove(entry.name)
+            return False, None, 0.0, None
+        now = time.time()
+        try:
+            os.utime(entry, (now, now))  # least recently used bookkeeping across sessions
+        except OSError:
+            pass
+        with self._lock:
+            index = self._load_index()
+            if entry.name in index:
+                index[entry.name] = (index[entry.name][0], now)
+        return True, result, cost, context_writes
+
+    def put(self, key: Optional[bytes], result: Any, cost: float, context_writes: Any = None) -> None:
+        """Store a result in the background (nothing happens for cheap or unkeyed results).
+
+        The result and context_writes must not be mutated afterwards (cached results never are).
+        """
+        if key is None or cost < self.min_compute_time or key in self:
+            return
+        if self._writer is None:
+            self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="interactive_pipe_disk_cache")
+        self._pending = [future for future in self._pending if not future.done()]
+        self._pending.append(self._writer.submit(self._write, key, result, cost, context_writes))
+
+    def flush(self) -> None:
+        """Wait until every pending result is written."""
+        for future in self._pending:
+            future.result()
+        self._pending = []
+
+    def _write(self, key: bytes, result: Any, cost: float, context_writes: Any) -> None:
+        entry = self._entry(key)
+        staging = self.path / f"tmp-{uuid.uuid4().hex}"
+        try:
+            staging.mkdir()
+            arrays: list = []
+            structure = _split_arrays(result, arrays)
+            writes_structure = _split_arrays(context_writes, arrays)
+            with open(staging / _RESULT_FILE, "wb") as result_file:
+                pickle.dump((structure, cost, writes_structure), result_file, protocol=pickle.HIGHEST_PROTOCOL)
+            for index, array in enumerate(arrays):
+                np.save(staging / f"{index}.npy", np.ascontiguousarray(array), allow_pickle=False)
+            entry.parent.mkdir(exist_ok=True)
+            os.rename(staging, entry)
+        except Exception as e:
+            # Broad on purpose: unpicklable results or a full disk only cost a recompute
+            logging.warning(f"Could not write disk cache entry {entry.name}: {e}")
+            shutil.rmtree(staging, ignore_errors=True)
+            return
+        with self._lock:
+            self._load_index()[entry.name] = (_directory_size(entry), time.time())
+        self._evict()
+
+    def _remove(self, name: str) -> None:
+        shutil.rmtree(self.path / name[:2] / name, ignore_errors=True)
+        with self._lock:
+            if self._index is not None:
+                self._index.pop(name, None)
+
+    def _evict(self) -> None:
+        """Remove the least recently used entries beyond max_size."""
+        if self.max_size is None:
+            return
+        with self._lock:
+            index = self._load_index()
+            excess = sum(size for size, _ in index.values()) - self.max_size
+            victims = []
+            for name, (size, _) in sorted(index.items(), key=lambda item: item[1][1]):
+                if excess <= 0:
+                    break
+                victims.append(name)
+                excess -= size
+        for name in victims:
+            logging.debug(f"Disk cache: evicting {name}")
+            self._remove(name)
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        self.flush()
+        for name in list(self._load_index()):
+            self._remove(name)
+
+    def __repr__(self) -> str:
+        return f"DiskCache({str(self.path)!r})"
@@ -1,13 +1,26 @@
+import contextvars
+import hashlib
+import heapq
+import inspect
 import logging
 import os
+import pickle
 import sys
 import time
 import traceback
+import weakref
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from copy import deepcopy
-from typing import List, Optional, Set, Union
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union
 
+from interactive_pipe.core.cache import CacheBudget, CachedResults, freeze, nbytes_of
+from interactive_pipe.core.context import _set_user_context, _user_context
 from interactive_pipe.core.context_tracking import GRAPH_CACHE_MODES, ContextTracker
+from interactive_pipe.core.disk_cache import DiskCache
 from interactive_pipe.core.filter import FilterCore
+from interactive_pipe.core.fingerprint import _fingerprint
+from interactive_pipe.core.framework_state import FrameworkState
 
 
 class FilterError(Exception):
@@ -31,7 +44,8 @@ class FilterError(Exception):
             return []
 
         # Walk through traceback to find the user's code (not in interactive_pipe/src)
-        tb_list = traceback.extract_tb(self.tb)
+        # (errors raised in worker processes arrive as already extracted frames)
+        tb_list = self.tb if isinstance(self.tb, traceback.StackSummary) else traceback.extract_tb(self.tb)
         user_frames = []
         for frame in tb_list:
             # Skip frames from the interactive_pipe framework itself
@@ -120,6 +134,28 @@ def _readonly_view(value):
     return value
 
 
+def _frozen_input(value):
+    """Read-only version of a pipeline input, without copying numpy buffers.
+
+    numpy arrays (np.memmap included, which stays a memory map) are handed out as
+    read-only views; lists and tuples are frozen item by item, immutable scalars pass
+    through. Other values (torch tensors, arbitrary objects) cannot be frozen: they
+    are deep-copied, as with safe_input_buffer_deepcopy.
+    """
+    value_type = type(value)
+    if value_type.__module__ == "numpy" and value_type.__name__ in ("ndarray", "memmap"):
+        if not value.flags.writeable:
+            return value
+        view = value.view()
+        view.flags.writeable = False
+        return view
+    if isinstance(value, (list, tuple)):
+        return type(value)(_frozen_input(item) for item in value)
+    if value is None or isinstance(value, (bool, int, float, complex, str, bytes)):
+        return value
+    return deepcopy(value)
+
+
 def _capture_tensor_versions(buffers) -> List[tuple]:
     """Snapshot torch tensors' in-place version counters (recursing into lists/tuples).
 
@@ -141,27 +177,434 @@ def _capture_tensor_versions(buffers) -> List[tuple]:
     return versions
 
 
+# execution strategies: filters in list order, or concurrently following the dependency
+# graph (see PipelineEngine._run_concurrent) on threads or on worker processes
+# ("processes" is implemented by ProcessPipelineEngine in core/process_engine.py)
+EXECUTORS = ("sequential", "threads", "processes")
+
+
+def _build_producer_indexes(filters: List[FilterCore]) -> List[List[Optional[int]]]:
+    """For each filter input, the index of the upstream filter producing it.
+
+    None stands for a pipeline input (or an explicit None routing). When a variable is
+    produced several times, each consumer is bound to the latest producer before it.
+    """
+    producer = {}  # variable name (or index) -> index of the filter producing it
+    producers: List[List[Optional[int]]] = []
+    for idx, prc in enumerate(filters):
+        producers.append([producer.get(inp) if inp is not None else None for inp in prc.inputs or []])
+        for out in prc.outputs or []:
+            producer[out] = idx
+    return producers
+
+
 def _build_dependency_indexes(filters: List[FilterCore]) -> List[Set[int]]:
     """For each filter, the indexes of upstream filters producing its inputs.
 
     Source order is always a valid topological order (a variable is produced before
     it is consumed), so dependencies only point backwards in the filter list.
     """
-    producer = {}  # variable name (or index) -> index of the filter producing it
-    dependencies: List[Set[int]] = []
+    return [{dep for dep in deps if dep is not None} for deps in _build_producer_indexes(filters)]
+
+
+def _route_outputs(prc: FilterCore, out: Any) -> Dict[Any, Any]:
+    """Map a filter result onto its output variable names."""
+    routed = {}
+    if prc.outputs is not None:
+        for i, ido in enumerate(prc.outputs):
+            if isinstance(out, (list, tuple)):
+                routed[ido] = out[i]
+            # Simpler manner of defining a process fuction (do not return a list)
+            else:
+                routed[ido] = out
+    return routed
+
+
+def _flatten_outputs(outputs: Any) -> Set[Any]:
+    """Variable names of the pipeline outputs (nested output lists are flattened)."""
+    names: Set[Any] = set()
+    for item in outputs or []:
+        if isinstance(item, (list, tuple)):
+            names |= _flatten_outputs(item)
+        elif item is not None:
+            names.add(item)
+    return names
+
+
+def _last_uses(filters: List[FilterCore]) -> Dict[Any, int]:
+    """For each variable, the index of the last filter consuming it."""
+    last_use = {}
     for idx, prc in enumerate(filters):
-        deps = set()
         for inp in prc.inputs or []:
-            if inp is not None and inp in producer:
-                deps.add(producer[inp])
-        dependencies.append(deps)
-        for out in prc.outputs or []:
-            producer[out] = idx
-    return dependencies
+            if inp is not None:
+                last_use[inp] = idx
+    return last_use
+
+
+class _LiveBuffers:
+    """Bytes held by the buffer of a run (release_buffers=True), and their peak.
+
+    Buffers are counted once per object: a variable routed to several names, or
+    passed through unchanged, is only accounted once.
+    """
+
+    def __init__(self) -> None:
+        self._refs: Dict[int, List[Any]] = {}  # id -> [value, number of names holding it]
+        self.nbytes = 0
+        self.peak = 0
+
+    def add(self, value: Any) -> None:
+        ref = self._refs.get(id(value))
+        if ref is not None:
+            ref[1] += 1
+            return
+        self._refs[id(value)] = [value, 1]
+        self.nbytes += nbytes_of(value)
+        self.peak = max(self.peak, self.nbytes)
+
+    def remove(self, value: Any) -> None:
+        ref = self._refs.get(id(value))
+        if ref is None:
+            return
+        ref[1] -= 1
+        if ref[1] == 0:
+            del self._refs[id(value)]
+            self.nbytes -= nbytes_of(value)
+
+
+def _digest(value: Any) -> bytes:
+    return hashlib.sha1(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)).digest()
+
+
+# source code digest of filter implementations (functions or classes)
+_CODE_DIGESTS: "weakref.WeakKeyDictionary[Any, bytes]" = weakref.WeakKeyDictionary()
+
+
+def _code_digest(prc: FilterCore) -> bytes:
+    """Digest of the source code of a filter: editing a filter invalidates its results.
+
+    Function filters digest the function, class-based filters every class of their
+    hierarchy defined outside interactive_pipe. Falls back to the qualified name when
+    the source is unavailable (interactive sessions, compiled code).
+    """
+    if inspect.ismethod(prc.apply):
+        targets = [cls for cls in type(prc).__mro__ if not cls.__module__.startswith(("interactive_pipe.", "builtins"))]
+    else:
+        targets = [inspect.unwrap(prc.apply)]
+    digests = []
+    for target in targets:
+        try:
+            digest = _CODE_DIGESTS.get(target)
+        except TypeError:  # not weak-referenceable (e.g. builtin)
+            digest = None
+        if digest is None:
+            try:
+                source = inspect.getsource(target)
+            except (OSError, TypeError):
+                source = f"{getattr(target, '__module__', '')}.{getattr(target, '__qualname__', repr(target))}"
+            digest = hashlib.sha1(source.encode()).digest()
+            try:
+                _CODE_DIGESTS[target] = digest
+            except TypeError:
+                pass
+        digests.append(digest)
+    return _digest(tuple(digests))
+
+
+_NOT_FOUND = object()
+
+
+def _current_key(cache: Optional[CachedResults]) -> Optional[bytes]:
+    """Key of the current result of a filter cache (the engine keys results by digest)."""
+    key = None if cache is None else cache.key
+    return key if isinstance(key, bytes) else None
+
+
+def _writes_since(before: Dict[str, dict], shared: Dict[str, dict]) -> Optional[dict]:
+    """Writes to untracked dicts since they were copied: {role: (values written, keys deleted)}.
+
+    New objects assigned to a key are seen, objects modified in place are not (like the
+    rest of the cache=True mode). None: nothing written.
+    """
+    writes = {}
+    for role, target in shared.items():
+        previous = before[role]
+        written = {name: value for name, value in target.items() if previous.get(name, _NOT_FOUND) is not value}
+        deleted = previous.keys() - target.keys()
+        if written or deleted:
+            writes[role] = (written, deleted)
+    return writes or None
+
+
+def _input_token(value: Any) -> Any:
+    """Content token of a pipeline input (None: its content cannot be digested)."""
+    fingerprint = _fingerprint(value)
+    return None if type(fingerprint) is object else ("input", _digest(fingerprint))
+
+
+def _topology(filters: List[FilterCore]) -> tuple:
+    """What an execution plan is compiled from: filters, their implementation, routing and cache."""
+    return tuple(
+        (
+            prc,
+            prc.name,
+            getattr(prc.apply, "__func__", prc.apply),
+            tuple(prc.inputs or ()),
+            tuple(prc.outputs or ()),
+            prc.cache_mem is None,
+        )
+        for prc in filters
+    )
+
+
+class _ExecutionPlan:
+    """Filter list compiled once, reused by every run until the topology changes.
+
+    Holds everything a run derives from the routing alone: the producer of each
+    filter input, data dependencies, last consumers (release_buffers), filter indexes
+    by name and source code digests (cache keys). Parameters, cache state and context
+    accesses change from run to run and are not part of it.
+    """
+
+    def __init__(self, filters: List[FilterCore], signature: Optional[tuple] = None):
+        self.filters = list(filters)
+        self.signature = signature if signature is not None else _topology(filters)
+        self.producers = _build_producer_indexes(self.filters)
+        self.data_dependencies = [frozenset(dep for dep in deps if dep is not None) for deps in self.producers]
+        # (variable name, producer index or None for a pipeline input) per filter input
+        self.bindings = [
+            tuple(zip(prc.inputs or [], producers)) for prc, producers in zip(self.filters, self.producers)
+        ]
+        self.last_use = _last_uses(self.filters)
+        self.last_producer = {out: idx for idx, prc in enumerate(self.filters) for out in prc.outputs or []}
+        # demand-driven evaluation: filters run whatever the requested outputs, i.e. without
+        # outputs (side effects only) or rearranging the output grid (layout.grid)
+        self.always_needed = {idx for idx, prc in enumerate(self.filters) if not prc.outputs}
+        self.evaluated = False  # whether every filter ran once with this plan
+        self.consumer_counts = [0] * len(self.filters)  # data consumers of each filter
+        self.successors: List[List[int]] = [[] for _ in self.filters]  # data consumers of each filter
+        for idx, deps in enumerate(self.data_dependencies):
+            for dep in deps:
+                self.consumer_counts[dep] += 1
+                self.successors[dep].append(idx)
+        # dirty-set propagation (graph cache): names of the filters reported since they
+        # were last checked (parameters assigned, cache invalidated), and the outputs of
+        # every filter as of its last evaluation (None: not available)
+        self.dirty: Set[str] = set()
+        self.routed: List[Optional[Dict[Any, Any]]] = [None] * len(self.filters)
+        self.unmaterialized = set(range(len(self.filters)))
+        self.uncached = {idx for idx, prc in enumerate(self.filters) if prc.cache_mem is None}
+        self.input_consumers: Dict[Any, int] = {}  # pipeline input -> number of consuming filters
+        for bindings in self.bindings:
+            for name in {name for name, producer in bindings if producer is None and name is not None}:
+                self.input_consumers[name] = self.input_consumers.get(name, 0) + 1
+        self.index = {prc.name: idx for idx, prc in enumerate(self.filters)}
+        self._code_digests: List[Optional[bytes]] = [None] * len(self.filters)
+        # parameters of each filter as last seen (dict, shallow copy): an item assigned in
+        # place (filter.values["gain"] = 3.0) does not go through the values setter
+        self._values_seen = [(prc.values, dict(prc.values)) for prc in self.filters]
+
+    def modified_values(self) -> Set[int]:
+        """Filters whose parameters were modified in place since they were last seen.
+
+        A shallow dict comparison (items compared by identity first), far cheaper than
+        fingerprinting the parameters: values mutated deeper (an array edited in place)
+        are not seen.
+        """
+        modified = set()
+        for idx, prc in enumerate(self.filters):
+            values = prc.values
+            seen, copy = self._values_seen[idx]
+            try:
+                unchanged = values is seen and values == copy
+            except Exception:
+                # Broad on purpose: another array assigned compares element-wise (ambiguous)
+                unchanged = False
+            if not unchanged:
+                modified.add(idx)
+                self._values_seen[idx] = (values, dict(values))
+        return modified
+
+    def demand(self, outputs: Any, trackers: List[ContextTracker]) -> Optional[Set[int]]:
+        """Filters needed to compute the requested outputs (None: every filter).
+
+        The upstream cone of the outputs, plus the filters writing context keys read by
+        a needed filter (and their own cone). Every filter runs until the plan was fully
+        evaluated once: context accesses and layout changes are only known afterwards.
+        """
+        if not self.evaluated:
+            return None
+        stack = list(self.always_needed)
+        stack.extend(self.last_producer[name] for name in _flatten_outputs(outputs) if name in self.last_producer)
+        needed: Set[int] = set()
+        while stack:
+            idx = stack.pop()
+            if idx in needed:
+                continue
+            needed.add(idx)
+            stack.extend(self.data_dependencies[idx])
+            for trk in trackers:
+                keys, reads_all = trk.reads_of(self.filters[idx].name)
+                writers = trk.accessors() if reads_all else set().union(*(trk.writers_of(key) for key in keys))
+                stack.extend(self.index[name] for name in writers if name in self.index)
+        return needed
+
+    def remember(self, idx: int, out: Any) -> None:
+        """Keep the outputs of a filter just evaluated for the next runs (its cached result if any)."""
+        prc = self.filters[idx]
+        self.routed[idx] = _route_outputs(prc, prc.cache_mem.result if prc.cache_mem is not None else out)
+        self.unmaterialized.discard(idx)
+        self.dirty.discard(prc.name)
+
+    def forget(self, idx: int) -> None:
+        """Drop the outputs kept for a filter (stale or evicted result)."""
+        self.routed[idx] = None
+        self.unmaterialized.add(idx)
+
+    def code_digest(self, idx: int) -> bytes:
+        digest = self._code_digests[idx]
+        if digest is None:
+            digest = self._code_digests[idx] = _code_digest(self.filters[idx])
+        return digest
+
+
+class _CacheKeys:
+    """Keys under which the results of a run are stored (see CachedResults.lookup).
+
+    Merkle style: the key of a filter execution digests the filter parameters, the keys
+    of the results it consumes (tokens, chaining back to the pipeline inputs) and, in
+    graph cache modes, the fingerprints of the context keys it reads. With cache=True,
+    the content of every pipeline input and the parameters of every earlier filter are
+    digested too: they stand for the untracked context dependencies the sequential
+    prefix cache assumes (an earlier filter may pass an input on through the context).
+    The key of a
+    result is its token for consumers. None means the result cannot be reused
+    (unpicklable parameter or context value, uncached producer).
+
+    The filter source code is digested as well, and pipeline inputs are identified by
+    the given input tokens (content digests, see PipelineEngine.digest_inputs), by
+    their index otherwise.
+    """
+
+    def __init__(
+        self,
+        plan: _ExecutionPlan,
+        trackers: List[ContextTracker],
+        prefix: bool,
+        input_tokens: Optional[Dict[Any, Any]] = None,
+    ):
+        self.plan = plan
+        self.filters = plan.filters
+        self.trackers = trackers
+        self.prefix = prefix
+        self.input_tokens = input_tokens
+        self.tokens: List[Optional[bytes]] = [None] * len(self.filters)  # key of each filter's current result
+        self.complete: List[bool] = [False] * len(self.filters)  # keys computed with known context reads
+        self._params: Dict[int, Optional[bytes]] = {}
+        # digest of the pipeline inputs and of the parameters of filters [0, idx)
+        self._prefixes: List[Optional[bytes]] = []
+
+    def _values(self, idx: int) -> dict:
+        return self.filters[idx].values
+
+    def _read_digests(self, trk: ContextTracker, filter_name: str) -> Optional[tuple]:
+        return trk.read_digests(filter_name)
+
+    def _params_digest(self, idx: int) -> Optional[bytes]:
+        if idx not in self._params:
+            fingerprint = _fingerprint(self._values(idx))
+            self._params[idx] = None if type(fingerprint) is object else _digest(fingerprint)
+        return self._params[idx]
+
+    def _prefix_digest(self, idx: int) -> Optional[bytes]:
+        if not self._prefixes:
+            inputs = tuple((idi, self._input_token(idi)) for idi in self.input_tokens or {})
+            self._prefixes.append(None if any(token is None for _, token in inputs) else _digest(inputs))
+        while len(self._prefixes) <= idx:
+            pos = len(self._prefixes) - 1
+            previous, params = self._prefixes[pos], self._params_digest(pos)
+            self._prefixes.append(None if previous is None or params is None else _digest((previous, params)))
+        return self._prefixes[idx]
+
+    def key(self, idx: int) -> Optional[bytes]:
+        prc = self.filters[idx]
+        upstream = tuple(
+            self._input_token(idi) if producer is None else self.tokens[producer]
+            for idi, producer in self.plan.bindings[idx]
+        )
+        parts = [prc.name, self.plan.code_digest(idx), self._params_digest(idx), upstream]
+        if self.prefix:
+            parts.append(self._prefix_digest(idx))
+        parts.extend(self._read_digests(trk, prc.name) for trk in self.trackers)
+        self.complete[idx] = all(trk.observed(prc.name) for trk in self.trackers)
+        if any(part is None for part in parts) or any(token is None for token in upstream):
+            return None
+        return _digest(tuple(parts))
+
+    def _input_token(self, idi: Any) -> Any:
+        if self.input_tokens is None:
+            return ("input", idi)
+        return self.input_tokens.get(idi, ("input", idi))  # None: input content cannot be digested
+
+    def key_after_run(self, idx: int, key: Optional[bytes], filter_changes: list) -> Optional[bytes]:
+        """Key to store a fresh result under, given the key computed before it ran.
+
+        Context reads are only known once a filter ran: when it changed no context key,
+        the values it read are untouched, so the key is recomputed with all its reads.
+        """
+        if not self.trackers or any(changed for _, changed in filter_changes):
+            return key
+        return self.key(idx)
+
+
+class _EvaluationKeys(_CacheKeys):
+    """Cache keys of an evaluation (see PipelineEngine.evaluate), from its own state.
+
+    Parameters are the filter values overridden by the evaluation, and the context keys
+    read from the user context are digested from the evaluation context: the keys match
+    the ones a run with the same state would store its results under.
+    """
+
+    def __init__(
+        self,
+        plan: _ExecutionPlan,
+        trackers: List[ContextTracker],
+        input_tokens: Dict[Any, Any],
+        parameters: Dict[str, dict],
+        context_tracker: Optional[ContextTracker],
+        context: dict,
+    ):
+        super().__init__(plan, trackers, prefix=False, input_tokens=input_tokens)
+        self.parameters = parameters
+        self.context_tracker = context_tracker
+        self.context = context
+
+    def _values(self, idx: int) -> dict:
+        prc = self.filters[idx]
+        return {**prc.values, **self.parameters.get(prc.name, {})}
+
+    def _read_digests(self, trk: ContextTracker, filter_name: str) -> Optional[tuple]:
+        if trk is not self.context_tracker:
+            return trk.read_digests(filter_name)
+        keys, reads_all = trk.reads_of(filter_name)
+        if reads_all:
+            keys |= set(self.context)
+        pairs = []
+        for key in keys:
+            digest = _fingerprint(self.context[key]) if key in self.context else None
+            if type(digest) is object:
+                return None
+            pairs.append((repr(key), digest))
+        return tuple(sorted(pairs, key=lambda pair: pair[0]))
+
+
+# outcome of a single filter execution: (outputs, context keys changed per tracker,
+# (exception, traceback) or None, elapsed seconds)
+_FilterRun = Tuple[Any, List[Tuple[ContextTracker, Set[Any]]], Optional[Tuple[Exception, Any]], float]
 
 
 class PipelineEngine:
-    """Executes a list of filters sequentially, with several cache modes:
+    """Executes a list of filters, with several cache modes:
 
     - cache=False: recompute every filter on every run.
     - cache=True: sequential prefix cache. A filter is skipped only when its own
@@ -174,33 +617,307 @@ class PipelineEngine:
     - cache="graph-strict": same as "graph", but context reads return numpy arrays as
       read-only views so accidental in-place mutation raises at the offending line.
 
+    Pipeline inputs are deep-copied on every run (safe_input_buffer_deepcopy=True), so
+    nothing can alter the caller's buffers. freeze_inputs=True replaces these copies by
+    read-only views of the numpy inputs (np.memmap inputs are never materialized): the
+    same protection for no per-run cost. Inputs which cannot be frozen are still copied.
+
     Filter inputs are handed out as read-only numpy views by default (readonly_inputs=True):
     mutating an input in place (img += 1) raises at the offending line instead of silently
     corrupting sibling filters or cached buffers. Filters declaring inplace=True receive
     private writable deep copies of their inputs instead.
+
+    Executors:
+
+    - executor="sequential" (default): filters run one after the other in list order.
+    - executor="threads": filters whose inputs are ready run concurrently on a thread pool
+      of max_workers threads, following the data dependency graph (independent branches
+      overlap). Cache decisions, context tracking and the returned buffer are identical to
+      the sequential executor. Worthwhile when filters release the GIL (numpy, OpenCV,
+      torch). Filters exchanging data through the shared context are ordered through the
+      runtime-tracked context accesses of graph cache modes (learnt during a sequential
+      first run); with other cache modes nothing tracks them, so runs stay sequential.
+    - executor="processes": same scheduling on a pool of worker processes, see
+      ProcessPipelineEngine.
+
+    cache_memory_limit (bytes, or a string like "2GB") bounds the memory held by all
+    filter caches, see CacheBudget.
+
+    freeze_outputs=True caches filter outputs by reference, made read-only (see freeze),
+    instead of deep copies: recomputing a filter no longer copies its outputs. The
+    outputs handed back by run() are then read-only as well; filters declaring
+    inplace=True still receive private writable copies of their inputs.
+
+    cache_dir (a directory, or a DiskCache) persists the cached results on disk, so that
+    a new session computing the same results loads them instead, see DiskCache.
+    cache_disk_limit bounds the size of the directory. Requires a graph cache mode: the
+    results must be keyed by everything they depend on, context reads included.
     """
 
+    # executors this class knows how to run
+    supported_executors = ("sequential", "threads")
+
     def __init__(
         self,
         cache: Union[bool, str] = False,
         safe_input_buffer_deepcopy=True,
         readonly_inputs: bool = True,
+        executor: str = "sequential",
+        max_workers: Optional[int] = None,
+        cache_memory_limit: Union[int, str, None] = None,
+        cache_dir: Union[str, os.PathLike, DiskCache, None] = None,
+        cache_disk_limit: Union[int, str, None] = "10GB",
+        freeze_outputs: bool = False,
+        freeze_inputs: bool = False,
+        release_buffers: bool = False,
+        demand_driven: bool = False,
     ) -> None:
+        if executor not in EXECUTORS:
+            raise ValueError(f"Unknown executor {executor!r}, expected one of {EXECUTORS}")
+        if executor not in self.supported_executors:
+            raise ValueError(f"{type(self).__name__} does not support executor {executor!r}")
+        if max_workers is not None and max_workers < 1:
+            raise ValueError(f"max_workers must be a positive integer, got {max_workers}")
         self.cache = cache
         self.safe_input_buffer_deepcopy = safe_input_buffer_deepcopy
+        self.freeze_inputs = freeze_inputs
         self.readonly_inputs = readonly_inputs
+        self.executor = executor
+        self.max_workers = max_workers
+        self.freeze_outputs = freeze_outputs
+        # drop intermediate buffers once their last consumer ran (run(outputs=...))
+        self.release_buffers = release_buffers
+        self.peak_buffer_bytes: Optional[int] = None  # measured by the last run (release_buffers)
+        # skip the filters which do not feed the requested outputs (run(outputs=...))
+        if demand_driven and cache not in GRAPH_CACHE_MODES:
+            raise ValueError(f"demand_driven requires cache='graph' or 'graph-strict', got cache={cache!r}")
+        self.demand_driven = demand_driven
+        self._needed: Optional[Set[int]] = None  # filters needed by the current run (None: all)
+        self._keep: Optional[Set[Any]] = None  # variables surviving the current run
+        self._live: Optional[_LiveBuffers] = None
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+        # memory budget shared by the filter caches (None: unbounded)
+        self.cache_budget = CacheBudget(cache_memory_limit) if cache_memory_limit is not None else None
+        # persistent tier of the filter caches (None: memory only)
+        if cache_dir is not None and cache not in GRAPH_CACHE_MODES:
+            raise ValueError(f"cache_dir requires cache='graph' or 'graph-strict', got cache={cache!r}")
+        if cache_dir is None or isinstance(cache_dir, DiskCache):
+            self.disk_cache = cache_dir
+        else:
+            self.disk_cache = DiskCache(cache_dir, max_size=cache_disk_limit)
+        self._input_digests: Dict[Any, Tuple[Any, Any]] = {}  # input index -> (input, token)
+        self._input_tokens: Optional[Dict[Any, Any]] = None  # tokens of the current run inputs
+        # cache=True: context writes of the last execution of each filter (untracked dicts)
+        self._untracked_writes: Dict[str, Optional[dict]] = {}
+        self._plan: Optional[_ExecutionPlan] = None  # compiled filter list, see compile()
         # trackers wired by PipelineCore when cache is a graph mode:
         # - context_tracker wraps the user context (`context` proxy API)
         # - global_params_tracker wraps the shared dict accessed as self.global_params
         #   by class-based filters
+        # - events_tracker wraps the key-bound events read through the `events` proxy
         self.context_tracker: Optional[ContextTracker] = None
         self.global_params_tracker: Optional[ContextTracker] = None
+        self.events_tracker: Optional[ContextTracker] = None
 
-    def run(self, filters: List[FilterCore], imglst=None):
-        performances = []
+    def _graph_trackers(self) -> List[ContextTracker]:
+        """Trackers of the runtime accesses followed by graph cache modes."""
+        trackers = (self.context_tracker, self.global_params_tracker, self.events_tracker)
+        return [t for t in trackers if t is not None]
+
+    def run(self, filters: List[FilterCore], imglst=None, outputs=None):
+        """Run the filters on the inputs and return the buffer (variable name -> value).
+
+        With release_buffers, passing the pipeline outputs lets the engine drop every
+        other variable as soon as its last consumer ran: the returned buffer only holds
+        the outputs, and peak_buffer_bytes reports the peak size of the buffer.
+        With demand_driven, only the filters needed to compute the outputs run.
+        """
         logging.debug(100 * "-")
+        plan = self.compile(filters)
+        result = self._load_inputs(imglst)
+        if self.release_buffers and outputs is not None:
+            self._keep = _flatten_outputs(outputs)
+            self._live = _LiveBuffers()
+            for value in result.values():
+                self._live.add(value)
+        else:
+            self._keep, self._live = None, None
+
+        trackers: List[ContextTracker] = []
+        if self.cache in GRAPH_CACHE_MODES:
+            trackers = self._graph_trackers()
+        # per tracker: context keys updated outside of the pipeline run (GUI events,
+        # user code) - either through tracked writes or silent in-place mutation
+        changed_keys: dict = {id(t): set(t.consume_external_changes()) | t.detect_silent_changes() for t in trackers}
+        run_writes: List[tuple] = []  # (filter index, tracker, context keys changed this run)
+
+        self._input_tokens = self.digest_inputs(imglst) if self.cache else None
+        self._needed = plan.demand(outputs, trackers) if self.demand_driven and outputs is not None else None
+        try:
+            performances = self._dispatch(filters, result, trackers, changed_keys, run_writes)
+            plan.evaluated = plan.evaluated or self._needed is None
+        finally:
+            if self.cache_budget is not None:
+                # between runs: current results may be dropped as well
+                self.cache_budget.enforce()
+                for name in plan.dirty:
+                    idx = plan.index.get(name)
+                    if idx is None:
+                        continue
+                    cache_mem = filters[idx].cache_mem
+                    if cache_mem is not None and cache_mem.evicted:
+                        plan.forget(idx)  # release the memory now, recomputed when needed
+
+        if run_writes:
+            # Backward context edges (feedback across runs): when a filter updates a key
+            # read by a filter located earlier in the pipeline (or by itself), the reader
+            # computed with the previous value - invalidate its cache for the next run.
+            # Readers located after the writer already saw the fresh value this run.
+            name_to_idx = self._plan.index  # type: ignore[union-attr]
+            for writer_idx, trk, keys in run_writes:
+                for key in keys:
+                    for reader_name in trk.readers_of(key):
+                        reader_idx = name_to_idx.get(reader_name)
+                        if reader_idx is None or reader_idx > writer_idx:
+                            continue
+                        reader_cache = filters[reader_idx].cache_mem
+                        if reader_cache is not None:
+                            logging.debug(
+                                f"Context feedback: {filters[writer_idx].name} updated '{key}', "
+                                f"invalidating earlier reader {reader_name} for next run"
+                            )
+                            reader_cache.force_change = True
+
+        # Limit result using self.numfigs but with indices pointed by last filter
+        logging.info("\n".join(performances))
+        logging.info(f"Full buffer: {len(result)}")
+        if self._live is not None:
+            self.peak_buffer_bytes = self._live.peak
+            logging.info(f"Peak buffer: {self._live.peak / 1e6:.1f} MB")
+            self._keep, self._live = None, None
+        return result
+
+    def compile(self, filters: List[FilterCore]) -> _ExecutionPlan:
+        """Execution plan of a filter list, compiled again only when its topology changed.
+
+        Filters, their implementation and their input/output routing are compared with
+        the current plan: changing them (e.g. editing pipeline.filters) recompiles.
+        """
+        signature = _topology(filters)
+        if self._plan is None or self._plan.signature != signature:
+            logging.debug(f"Compiling the execution plan of {len(filters)} filters")
+            self._plan = _ExecutionPlan(filters, signature)
+            if self.cache in GRAPH_CACHE_MODES:
+                # parameter assignments and cache invalidations report to the plan
+                for prc in filters:
+                    prc.dirty_sink = self._plan.dirty
+                    if prc.cache_mem is not None:
+                        prc.cache_mem.dirty_sink = self._plan.dirty
+        return self._plan
+
+    def close(self) -> None:
+        """Shut down the worker pool, if any (a new one is created on the next run).
+
+        Pending disk cache writes are completed as well.
+        """
+        if self._thread_pool is not None:
+            self._thread_pool.shutdown(wait=True)
+            self._thread_pool = None
+        if self.disk_cache is not None:
+            self.disk_cache.flush()
+
+    def digest_inputs(self, imglst, refresh: bool = False) -> Dict[Any, Any]:
+        """Content tokens of the pipeline inputs, part of the cache keys of their consumers.
+
+        Results computed from other input content are told apart (and persist across
+        sessions). Digests are remembered as long as the same input objects are passed:
+        like the rest of the cache, inputs are assumed not to be modified in place
+        between runs. refresh=True digests them again (PipelineCore does on assignment).
+        None tokens stand for inputs which cannot be digested.
+        """
+        if imglst is None:
+            return {}
+        items = enumerate(imglst) if isinstance(imglst, list) else imglst.items()
+        tokens = {}
+        for idi, value in items:
+            known = self._input_digests.get(idi)
+            if refresh or known is None or known[0] is not value:
+                known = self._input_digests[idi] = (value, _input_token(value))
+            tokens[idi] = known[1]
+        return tokens
+
+    def evaluate(
+        self,
+        filters: List[FilterCore],
+        imglst: Optional[dict],
+        parameters: Dict[str, dict],
+        context: dict,
+        framework_state: FrameworkState,
+        outputs=None,
+    ) -> dict:
+        """Run the filters with the given state, leaving the filters and the engine untouched.
+
+        Re-entrant: several threads may evaluate the same filters concurrently.
+        parameters override the filter values, context is the user context of this
+        evaluation (a private dict) and framework_state receives layout/audio calls.
+        Results cached by previous runs are reused when their key matches (graph cache
+        modes), but nothing is stored. With outputs, only the filters needed to compute
+        them run (once the pipeline ran every filter).
+
+        :raises FilterError: a filter failed.
+        """
+        signature = _topology(filters)
+        plan = self._plan
+        if plan is None or plan.signature != signature:
+            plan = _ExecutionPlan(filters, signature)  # private: compile() installs the current one
+        trackers: List[ContextTracker] = []
+        keys = None
+        if self.cache in GRAPH_CACHE_MODES:
+            trackers = self._graph_trackers()
+            items = imglst.items() if imglst is not None else []
+            input_tokens = {idi: _input_token(value) for idi, value in items}
+            keys = _EvaluationKeys(plan, trackers, input_tokens, parameters, self.context_tracker, context)
+        needed = plan.demand(outputs, trackers) if outputs is not None else None
+        result = self._load_inputs(imglst)
+
+        def evaluate_filters() -> None:
+            _set_user_context(context)
+            for idx, prc in enumerate(filters):
+                if needed is not None and idx not in needed:
+                    continue
+                key = keys.key(idx) if keys is not None and prc.cache_mem is not None else None
+                found, out, writes = prc.cache_mem.peek(key) if key is not None else (False, None, None)  # type: ignore[union-attr]
+                if found and writes and "context" in writes:
+                    # what the execution wrote to the user context, as if the filter ran
+                    written, deleted = writes["context"]
+                    context.update(deepcopy(written))
+                    for name in deleted:
+                        context.pop(name, None)
+                if not found:
+                    values = {**prc.values, **parameters.get(prc.name, {})}
+                    routing_in = [None if idi is None else result[idi] for idi in prc.inputs or []]
+                    try:
+                        out = self._apply_filter(prc, routing_in, values=values, framework_state=framework_state)
+                    except Exception as e:
+                        raise FilterError(prc.name, e, sys.exc_info()[2]) from None
+                if keys is not None:
+                    keys.tokens[idx] = key
+                result.update(_route_outputs(prc, out))
+
+        # context variables set by the filters stay private to this evaluation
+        contextvars.copy_context().run(evaluate_filters)
+        return result
+
+    def _load_inputs(self, imglst) -> dict:
+        """Initial buffer of a run: the pipeline inputs (deep-copied if safe_input_buffer_deepcopy).
+
+        With freeze_inputs, numpy inputs are read-only views instead of copies.
+        """
         result = {}
-        if imglst is not None:
+        if imglst is not None and self.freeze_inputs:
+            items = enumerate(imglst) if isinstance(imglst, list) else imglst.items()
+            result = {input_index: _frozen_input(inp) for input_index, inp in items}
+        elif imglst is not None:
             if isinstance(imglst, list):
                 for input_index, inp in enumerate(imglst):
                     if self.safe_input_buffer_deepcopy:
@@ -214,22 +931,65 @@ class PipelineEngine:
                     result = deepcopy(imglst)
                 else:
                     result = imglst
+        return result
+
+    @staticmethod
+    def _accesses_known(filters: List[FilterCore], trackers: List[ContextTracker]) -> bool:
+        """Whether every filter already ran under tracking (its context accesses are known).
+
+        Never without trackers (cache=False or True): nothing tells which filters
+        exchange data through the context.
+        """
+        return bool(trackers) and all(trk.observed(prc.name) for trk in trackers for prc in filters)
 
+    def _dispatch(
+        self,
+        filters: List[FilterCore],
+        result: dict,
+        trackers: List[ContextTracker],
+        changed_keys: dict,
+        run_writes: List[tuple],
+    ) -> List[str]:
+        """Pick the execution strategy of a run and return the per-filter timings."""
+        # context accesses are unknown until a filter ran once under tracking (and
+        # always outside the graph cache modes): such runs stay sequential so that
+        # context writers precede their readers
+        if self.executor == "threads" and len(filters) > 1 and self._accesses_known(filters, trackers):
+            return self._run_concurrent(filters, result, trackers, changed_keys, run_writes)
+        if self.cache in GRAPH_CACHE_MODES and self._live is None and self._plan.evaluated:  # type: ignore[union-attr]
+            return self._run_dirty(filters, result, trackers, changed_keys, run_writes)
+        return self._run_sequential(filters, result, trackers, changed_keys, run_writes)
+
+    def _run_sequential(
+        self,
+        filters: List[FilterCore],
+        result: dict,
+        trackers: List[ContextTracker],
+        changed_keys: dict,
+        run_writes: List[tuple],
+    ) -> List[str]:
+        """Run filters one after the other in list order, filling result in place."""
+        performances = []
         graph_mode = self.cache in GRAPH_CACHE_MODES
-        trackers: List[ContextTracker] = []
-        if graph_mode:
-            trackers = [t for t in (self.context_tracker, self.global_params_tracker) if t is not None]
-        dependencies = _build_dependency_indexes(filters) if graph_mode else []
+        plan: _ExecutionPlan = self._plan  # type: ignore[assignment]  # compiled by run()
+        dependencies = plan.data_dependencies
+        keys = self._cache_keys(plan, trackers) if self.cache else None
         dirty_flags: List[bool] = []
-        # per tracker: context keys updated outside of the pipeline run (GUI events,
-        # user code) - either through tracked writes or silent in-place mutation
-        changed_keys: dict = {id(t): set(t.consume_external_changes()) | t.detect_silent_changes() for t in trackers}
-        run_writes: List[tuple] = []  # (filter index, tracker, context keys changed this run)
-
         skip_calculation = True
         previous_calculation = False
+        live = self._live
+        last_use = plan.last_use
+        if live is not None:
+            self._release(result, [name for name in result if name not in last_use], live)
+        needed = self._needed
         for idx, prc in enumerate(filters):
             tic = time.perf_counter()
+            if needed is not None and idx not in needed:
+                deps_dirty = any(dirty_flags[dep] for dep in dependencies[idx])
+                dirty_flags.append(self._skip(plan, idx, deps_dirty, trackers, changed_keys))
+                performances.append(f"{prc.name}: skipped")
+                continue
+            previous_key = prc.cache_mem.key if prc.cache_mem is not None else None
             if graph_mode:
                 # dependency-aware cache: a filter is dirty when its own parameters changed,
                 # one of its producers is dirty, or a context key it reads was updated
@@ -253,100 +1013,625 @@ class PipelineEngine:
                 if prc.cache_mem is None:
                     raise RuntimeError(f"Cache memory is None for filter {prc.name}")
                 out = prc.cache_mem.result
+                key = _current_key(prc.cache_mem)
+                prc.cache_mem.record_hit()
                 previous_calculation = False
             else:
-                logging.debug(("... " if previous_calculation else "!!! ") + f"Calculating {prc.name}")
-                for trk in trackers:
-                    # attribute context reads/writes to this filter while it runs
-                    trk.begin_filter(prc.name)
-                try:
-                    routing_in = []
-                    if prc.inputs:
-                        routing_in = [result[idi] if idi is not None else None for idi in prc.inputs]
-                    tensor_versions = []
-                    if self.readonly_inputs and routing_in:
-                        if getattr(prc, "inplace", False):
-                            # declared in-place filter: private writable copies keep the
-                            # shared buffers and upstream caches safe
-                            routing_in = [deepcopy(buf) for buf in routing_in]
-                        else:
-                            # read-only views: in-place mutation raises at the user's line
-                            routing_in = [_readonly_view(buf) for buf in routing_in]
-                            # torch tensors cannot be made read-only: detect mutation instead
-                            tensor_versions = _capture_tensor_versions(routing_in)
-                    logging.debug(f"in types-> {[type(inp) for inp in routing_in]}")
-                    out = prc.run(*routing_in)
-                    for buf, version in tensor_versions:
-                        if getattr(buf, "_version", version) != version:
-                            raise RuntimeError(
-                                "in-place mutation of a torch tensor input detected. "
-                                "Declare the filter with inplace=True (it will receive private "
-                                "writable copies) or copy first (tensor = tensor.clone()). "
-                                "Set readonly_inputs=False on the pipeline to allow this (unsafe "
-                                "with caching or when several filters share the same buffer)."
-                            )
-                    if out is not None:
-                        try:
-                            logging.debug(f"out types-> {[type(ou) for ou in out]}")
-                        except TypeError:
-                            # out is not iterable (e.g., single value)
-                            logging.debug(f"out type-> {type(out)}")
-                except Exception as e:
-                    # the run dies here: persist the context keys already changed this
-                    # run (by this filter or completed ones) so the next run still
-                    # invalidates their readers
-                    for trk in trackers:
-                        trk.report_aborted_run(changed_keys[id(trk)])
-                    # Broad on purpose: prc.run executes arbitrary user filter
-                    # code; wrap whatever it raises in FilterError and re-raise.
-                    # Create a clean, user-friendly error
-                    _, _, tb = sys.exc_info()
-                    filter_error = FilterError(prc.name, e, tb)
-                    filter_error.print_compact()
-                    raise filter_error from None  # 'from None' suppresses the chained traceback
-                finally:
-                    filter_changes = [(trk, trk.finish_filter()) for trk in trackers]
-                for trk, keys_changed in filter_changes:
-                    if keys_changed:
-                        # context keys updated by this filter dirty their readers downstream
-                        changed_keys[id(trk)] |= keys_changed
-                        run_writes.append((idx, trk, keys_changed))
-                previous_calculation = True
-                if self.cache and prc.cache_mem is not None:  # cache result if cache available
-                    logging.debug(f"<-- Storing result from {prc.name}")
-                    prc.cache_mem.update(out)
+                # key of this execution, from the state of its inputs (before it runs)
+                key = keys.key(idx) if keys is not None and prc.cache_mem is not None else None
+                reused = self._lookup(prc, key, trackers) if prc.cache_mem is not None else None
+                if reused is not None:
+                    logging.debug(f"-->  Reuse stored outputs from filter {idx}: {prc.name}")
+                    out = prc.cache_mem.result  # type: ignore[union-attr]
+                    self._record_filter_changes(idx, reused, changed_keys, run_writes)
+                    if graph_mode:
+                        # back to the result of the previous run: nothing changes downstream
+                        dirty_flags[idx] = key != previous_key
+                    previous_calculation = False
+                else:
+                    logging.debug(("... " if previous_calculation else "!!! ") + f"Calculating {prc.name}")
+
+                    def resolve_inputs(prc=prc):
+                        if not prc.inputs:
+                            return []
+                        return [result[idi] if idi is not None else None for idi in prc.inputs]
+
+                    layout = self._layout_of(prc)
+                    out, filter_changes, error, elapsed = self._execute_filter(prc, resolve_inputs, trackers)
+                    if error is not None:
+                        raise self._filter_error(prc, error, trackers, changed_keys, filter_changes) from None
+                    if self._layout_of(prc) is not layout:
+                        plan.always_needed.add(idx)
+                    self._record_filter_changes(idx, filter_changes, changed_keys, run_writes)
+                    previous_calculation = True
+                    if self.cache and prc.cache_mem is not None:  # cache result if cache available
+                        logging.debug(f"<-- Storing result from {prc.name}")
+                        key = keys.key_after_run(idx, key, filter_changes)  # type: ignore[union-attr]
+                        persist = keys.complete[idx]  # type: ignore[union-attr]
+                        self._store(prc, out, key, elapsed, persist=persist, filter_changes=filter_changes)
+            if keys is not None:
+                keys.tokens[idx] = key
+            if graph_mode:
+                plan.remember(idx, out)
             # put prc output at the right position within result vector
-            if prc.outputs is not None:
-                for i, ido in enumerate(prc.outputs):
-                    if isinstance(out, (list, tuple)):
-                        result[ido] = out[i]
-                    # Simpler manner of defining a process fuction (do not return a list)
-                    else:
-                        result[ido] = out
+            routed = _route_outputs(prc, out)
+            if live is not None:
+                for name, value in routed.items():
+                    if name in result:
+                        live.remove(result[name])
+                    live.add(value)
+            result.update(routed)
+            if live is not None:
+                # dead variables: consumed for the last time here, or never consumed
+                names = set(prc.inputs or []) | set(routed)
+                self._release(result, [name for name in names if last_use.get(name, -1) <= idx], live)
             toc = time.perf_counter()
             performances.append(f"{prc.name}: {toc - tic:0.4f} seconds")
+        return performances
 
-        if run_writes:
-            # Backward context edges (feedback across runs): when a filter updates a key
-            # read by a filter located earlier in the pipeline (or by itself), the reader
-            # computed with the previous value - invalidate its cache for the next run.
-            # Readers located after the writer already saw the fresh value this run.
-            name_to_idx = {filt.name: filt_idx for filt_idx, filt in enumerate(filters)}
-            for writer_idx, trk, keys in run_writes:
-                for key in keys:
-                    for reader_name in trk.readers_of(key):
-                        reader_idx = name_to_idx.get(reader_name)
-                        if reader_idx is None or reader_idx > writer_idx:
-                            continue
-                        reader_cache = filters[reader_idx].cache_mem
-                        if reader_cache is not None:
-                            logging.debug(
-                                f"Context feedback: {filters[writer_idx].name} updated '{key}', "
-                                f"invalidating earlier reader {reader_name} for next run"
-                            )
-                            reader_cache.force_change = True
+    def _run_dirty(
+        self,
+        filters: List[FilterCore],
+        result: dict,
+        trackers: List[ContextTracker],
+        changed_keys: dict,
+        run_writes: List[tuple],
+    ) -> List[str]:
+        """Graph cache run only touching the dirty subgraph, in list order.
 
-        # Limit result using self.numfigs but with indices pointed by last filter
-        logging.info("\n".join(performances))
-        logging.info(f"Full buffer: {len(result)}")
-        return result
+        Filters report parameter assignments and cache invalidations to the plan (items
+        assigned in place are found by a shallow comparison); context keys updated outside
+        of the run dirty their readers. Only those filters are checked, then what their
+        changes propagate to: data consumers and readers of the context keys they update.
+        The other filters keep the outputs of their last evaluation, so a run checks and
+        computes O(changed) filters rather than O(filters). Decisions match
+        _run_sequential, which evaluates every filter (first run of a plan).
+        """
+        plan: _ExecutionPlan = self._plan  # type: ignore[assignment]  # compiled by run()
+        needed = self._needed
+        keys = self._cache_keys(plan, trackers)
+        reported = set(plan.dirty)
+        plan.dirty.clear()
+        seeds = {plan.index[name] for name in reported if name in plan.index} | plan.uncached
+        seeds |= plan.modified_values()
+        seeds |= plan.unmaterialized if needed is None else plan.unmaterialized & needed
+        for trk in trackers:
+            if changed_keys[id(trk)]:
+                readers = trk.readers_of_keys(changed_keys[id(trk)])
+                seeds.update(plan.index[name] for name in readers if name in plan.index)
+        queue = sorted(seeds)  # a sorted list is a heap: list order
+        dirty_flags: Dict[int, bool] = {}
+        fresh: Dict[int, Dict[Any, Any]] = {}  # outputs computed by this run
+        performances = []
+
+        def resolve_inputs(idx: int) -> list:
+            return [
+                None
+                if idi is None
+                else (result[idi] if producer is None else (fresh.get(producer) or plan.routed[producer])[idi])  # type: ignore[index]
+                for idi, producer in plan.bindings[idx]
+            ]
+
+        def propagate(idx: int) -> None:
+            for successor in plan.successors[idx]:
+                heapq.heappush(queue, successor)
+
+        def propagate_context(idx: int, filter_changes: list) -> None:
+            self._record_filter_changes(idx, filter_changes, changed_keys, run_writes)
+            for trk, keys_changed in filter_changes:
+                # readers further down see the updated context keys this run
+                if keys_changed:
+                    for reader in trk.readers_of_keys(keys_changed):
+                        if plan.index.get(reader, -1) > idx:
+                            heapq.heappush(queue, plan.index[reader])
+
+        idx = -1
+        try:
+            while queue:
+                idx = heapq.heappop(queue)
+                if idx in dirty_flags:
+                    continue
+                prc = filters[idx]
+                tic = time.perf_counter()
+                deps_dirty = any(dirty_flags.get(dep, False) for dep in plan.data_dependencies[idx])
+                if needed is not None and idx not in needed:
+                    dirty_flags[idx] = self._skip(plan, idx, deps_dirty, trackers, changed_keys)
+                    if prc.name in reported:
+                        plan.dirty.add(prc.name)  # parameters checked when needed again
+                    if dirty_flags[idx]:
+                        propagate(idx)
+                    continue
+                cache = prc.cache_mem
+                previous_key = cache.key if cache is not None else None
+                params_changed = cache is None or cache.has_changed(prc.values)
+                context_dirty = any(t.reads_changed_keys(prc.name, changed_keys[id(t)]) for t in trackers)
+                if not (params_changed or deps_dirty or context_dirty):
+                    logging.debug(f"-->  Load cached outputs from filter {idx}: {prc.name}")
+                    cache.record_hit()  # type: ignore[union-attr]
+                    if idx in plan.unmaterialized:
+                        plan.remember(idx, None)
+                    dirty_flags[idx] = False
+                    continue
+                for dep in plan.data_dependencies[idx]:
+                    if dep not in dirty_flags:  # clean producer: key of its current result
+                        dep_cache = filters[dep].cache_mem
+                        keys.tokens[dep] = _current_key(dep_cache)
+                key = keys.key(idx) if cache is not None else None
+                reused = self._lookup(prc, key, trackers) if cache is not None else None
+                if reused is not None:
+                    logging.debug(f"-->  Reuse stored outputs from filter {idx}: {prc.name}")
+                    out = cache.result  # type: ignore[union-attr]
+                    propagate_context(idx, reused)
+                    # back to the result of the previous run: nothing changes downstream
+                    dirty_flags[idx] = key != previous_key
+                else:
+                    logging.debug(f"!!! Calculating {prc.name}")
+                    layout = self._layout_of(prc)
+                    out, filter_changes, error, elapsed = self._execute_filter(
+                        prc, partial(resolve_inputs, idx), trackers
+                    )
+                    if error is not None:
+                        raise self._filter_error(prc, error, trackers, changed_keys, filter_changes) from None
+                    if self._layout_of(prc) is not layout:
+                        plan.always_needed.add(idx)
+                    propagate_context(idx, filter_changes)
+                    if cache is not None:
+                        logging.debug(f"<-- Storing result from {prc.name}")
+                        key = keys.key_after_run(idx, key, filter_changes)
+                        self._store(prc, out, key, elapsed, persist=keys.complete[idx], filter_changes=filter_changes)
+                    dirty_flags[idx] = True
+                keys.tokens[idx] = key
+                fresh[idx] = _route_outputs(prc, out)
+                plan.remember(idx, out)
+                if dirty_flags[idx]:
+                    propagate(idx)
+                performances.append(f"{prc.name}: {time.perf_counter() - tic:0.4f} seconds")
+        except BaseException:
+            # filters left unchecked are checked at the next run
+            plan.dirty.update(filters[pending].name for pending in [idx, *queue] if pending >= 0)
+            raise
+        # buffer of the run: outputs of every filter, in list order
+        for idx, routed in enumerate(plan.routed):
+            result.update(fresh[idx] if idx in fresh else routed or {})
+        return performances
+
+    def _run_concurrent(
+        self,
+        filters: List[FilterCore],
+        result: dict,
+        trackers: List[ContextTracker],
+        changed_keys: dict,
+        run_writes: List[tuple],
+        serialize: bool = False,
+    ) -> List[str]:
+        """Dispatch filters to the worker pool as soon as their producers completed.
+
+        Filters are handed over through _submit and their outcome read back through
+        _collect (threads or worker processes). serialize=True chains every filter to
+        the previous one (list order), e.g. while context accesses are still unknown.
+        Bookkeeping (cache decisions and updates, context change propagation) happens on
+        the calling thread, in completion order; cache decisions only depend on upstream
+        filters, so they match the sequential executor. Each consumer reads the outputs of
+        its own producer, so a variable re-assigned further down the pipeline cannot leak
+        into an earlier consumer, and the buffer is assembled in list order at the end.
+        """
+        graph_mode = self.cache in GRAPH_CACHE_MODES
+        plan: _ExecutionPlan = self._plan  # type: ignore[assignment]  # compiled by run()
+        data_dependencies = plan.data_dependencies
+        # scheduling edges: data routing + ordering of conflicting context accesses
+        dependencies = [set(deps) for deps in data_dependencies]
+        if serialize:
+            for idx in range(1, len(filters)):
+                dependencies[idx].add(idx - 1)
+        elif trackers:
+            known_accessors = set().union(*(trk.accessors() for trk in trackers))
+            accessors = [idx for idx, prc in enumerate(filters) if prc.name in known_accessors]
+            for pos, later in enumerate(accessors):
+                for earlier in accessors[:pos]:
+                    if any(trk.conflicts(filters[earlier].name, filters[later].name) for trk in trackers):
+                        dependencies[later].add(earlier)
+        successors: List[List[int]] = [[] for _ in filters]
+        for idx, deps in enumerate(dependencies):
+            for dep in deps:
+                successors[dep].append(idx)
+
+        # parameters are checked once per filter in list order, like the sequential loop
+        params_changed = [(prc.cache_mem is None) or prc.cache_mem.has_changed(prc.values) for prc in filters]
+        prefix_unchanged = []  # sequential prefix cache: every filter up to this one unchanged
+        unchanged = True
+        for changed in params_changed:
+            unchanged = unchanged and not changed
+            prefix_unchanged.append(unchanged)
+
+        keys = self._cache_keys(plan, trackers) if self.cache else None
+        routed: List[Optional[Dict[Any, Any]]] = [None] * len(filters)
+        dirty_flags = [False] * len(filters)
+        timings = [0.0] * len(filters)
+        remaining = [len(deps) for deps in dependencies]
+        ready = [idx for idx, count in enumerate(remaining) if count == 0]
+        heapq.heapify(ready)
+        running: Dict[Any, int] = {}  # future -> filter index
+        failures: Dict[int, tuple] = {}  # filter index -> (error, context changes)
+        live = self._live
+        # consumers still to complete, per producer and per pipeline input (release_buffers)
+        pending_consumers = list(plan.consumer_counts)
+        pending_inputs = {name: plan.input_consumers.get(name, 0) for name in result}
+        if live is not None:
+            self._release(result, [name for name, count in pending_inputs.items() if count == 0], live)
+
+        def resolve_inputs(idx: int) -> list:
+            prc = filters[idx]
+            if not prc.inputs:
+                return []
+            return [
+                None if idi is None else (result[idi] if producer is None else routed[producer][idi])  # type: ignore[index]
+                for idi, producer in plan.bindings[idx]
+            ]
+
+        def complete(idx: int, out: Any, skipped: bool = False) -> None:
+            routed[idx] = {} if skipped else _route_outputs(filters[idx], out)
+            if graph_mode and not skipped:
+                plan.remember(idx, out)
+            if live is not None:
+                for value in routed[idx].values():  # type: ignore[union-attr]
+                    live.add(value)
+                # outputs of a producer die with its last consumer
+                for dep in data_dependencies[idx]:
+                    pending_consumers[dep] -= 1
+                    if pending_consumers[dep] == 0:
+                        self._release(routed[dep], list(routed[dep]), live)  # type: ignore[arg-type]
+                if pending_consumers[idx] == 0:
+                    self._release(routed[idx], list(routed[idx]), live)  # type: ignore[arg-type]
+                for name in {name for name, producer in plan.bindings[idx] if producer is None}:
+                    if name in pending_inputs:
+                        pending_inputs[name] -= 1
+                        if pending_inputs[name] == 0:
+                            self._release(result, [name], live)
+            for successor in successors[idx]:
+                remaining[successor] -= 1
+                if remaining[successor] == 0:
+                    heapq.heappush(ready, successor)
+
+        needed = self._needed
+        layout = self._layout_of(filters[0]) if filters else None
+        while ready or running:
+            while ready and not failures:
+                idx = heapq.heappop(ready)
+                prc = filters[idx]
+                tic = time.perf_counter()
+                if needed is not None and idx not in needed:
+                    deps_dirty = any(dirty_flags[dep] for dep in data_dependencies[idx])
+                    dirty_flags[idx] = self._skip(plan, idx, deps_dirty, trackers, changed_keys)
+                    complete(idx, None, skipped=True)
+                    continue
+                if graph_mode:
+                    deps_dirty = any(dirty_flags[dep] for dep in data_dependencies[idx])
+                    context_dirty = any(t.reads_changed_keys(prc.name, changed_keys[id(t)]) for t in trackers)
+                    dirty_flags[idx] = params_changed[idx] or deps_dirty or context_dirty
+                    skip_calculation = not dirty_flags[idx]
+                else:
+                    skip_calculation = prefix_unchanged[idx]
+                if skip_calculation and self.cache:
+                    logging.debug(f"-->  Load cached outputs from filter {idx}: {prc.name}")
+                    if prc.cache_mem is None:
+                        raise RuntimeError(f"Cache memory is None for filter {prc.name}")
+                    keys.tokens[idx] = _current_key(prc.cache_mem)  # type: ignore[union-attr]
+                    prc.cache_mem.record_hit()
+                    complete(idx, prc.cache_mem.result)
+                    timings[idx] = time.perf_counter() - tic
+                    continue
+                if keys is not None and prc.cache_mem is not None:
+                    previous_key = prc.cache_mem.key
+                    keys.tokens[idx] = keys.key(idx)
+                    reused = self._lookup(prc, keys.tokens[idx], trackers)
+                    if reused is not None:
+                        logging.debug(f"-->  Reuse stored outputs from filter {idx}: {prc.name}")
+                        self._record_filter_changes(idx, reused, changed_keys, run_writes)
+                        if graph_mode:
+                            # back to the result of the previous run: nothing changes downstream
+                            dirty_flags[idx] = keys.tokens[idx] != previous_key
+                        complete(idx, prc.cache_mem.result)
+                        timings[idx] = time.perf_counter() - tic
+                        continue
+                logging.debug(f"!!! Dispatching {prc.name}")
+                running[self._submit(idx, prc, partial(resolve_inputs, idx), trackers)] = idx
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in sorted(done, key=lambda fut: running[fut]):
+                idx = running.pop(future)
+                prc = filters[idx]
+                out, filter_changes, error, timings[idx] = self._collect(prc, future, trackers)
+                if self._layout_of(prc) is not layout:
+                    # attributed to the filter completing first (worker threads run concurrently)
+                    plan.always_needed.add(idx)
+                    layout = self._layout_of(prc)
+                if error is not None:
+                    failures[idx] = (error, filter_changes)
+                    continue
+                self._record_filter_changes(idx, filter_changes, changed_keys, run_writes)
+                if keys is not None and prc.cache_mem is not None:  # keys: cache enabled
+                    logging.debug(f"<-- Storing result from {prc.name}")
+                    keys.tokens[idx] = keys.key_after_run(idx, keys.tokens[idx], filter_changes)
+                    persist = keys.complete[idx]
+                    self._store(
+                        prc, out, keys.tokens[idx], timings[idx], persist=persist, filter_changes=filter_changes
+                    )
+                complete(idx, out)
+
+        if failures:
+            # the earliest failing filter (in list order) is reported, like a sequential run
+            idx = min(failures)
+            error, filter_changes = failures[idx]
+            for other_idx, (_, other_changes) in failures.items():
+                if other_idx != idx:
+                    self._record_filter_changes(other_idx, other_changes, changed_keys, run_writes)
+            raise self._filter_error(filters[idx], error, trackers, changed_keys, filter_changes) from None
+
+        for idx, prc in enumerate(filters):
+            result.update(routed[idx] or {})
+        return [f"{prc.name}: {timings[idx]:0.4f} seconds" for idx, prc in enumerate(filters)]
+
+    @staticmethod
+    def _skip(
+        plan: _ExecutionPlan,
+        idx: int,
+        deps_dirty: bool,
+        trackers: List[ContextTracker],
+        changed_keys: dict,
+    ) -> bool:
+        """Leave a filter out of a demand-driven run; return whether its result went stale.
+
+        Its parameters are checked when it is needed again. A producer recomputed or a
+        context key it reads updated meanwhile invalidate its cache right away: the
+        change would be forgotten by then.
+        """
+        prc = plan.filters[idx]
+        logging.debug(f"--- Skipping {prc.name} (not feeding the requested outputs)")
+        stale = deps_dirty or any(t.reads_changed_keys(prc.name, changed_keys[id(t)]) for t in trackers)
+        if stale:
+            plan.forget(idx)
+            if prc.cache_mem is not None:
+                prc.cache_mem.invalidate()
+        return stale
+
+    @staticmethod
+    def _layout_of(prc: FilterCore) -> Any:
+        """Output arrangement of the pipeline owning a filter (layout.grid replaces it)."""
+        pipeline = prc.framework_state.pipeline
+        return pipeline.outputs if pipeline is not None else None
+
+    def _release(self, buffer: Dict[Any, Any], names: List[Any], live: _LiveBuffers) -> None:
+        """Drop dead variables from a run buffer, except the pipeline outputs."""
+        for name in names:
+            if name in buffer and name not in self._keep:  # type: ignore[operator]
+                live.remove(buffer.pop(name))
+
+    def _cache_keys(self, plan: _ExecutionPlan, trackers: List[ContextTracker]) -> _CacheKeys:
+        prefix = self.cache not in GRAPH_CACHE_MODES
+        return _CacheKeys(plan, trackers, prefix=prefix, input_tokens=self._input_tokens)
+
+    @staticmethod
+    def _shared_dicts(prc: FilterCore) -> Dict[str, dict]:
+        """The dicts filters exchange data through, by role (the trackers in graph cache modes).
+
+        Context writes stored with cached results refer to them by role.
+        """
+        shared = {"context": _user_context.get(), "global_params": prc.global_params, "events": None}
+        if prc.framework_state is not None:
+            shared["events"] = prc.framework_state.events
+        return {role: target for role, target in shared.items() if target is not None}
+
+    def _keeps_writes(self, prc: FilterCore) -> bool:
+        """Whether the cache of a filter may serve another result than its last execution.
+
+        With cache=True, the context writes of its executions are only collected then
+        (untracked dicts are copied before each run to find them).
+        """
+        cache = prc.cache_mem
+        return cache is not None and (cache.max_entries > 1 or self.disk_cache is not None)
+
+    def _context_writes(self, prc: FilterCore, filter_changes: list) -> Optional[dict]:
+        """What a filter execution wrote to the tracked dicts: {role: (values written, keys deleted)}.
+
+        Keys assigned (equal values included), deleted or modified in place. Stored with
+        the cached result and replayed when it is reused (None: nothing written).
+        """
+        roles = {id(target): role for role, target in self._shared_dicts(prc).items()}
+        writes = {}
+        for trk, keys_changed in filter_changes:
+            names = trk.last_writes(prc.name) | keys_changed
+            if names and id(trk) in roles:
+                written = {name: dict.__getitem__(trk, name) for name in names if dict.__contains__(trk, name)}
+                writes[roles[id(trk)]] = (written, names - written.keys())
+        return writes or None
+
+    def _lookup(self, prc: FilterCore, key: Optional[bytes], trackers: List[ContextTracker]) -> Optional[list]:
+        """Look a result up in the filter cache (falling back to the disk tier).
+
+        The context writes of the execution which produced the result are replayed,
+        attributed to the filter, as if it ran: later filters read what it wrote.
+
+        :return: None when no result is stored under key, else the context keys the
+            replayed writes changed, per tracker (like a filter execution).
+        """
+        cache = prc.cache_mem
+        cache.disk = self.disk_cache  # type: ignore[union-attr]
+        if not cache.lookup(key):  # type: ignore[union-attr]
+            return None
+        writes = cache.context_writes  # type: ignore[union-attr]
+        if not writes:
+            return []
+        roles = self._shared_dicts(prc)
+        for trk in trackers:
+            trk.begin_filter(prc.name)
+        try:
+            for role, (written, deleted) in writes.items():
+                target = roles.get(role)
+                if target is None:
+                    continue
+                for name, value in written.items():
+                    # the stored values stay private (safe_buffer_deepcopy)
+                    target[name] = deepcopy(value) if cache.safe_buffer_deepcopy else value  # type: ignore[union-attr]
+                for name in deleted:
+                    if dict.__contains__(target, name):
+                        del target[name]
+        finally:
+            filter_changes = [(trk, trk.finish_filter()) for trk in trackers]
+        return filter_changes
+
+    def _store(
+        self,
+        prc: FilterCore,
+        out: Any,
+        key: Optional[bytes],
+        elapsed: float,
+        persist: bool = True,
+        filter_changes: Optional[list] = None,
+    ) -> None:
+        """Cache a fresh result, with the context writes of its execution, keeping the cache memory budget.
+
+        persist=False keeps it off the disk tier (key computed before the context
+        reads of the filter were known).
+        """
+        prc.cache_mem.disk = self.disk_cache  # type: ignore[union-attr]
+        if filter_changes:
+            writes = self._context_writes(prc, filter_changes)
+        else:
+            writes = self._untracked_writes.get(prc.name)
+        if self.freeze_outputs:
+            # cached by reference: read-only from now on, nobody can alter the cached copy
+            prc.cache_mem.update(  # type: ignore[union-attr]
+                freeze(out), key=key, cost=elapsed, persist=persist, copy=False, context_writes=writes
+            )
+        else:
+            prc.cache_mem.update(out, key=key, cost=elapsed, persist=persist, context_writes=writes)  # type: ignore[union-attr]
+        if self.cache_budget is not None:
+            self.cache_budget.register(prc.cache_mem)  # type: ignore[arg-type]
+            # mid-run: only results kept for later lookups can go
+            self.cache_budget.enforce(include_current=False)
+
+    def _get_thread_pool(self) -> ThreadPoolExecutor:
+        if self._thread_pool is None:
+            self._thread_pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="interactive_pipe")
+        return self._thread_pool
+
+    def _submit(
+        self,
+        idx: int,
+        prc: FilterCore,
+        resolve_inputs: Callable[[], list],
+        trackers: List[ContextTracker],
+    ) -> Future:
+        """Start a filter on the worker pool; the future resolves to what _collect consumes."""
+        # worker threads do not inherit context variables (user context): run
+        # each filter inside a copy of the dispatching thread's context
+        task = partial(self._execute_filter, prc, resolve_inputs, trackers)
+        return self._get_thread_pool().submit(contextvars.copy_context().run, task)
+
+    def _collect(self, prc: FilterCore, future: Future, trackers: List[ContextTracker]) -> _FilterRun:
+        """Outcome of a completed _submit future (called on the dispatching thread)."""
+        return future.result()
+
+    def _execute_filter(
+        self,
+        prc: FilterCore,
+        resolve_inputs: Callable[[], list],
+        trackers: List[ContextTracker],
+    ) -> _FilterRun:
+        """Run a single filter, attributing its context accesses to it.
+
+        Never raises for errors coming from the filter: they are returned so that the
+        caller (possibly on another thread) decides how to abort the run.
+        """
+        tic = time.perf_counter()
+        for trk in trackers:
+            # attribute context reads/writes to this filter while it runs
+            trk.begin_filter(prc.name)
+        untracked = {}
+        if not trackers and self.cache and self._keeps_writes(prc):
+            # cache=True: writes found by comparing with copies taken before the run
+            untracked = {role: target for role, target in self._shared_dicts(prc).items() if role != "events"}
+        before = {role: dict(target) for role, target in untracked.items()}
+        out, error = None, None
+        try:
+            out = self._apply_filter(prc, resolve_inputs())
+        except Exception as e:
+            # Broad on purpose: prc.run executes arbitrary user filter
+            # code; the caller wraps whatever it raises in FilterError.
+            error = (e, sys.exc_info()[2])
+        finally:
+            filter_changes = [(trk, trk.finish_filter()) for trk in trackers]
+            if untracked:
+                self._untracked_writes[prc.name] = _writes_since(before, untracked)
+        return out, filter_changes, error, time.perf_counter() - tic
+
+    def _apply_filter(self, prc: FilterCore, routing_in: list, **run_kwargs: Any) -> Any:
+        """Protect the input buffers according to readonly_inputs, then run the filter.
+
+        run_kwargs are forwarded to the filter run (values, framework_state).
+        """
+        tensor_versions = []
+        if (
+            getattr(prc, "inplace", False)
+            and routing_in
+            and (self.readonly_inputs or self.freeze_inputs or self.freeze_outputs)
+        ):
+            # declared in-place filter: private writable copies keep the shared
+            # buffers and upstream caches safe (frozen buffers cannot be written)
+            routing_in = [deepcopy(buf) for buf in routing_in]
+        elif self.readonly_inputs and routing_in:
+            # read-only views: in-place mutation raises at the user's line
+            routing_in = [_readonly_view(buf) for buf in routing_in]
+            # torch tensors cannot be made read-only: detect mutation instead
+            tensor_versions = _capture_tensor_versions(routing_in)
+        debug = logging.root.isEnabledFor(logging.DEBUG)
+        if debug:
+            logging.debug(f"in types-> {[type(inp) for inp in routing_in]}")
+        out = prc.run(*routing_in, **run_kwargs)
+        for buf, version in tensor_versions:
+            if getattr(buf, "_version", version) != version:
+                raise RuntimeError(
+                    "in-place mutation of a torch tensor input detected. "
+                    "Declare the filter with inplace=True (it will receive private "
+                    "writable copies) or copy first (tensor = tensor.clone()). "
+                    "Set readonly_inputs=False on the pipeline to allow this (unsafe "
+                    "with caching or when several filters share the same buffer)."
+                )
+        if debug and out is not None:
+            try:
+                logging.debug(f"out types-> {[type(ou) for ou in out]}")
+            except TypeError:
+                # out is not iterable (e.g., single value)
+                logging.debug(f"out type-> {type(out)}")
+        return out
+
+    @staticmethod
+    def _record_filter_changes(idx: int, filter_changes: list, changed_keys: dict, run_writes: List[tuple]) -> None:
+        for trk, keys_changed in filter_changes:
+            if keys_changed:
+                # context keys updated by this filter dirty their readers downstream
+                changed_keys[id(trk)] |= keys_changed
+                run_writes.append((idx, trk, keys_changed))
+
+    @staticmethod
+    def _filter_error(
+        prc: FilterCore,
+        error: Tuple[Exception, Any],
+        trackers: List[ContextTracker],
+        changed_keys: dict,
+        filter_changes: list,
+    ) -> "FilterError":
+        """Build the FilterError aborting the run.
+
+        The run dies here: persist the context keys already changed this run (by the
+        failing filter or completed ones) so the next run still invalidates their readers.
+        """
+        failed_changes = {id(trk): keys for trk, keys in filter_changes}
+        for trk in trackers:
+            trk.report_aborted_run(changed_keys[id(trk)] | failed_changes.get(id(trk), set()))
+        original_error, tb = error
+        # Create a clean, user-friendly error
+        filter_error = FilterError(prc.name, original_error, tb)
+        filter_error.print_compact()
+        return filter_error
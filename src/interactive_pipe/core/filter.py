@@ -1,6 +1,8 @@
 import logging
 from copy import deepcopy
-from typing import Any, Callable, List, Optional, Tuple, Union
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union
+
+import numpy as np
 
 from interactive_pipe.core.cache import CachedResults
 from interactive_pipe.core.context import REMOVED_CONTEXT_KWARGS, _set_framework_state
@@ -12,6 +14,10 @@ _SENTINEL = object()
 
 
 class PureFilter:
+    # names of the filters to check again at the next run, shared with the execution
+    # plan of the engine (dirty-set propagation): parameter assignments report here
+    dirty_sink: Optional[Set[str]] = None
+
     def __init__(
         self,
         apply_fn: Optional[Callable] = None,
@@ -73,20 +79,30 @@ class PureFilter:
         if not isinstance(new_values, dict):
             raise TypeError(f"{new_values} is not a dictionary")
         self._values = {**self._values, **new_values}
+        if self.dirty_sink is not None:
+            self.dirty_sink.add(self.name)
+
+    def run(self, *imgs, values: Optional[dict] = None, framework_state: Optional[FrameworkState] = None) -> Any:
+        """Apply the filter with its parameters.
 
-    def run(self, *imgs) -> Any:
-        # First we check if the keyword args of the apply function match with self.values
-        if not isinstance(self.values, dict):
-            raise TypeError(f"self.values must be a dict, got {type(self.values)}")
+        values and framework_state replace self.values and self.framework_state for this
+        call only (PipelineCore.evaluate leaves the filter untouched this way).
+        """
+        if values is None:
+            values = self.values
+        # First we check if the keyword args of the apply function match with the values
+        if not isinstance(values, dict):
+            raise TypeError(f"self.values must be a dict, got {type(values)}")
         self.check_apply_signature()
-        for key, val in self.values.items():
-            if key not in self._kwargs_names.keys():
-                raise ValueError(f"{self.name}: {key} not in {self._kwargs_names.keys()}")
+        if not values.keys() <= self._kwargs_names.keys():
+            for key in values:
+                if key not in self._kwargs_names.keys():
+                    raise ValueError(f"{self.name}: {key} not in {self._kwargs_names.keys()}")
 
         # Set framework state for context-based API (layout, audio, etc.)
-        _set_framework_state(self.framework_state)
+        _set_framework_state(self.framework_state if framework_state is None else framework_state)
         try:
-            return self.apply(*imgs, **self.values)
+            return self.apply(*imgs, **values)
         finally:
             # Clear framework state after execution
             _set_framework_state(None)
@@ -104,10 +120,23 @@ class FilterCore(PureFilter):
         outputs: Optional[List[Union[int, str]]] = _SENTINEL,  # type: ignore
         cache=True,
         inplace: bool = False,
+        cache_max_entries: Optional[int] = None,
+        vectorized: bool = False,
+        batched: bool = False,
     ):
         """inplace: declare that this filter mutates its inputs. The engine then hands it
         private writable deep copies instead of read-only views, keeping shared buffers
-        and upstream caches safe. Prefer copying explicitly (img = img.copy()) in new code."""
+        and upstream caches safe. Prefer copying explicitly (img = img.copy()) in new code.
+
+        cache_max_entries: number of results kept in the cache (least recently used are
+        evicted), so that going back to a recent setting is a lookup. None leaves the
+        choice to the pipeline (a single result by default).
+
+        vectorized: declare that the filter broadcasts over its parameters, so that
+        several parameter values are evaluated in a single call (see run_vectorized).
+
+        batched: declare that the filter processes a stack of inputs along a leading
+        batch axis and returns its outputs stacked the same way (see run_batch)."""
         if default_params is None:
             default_params = {}
         if inputs is _SENTINEL:
@@ -125,15 +154,26 @@ class FilterCore(PureFilter):
         self.outputs = outputs
         self.cache = cache
         self.inplace = inplace
+        if cache_max_entries is not None and cache_max_entries < 1:
+            raise ValueError(f"cache_max_entries must be a positive integer, got {cache_max_entries}")
+        self.cache_max_entries = cache_max_entries
+        self.vectorized = vectorized
+        self.batched = batched
+        self._prefetched: Optional[Tuple[Dict[tuple, dict], Dict[tuple, Any]]] = None  # see prefetch
         self.reset_cache()
 
     def reset_cache(self):
         if self.cache:
-            self.cache_mem = CachedResults(self.name)
+            self.cache_mem = CachedResults(self.name, max_entries=self.cache_max_entries or 1)
+            self.cache_mem.dirty_sink = self.dirty_sink
         else:
             self.cache_mem = None
+        if self.dirty_sink is not None:
+            self.dirty_sink.add(self.name)
 
-    def run(self, *imgs) -> Optional[Tuple[Any, ...]]:
+    def run(
+        self, *imgs, values: Optional[dict] = None, framework_state: Optional[FrameworkState] = None
+    ) -> Optional[Tuple[Any, ...]]:
         if imgs:
             if self.inputs is not None and len(imgs) != len(self.inputs):
                 raise ValueError(f"number of inputs ({len(imgs)}) shall match what's expected ({len(self.inputs)})")
@@ -143,7 +183,9 @@ class FilterCore(PureFilter):
             filter_in = ()
         else:
             filter_in = imgs
-        out = super().run(*filter_in)
+        if values is None and self._prefetched is not None:
+            return self._run_prefetched(filter_in, framework_state)
+        out = super().run(*filter_in, values=values, framework_state=framework_state)
         if out is None:
             return None
         if isinstance(out, (tuple, list)):
@@ -160,6 +202,66 @@ class FilterCore(PureFilter):
                 raise ValueError(f"returning a single element but expected {len(self.outputs)} outputs!")
             return (out,)
 
+    def run_vectorized(
+        self, *imgs, batch: List[dict], framework_state: Optional[FrameworkState] = None
+    ) -> List[Optional[Tuple[Any, ...]]]:
+        """Outputs of the filter on the same inputs for each values of a batch.
+
+        A vectorized filter is called once: each parameter whose value differs across
+        the batch is passed as an array of shape (B, 1, ..., 1), with one trailing axis
+        per dimension of the inputs, so that it broadcasts against them (img * gain).
+        Every output must carry the batch along its first axis. Other filters are
+        called once per values.
+        """
+        batch = [{**self.values, **values} for values in batch]
+        if not self.vectorized or len(batch) < 2:
+            return [self.run(*imgs, values=values, framework_state=framework_state) for values in batch]
+        ndim = max([np.ndim(img) for img in imgs if isinstance(img, np.ndarray)], default=0)
+        stacked = {}
+        for name, value in batch[0].items():
+            column = [values[name] for values in batch]
+            if all(_same_value(value, other) for other in column[1:]):
+                stacked[name] = value
+            else:
+                stacked[name] = np.asarray(column).reshape((len(batch),) + (1,) * ndim)
+        out = self.run(*imgs, values=stacked, framework_state=framework_state)
+        if out is None:
+            return [None] * len(batch)
+        for output in out:
+            if len(np.shape(output)) == 0 or np.shape(output)[0] != len(batch):
+                raise ValueError(
+                    f"{self.name}: vectorized filter returned an output of shape {np.shape(output)}, "
+                    f"expected the batch of {len(batch)} values along its first axis"
+                )
+        return [tuple(output[index] for output in out) for index in range(len(batch))]
+
+    def prefetch(self, batch: Optional[List[dict]]) -> None:
+        """Evaluate the next runs of the filter at once (None: stop).
+
+        batch holds the values of the upcoming runs, on unchanged inputs (a sweep
+        moving parameters of this filter only). The first run whose values belong to
+        the batch computes all of them with run_vectorized, the next ones are served
+        from its outputs. Values which cannot be hashed are not prefetched.
+        """
+        self._prefetched = None
+        if batch is not None:
+            try:
+                pending = {_values_key({**self.values, **values}): values for values in batch}
+            except TypeError:
+                return
+            self._prefetched = (pending, {})
+
+    def _run_prefetched(self, imgs: tuple, framework_state: Optional[FrameworkState]) -> Any:
+        pending, outputs = self._prefetched  # type: ignore[misc]
+        key = _values_key(self.values)
+        if key not in pending:
+            self._prefetched = None
+            return self.run(*imgs, framework_state=framework_state)
+        if not outputs:
+            batch = list(pending.values())
+            outputs.update(zip(pending, self.run_vectorized(*imgs, batch=batch, framework_state=framework_state)))
+        return outputs[key]
+
     def __repr__(self) -> str:
         descr = f"{self.name}: "
         if self.inputs is None:
@@ -183,3 +285,19 @@ class FilterCore(PureFilter):
         merged_kwargs = {**kwargs, **control_dict}
         out = self.apply(*args, **merged_kwargs)
         return out
+
+
+def _values_key(values: dict) -> tuple:
+    return tuple(sorted((name, _hashable(value)) for name, value in values.items()))
+
+
+def _hashable(value: Any) -> Any:
+    if isinstance(value, np.ndarray):
+        return (value.dtype.str, value.shape, value.tobytes())
+    if isinstance(value, (list, tuple)):
+        return tuple(_hashable(item) for item in value)
+    return value
+
+
+def _same_value(value: Any, other: Any) -> bool:
+    return _hashable(value) == _hashable(other)
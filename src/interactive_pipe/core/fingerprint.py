@@ -0,0 +1,199 @@
+"""Content fingerprints: decide whether a value changed without keeping a copy of it.
+
+Fingerprints are compared run after run (context values, filter parameters, pipeline
+inputs) and digested into cache keys, so computing them must cost much less than the
+filters: large buffers are hashed in place.
+
+- primitives: the value itself (with its type, so True != 1)
+- numpy arrays and CPU torch tensors: shape + dtype + digest of the raw buffer, hashed
+  in place (memory maps are not loaded) by chunks, the chunks of large buffers on
+  several threads. Non-contiguous arrays are copied by slabs of bounded size instead of
+  as a whole, and get the fingerprint of their contiguous copy. GPU tensors are copied
+  to the CPU first.
+- objects defining ``__ip_fingerprint__()``: the fingerprint of what it returns, for
+  instance a version number or the few fields which matter.
+- anything else: digest of its pickle serialization, where the arrays, tensors and
+  ``__ip_fingerprint__`` objects it holds (the curves of a ``Curve``, the columns of a
+  table) are replaced by their own fingerprint instead of being serialized.
+- values which cannot be fingerprinted: a unique marker that never compares equal, so
+  the value is conservatively considered changed on every check.
+
+Buffers are digested with xxhash (xxh3, non-cryptographic) when it is installed,
+sha1 otherwise.
+"""
+
+import hashlib
+import logging
+import os
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterator, List, Optional
+
+import numpy as np
+
+try:
+    import xxhash
+
+    _new_hasher: Callable[[], Any] = xxhash.xxh3_128
+    BUFFER_HASH = "xxh3_128"
+except ImportError:
+    logging.info("xxhash is not available, hashing buffers with sha1 (pip install xxhash for faster fingerprints)")
+    _new_hasher = hashlib.sha1
+    BUFFER_HASH = "sha1"
+
+
+def _hash_bytes(buffer: Any) -> bytes:
+    hasher = _new_hasher()
+    hasher.update(buffer)
+    return hasher.digest()
+
+
+# name of the method user objects define to provide their own fingerprint
+FINGERPRINT_PROTOCOL = "__ip_fingerprint__"
+
+# buffers larger than a chunk are digested chunk by chunk (the digest does not depend
+# on the number of threads, so that persisted cache keys are portable)
+_CHUNK_BYTES = 16 * 2**20
+
+_pool: Optional[ThreadPoolExecutor] = None
+
+
+def _reset_pool() -> None:
+    # the threads of the pool do not survive a fork
+    global _pool
+    _pool = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_pool)
+
+
+def _hash_chunks(chunks: List[Any]) -> bytes:
+    global _pool
+    workers = min(len(chunks), os.cpu_count() or 1, 8)
+    if workers > 1:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="interactive_pipe-hash")
+        # hashing releases the GIL: chunks are digested in parallel
+        digests = list(_pool.map(_hash_bytes, chunks))
+    else:
+        digests = [_hash_bytes(chunk) for chunk in chunks]
+    return _hash_bytes(b"".join(digests))
+
+
+def _slabs(array: np.ndarray) -> Iterator[np.ndarray]:
+    """Contiguous copies of consecutive parts of an array (in C order), about a chunk each."""
+    if array.nbytes <= _CHUNK_BYTES:
+        yield np.ascontiguousarray(array)
+        return
+    step = max(_CHUNK_BYTES // max(array[0].nbytes, 1), 1)
+    for start in range(0, len(array), step):
+        if step == 1 and array.ndim > 1:
+            yield from _slabs(array[start])
+        else:
+            yield np.ascontiguousarray(array[start : start + step])
+
+
+def _streamed_digests(array: np.ndarray) -> List[bytes]:
+    """Digests of the chunks of the C order buffer of a non-contiguous array, without copying it."""
+    digests = []
+    hasher, filled = _new_hasher(), 0
+    for slab in _slabs(array):
+        data = slab.reshape(-1).view(np.uint8)
+        while len(data):
+            size = min(_CHUNK_BYTES - filled, len(data))
+            hasher.update(data[:size])
+            filled += size
+            data = data[size:]
+            if filled == _CHUNK_BYTES:
+                digests.append(hasher.digest())
+                hasher, filled = _new_hasher(), 0
+    if filled or not digests:
+        digests.append(hasher.digest())
+    return digests
+
+
+def _hash_array(array: np.ndarray) -> bytes:
+    """Digest of the buffer an array would have in C order (no full copy, whatever its layout)."""
+    if not array.flags.c_contiguous:
+        digests = _streamed_digests(array)
+        return digests[0] if len(digests) == 1 else _hash_bytes(b"".join(digests))
+    flat = array.reshape(-1).view(np.uint8)
+    if flat.nbytes <= _CHUNK_BYTES:
+        return _hash_bytes(flat)
+    return _hash_chunks([flat[start : start + _CHUNK_BYTES] for start in range(0, flat.nbytes, _CHUNK_BYTES)])
+
+
+def _is_tensor(value: Any) -> bool:
+    return type(value).__module__.startswith("torch") and hasattr(value, "detach") and hasattr(value, "dtype")
+
+
+def _tensor_array(tensor: Any) -> np.ndarray:
+    """Numpy view of the content of a torch tensor (copied to the CPU when on another device)."""
+    tensor = tensor.detach()
+    if tensor.device.type != "cpu":
+        tensor = tensor.cpu()
+    try:
+        return tensor.numpy()
+    except TypeError:  # dtypes numpy does not know (bfloat16...): raw bytes
+        import torch
+
+        return tensor.contiguous().reshape(-1).view(torch.uint8).numpy()
+
+
+def _native_fingerprint(value: Any) -> Any:
+    """Fingerprint of arrays, tensors and __ip_fingerprint__ objects (None: other values)."""
+    if isinstance(value, np.ndarray):
+        if value.dtype.hasobject:  # the buffer holds pointers: pickle the objects
+            return None
+        return ("ndarray", value.shape, value.dtype.str, _hash_array(value))
+    if _is_tensor(value):
+        return ("tensor", tuple(value.shape), str(value.dtype), _hash_array(_tensor_array(value)))
+    method = getattr(value, FINGERPRINT_PROTOCOL, None)
+    if method is not None and not isinstance(value, type):
+        fingerprint = _fingerprint(method())
+        if type(fingerprint) is object:
+            raise TypeError(f"{FINGERPRINT_PROTOCOL} of {type(value).__qualname__} returned an unfingerprintable value")
+        return ("custom", type(value).__module__, type(value).__qualname__, fingerprint)
+    return None
+
+
+def _fingerprinted(fingerprint: Any) -> Any:
+    """Stands for a value replaced by its fingerprint in a pickle stream (never called)."""
+    return fingerprint
+
+
+class _HashWriter:
+    """File-like object digesting what is written to it."""
+
+    def __init__(self):
+        self.hasher = hashlib.sha1()
+
+    def write(self, data: Any) -> int:
+        self.hasher.update(data)
+        return len(data)
+
+
+class _FingerprintPickler(pickle.Pickler):
+    """Pickler replacing arrays, tensors and __ip_fingerprint__ objects by their fingerprint."""
+
+    def reducer_override(self, obj: Any) -> Any:
+        fingerprint = _native_fingerprint(obj)
+        if fingerprint is None:
+            return NotImplemented
+        return _fingerprinted, (fingerprint,)
+
+
+def _fingerprint(value: Any) -> Any:
+    """Content fingerprint of a value, compared to decide whether it changed (see module doc)."""
+    if value is None or isinstance(value, (bool, int, float, str, bytes)):
+        return ("primitive", type(value).__name__, value)
+    try:
+        fingerprint = _native_fingerprint(value)
+        if fingerprint is not None:
+            return fingerprint
+        writer = _HashWriter()
+        _FingerprintPickler(writer, protocol=pickle.HIGHEST_PROTOCOL).dump(value)
+    except Exception:
+        return object()
+    return ("pickle", writer.hasher.digest())
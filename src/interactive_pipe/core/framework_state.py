@@ -34,7 +34,8 @@ class FrameworkState:
     Fields:
         output_styles: display styles per output name (layout.style writes,
             windows read titles from it)
-        events: key-bound context events managed by the GUI base class
+        events: key-bound context events managed by the GUI base class (a
+            ContextTracker in graph cache modes, tracking which filters read them)
         audio: audio playback callbacks registered by the GUI backend
         pipeline: back-reference to the owning pipeline, held via weakref so
             the state never keeps the pipeline (and the GUI) alive.
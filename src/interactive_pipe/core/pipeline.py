@@ -1,11 +1,14 @@
 import logging
+import os
 from typing import Any, Dict, List, Optional, Union
 
 from interactive_pipe.core.context import REMOVED_CONTEXT_ALIASES, _set_user_context
 from interactive_pipe.core.context_tracking import GRAPH_CACHE_MODES, ContextTracker
-from interactive_pipe.core.engine import PipelineEngine
+from interactive_pipe.core.disk_cache import DiskCache
+from interactive_pipe.core.engine import PipelineEngine, _build_producer_indexes, _flatten_outputs
 from interactive_pipe.core.filter import FilterCore
 from interactive_pipe.core.framework_state import FrameworkState
+from interactive_pipe.core.process_engine import ProcessPipelineEngine
 
 
 class PipelineCore:
@@ -21,6 +24,36 @@ class PipelineCore:
       are recomputed, including dependencies through the shared `context`)
     - "graph-strict": like "graph", plus context reads return numpy arrays as read-only
       views so accidental in-place mutation raises at the offending line
+
+    cache_max_entries: number of results each filter keeps (least recently used evicted),
+    for filters which do not set their own. Going back to a recent setting then reuses
+    the stored results instead of recomputing them.
+
+    cache_memory_limit: memory budget (bytes, or a string like "2GB") shared by all the
+    filter caches. Cheap, large and rarely reused results are evicted first.
+
+    freeze_inputs: hand the numpy inputs to the filters as read-only views instead of
+    deep-copying them on every run (replaces safe_input_buffer_deepcopy).
+
+    freeze_outputs: cache filter outputs by reference, made read-only, instead of deep
+    copies (outputs returned by run() are read-only then).
+
+    release_buffers: free each intermediate buffer as soon as its last consumer ran, run()
+    then only returns the outputs (run(entire_buffer=True) keeps every buffer). The
+    peak size of the buffer is reported as engine.peak_buffer_bytes.
+
+    demand_driven: only run the filters needed to compute the outputs (their upstream
+    filters, and the filters writing context keys they read): outputs hidden from the
+    grid cost nothing. Requires a graph cache mode.
+
+    cache_dir: directory (or DiskCache) persisting the cached results across sessions,
+    cache_disk_limit bounding its size. Requires a graph cache mode.
+
+    executor:
+    - "sequential" (default): filters run one after the other in list order
+    - "threads": independent filters run concurrently on up to max_workers threads
+    - "processes": same, on up to max_workers worker processes exchanging numpy
+      buffers through shared memory (see ProcessPipelineEngine)
     """
 
     def __init__(
@@ -34,13 +67,41 @@ class PipelineCore:
         outputs: Optional[list] = None,
         safe_input_buffer_deepcopy: bool = True,
         readonly_inputs: bool = True,
+        executor: str = "sequential",
+        max_workers: Optional[int] = None,
+        cache_max_entries: Optional[int] = None,
+        cache_memory_limit: Union[int, str, None] = None,
+        cache_dir: Union[str, os.PathLike, DiskCache, None] = None,
+        cache_disk_limit: Union[int, str, None] = "10GB",
+        freeze_outputs: bool = False,
+        freeze_inputs: bool = False,
+        release_buffers: bool = False,
+        demand_driven: bool = False,
         **kwargs,
     ):
         if not all(isinstance(f, FilterCore) for f in filters):
             raise ValueError(f"All elements in 'filters' must be instances of 'Filter'. {[type(f) for f in filters]}")
         self.filters = filters
-        self.engine = PipelineEngine(
-            cache, safe_input_buffer_deepcopy=safe_input_buffer_deepcopy, readonly_inputs=readonly_inputs
+        if cache_max_entries is not None:
+            if cache_max_entries < 1:
+                raise ValueError(f"cache_max_entries must be a positive integer, got {cache_max_entries}")
+            for filt in self.filters:
+                if filt.cache_max_entries is None:
+                    filt.cache_max_entries = cache_max_entries
+        engine_class = ProcessPipelineEngine if executor == "processes" else PipelineEngine
+        self.engine = engine_class(
+            cache,
+            safe_input_buffer_deepcopy=safe_input_buffer_deepcopy,
+            readonly_inputs=readonly_inputs,
+            executor=executor,
+            max_workers=max_workers,
+            cache_memory_limit=cache_memory_limit,
+            cache_dir=cache_dir,
+            cache_disk_limit=cache_disk_limit,
+            freeze_outputs=freeze_outputs,
+            freeze_inputs=freeze_inputs,
+            release_buffers=release_buffers,
+            demand_driven=demand_driven,
         )
 
         # Reject removed aliases of the 'context' parameter with a clear message
@@ -74,8 +135,12 @@ class PipelineCore:
             # context-based data dependencies invalidate the right cached results
             self._user_context = ContextTracker(self._user_context, strict=self.engine.cache == "graph-strict")
             self.engine.context_tracker = self._user_context
+            # key-bound events: raising or resetting one only invalidates its readers
+            self.framework_state.events = ContextTracker(self.framework_state.events)
+            self.engine.events_tracker = self.framework_state.events
 
         self.reset_cache()
+        self._input_tokens: Optional[Dict[Any, Any]] = None  # content tokens of the assigned inputs
         if inputs is None:
             logging.warning("Setting a pipeline without input -  use inputs=[] to get rid of this warning")
             self.inputs_routing = []
@@ -99,6 +164,16 @@ class PipelineCore:
         for filt in self.filters:
             filt.reset_cache()
 
+    def events_changed(self) -> None:
+        """Invalidate what depends on key-bound events, after raising or resetting some.
+
+        In graph cache modes, event reads are tracked like context reads: the filters
+        reading a changed event (and what they feed) are recomputed by the next run.
+        Other cache modes cannot tell which filters read events: every cache is reset.
+        """
+        if not isinstance(self.framework_state.events, ContextTracker):
+            self.reset_cache()
+
     @property
     def _graph_cache_mode(self) -> bool:
         return self.engine.cache in GRAPH_CACHE_MODES
@@ -129,16 +204,75 @@ class PipelineCore:
             # link each filter to global params
             filt.global_params = new_global_params
 
-    def run(self) -> dict:
-        """Useful for standalone python access without gui or disk write"""
+    def run(self, entire_buffer: bool = False) -> dict:
+        """Useful for standalone python access without gui or disk write
+
+        :param entire_buffer: keep every intermediate buffer (release_buffers only).
+        """
         # Set user context before running pipeline
         _set_user_context(self._user_context)
         try:
-            return self.engine.run(self.filters, imglst=self.inputs)
+            outputs = None if entire_buffer else self.outputs
+            result = self.engine.run(self.filters, imglst=self.inputs, outputs=outputs)
+            if self.engine.demand_driven and outputs is not None and self.outputs is not outputs:
+                # layout.grid() requested other outputs during the run: compute the missing ones
+                if not _flatten_outputs(self.outputs) <= result.keys():
+                    result = self.engine.run(self.filters, imglst=self.inputs, outputs=self.outputs)
+            return result
         finally:
             # Clear user context after execution
             _set_user_context(None)
 
+    def evaluate(
+        self,
+        inputs: Any = None,
+        parameters: Optional[Dict[str, Dict[str, Any]]] = None,
+        context: Optional[Dict[str, Any]] = None,
+        outputs: Optional[list] = None,
+    ) -> dict:
+        """Run the pipeline on the given state without modifying the pipeline.
+
+        Unlike assigning inputs and parameters before run(), nothing is written to the
+        pipeline: filter parameters, caches, the user context and the framework state are
+        left untouched. Several threads may evaluate the same pipeline concurrently
+        (parameter sweeps, web services). Results cached by previous runs are reused
+        (graph cache modes) but fresh results are not cached. Filters accessing
+        self.global_params directly still share it.
+
+        ```
+        res = pipeline.evaluate([img], parameters={"gain": {"amount": 2.0}}, context={"key": 1})
+        ```
+
+        :param inputs: same formats as the inputs property (None: the current inputs).
+        :param parameters: {filter name: {parameter: value}} overriding the current values.
+        :param context: entries added to a private copy of the user context.
+        :param outputs: variables to compute (default: the pipeline outputs). Once the
+            pipeline ran, filters which do not feed them are skipped.
+        :return: the buffer (variable name -> value).
+        """
+        imglst = self.inputs if inputs is None and self.inputs_routing else self._route_inputs(inputs)
+        if parameters is None:
+            parameters = {}
+        available_filters_names = {filt.name for filt in self.filters}
+        for filter_name in parameters.keys():
+            if filter_name not in available_filters_names:
+                raise ValueError(f"filter {filter_name} does not exist {sorted(available_filters_names)}")
+        if context is not None and not isinstance(context, dict):
+            raise TypeError(f"context must be a dict, got {type(context)}")
+        # private copies: filters write to them instead of the pipeline state
+        user_context = dict(dict.items(self._user_context))
+        user_context.update(context or {})
+        framework_state = self.framework_state.snapshot()
+        framework_state.pipeline = None  # layout.grid() does not change the pipeline outputs
+        return self.engine.evaluate(
+            self.filters,
+            imglst,
+            parameters,
+            user_context,
+            framework_state,
+            outputs=self.outputs if outputs is None else outputs,
+        )
+
     def update_user_context(self, context: Optional[Dict[str, Any]]) -> None:
         """Merge user-provided context into the pipeline's user context.
 
@@ -195,39 +329,75 @@ class PipelineCore:
         return self.__inputs
 
     @inputs.setter
-    def inputs(self, inputs: list):
+    def inputs(self, inputs: Union[list, dict, None]):
+        self.__inputs = self._route_inputs(inputs)
+        self.__initialized_inputs = True
+        self._invalidate_changed_inputs()
+
+    def _route_inputs(self, inputs: Any) -> Optional[dict]:
+        """Inputs as a dict (input name -> value) following inputs_routing, None for no input."""
         if inputs is not None:
             if isinstance(inputs, dict):
                 provided_keys = list(inputs.keys())
                 for idx, input_name in enumerate(self.inputs_routing):
                     if input_name not in provided_keys:
                         raise ValueError(f"{input_name} is not among {provided_keys}")
-                self.__inputs = inputs
+                routed = inputs
             elif isinstance(inputs, (list, tuple)):
                 # inputs is a list or a tuple
                 if len(inputs) != len(self.inputs_routing):
                     raise ValueError(
                         f"Wrong amount of inputs: provided {len(inputs)} vs expected {len(self.inputs_routing)}"
                     )
-                self.__inputs = {}
+                routed = {}
                 for idx, input_name in enumerate(self.inputs_routing):
-                    self.__inputs[input_name] = inputs[idx]
+                    routed[input_name] = inputs[idx]
             else:
                 # single element
                 if len(self.inputs_routing) != 1:
                     raise ValueError(f"Single input provided but expected {len(self.inputs_routing)} inputs")
-                self.__inputs = {self.inputs_routing[0]: inputs}
-            if not isinstance(self.__inputs, dict):
+                routed = {self.inputs_routing[0]: inputs}
+            if not isinstance(routed, dict):
                 raise RuntimeError("Internal error: inputs should be a dict")
-            if len(self.__inputs.keys()) == 0:
+            if len(routed.keys()) == 0:
                 # similar to having no input, but explicitly saying that we have initialized it.
-                self.__inputs = None
-        else:
-            if not (
-                self.inputs_routing is None
-                or (isinstance(self.inputs_routing, (tuple, list)) and len(self.inputs_routing) == 0)
-            ):
-                raise ValueError("Cannot set inputs to None when inputs_routing is defined")
-            self.__inputs = None
-        self.__initialized_inputs = True
-        self.reset_cache()
+                return None
+            return routed
+        if not (
+            self.inputs_routing is None
+            or (isinstance(self.inputs_routing, (tuple, list)) and len(self.inputs_routing) == 0)
+        ):
+            raise ValueError("Cannot set inputs to None when inputs_routing is defined")
+        return None
+
+    def _invalidate_changed_inputs(self) -> None:
+        """Invalidate the cached results depending on the inputs which actually changed.
+
+        Inputs are digested on assignment: assigning the same content again keeps every
+        cache, and only the filters fed (directly or transitively) by a changed input
+        slot are invalidated. Their stored results stay available since cache keys
+        include the input content. With the sequential prefix cache (cache=True), context
+        dependencies are not tracked: every filter after the first one fed by a changed
+        input is invalidated.
+        """
+        previous = self._input_tokens
+        self._input_tokens = self.engine.digest_inputs(self.__inputs, refresh=True) if self.engine.cache else None
+        if previous is None or self._input_tokens is None or set(previous) != set(self._input_tokens):
+            self.reset_cache()
+            return
+        changed = {slot for slot, token in self._input_tokens.items() if token is None or token != previous[slot]}
+        if not changed:
+            return
+        stale = set()
+        for idx, (filt, producers) in enumerate(zip(self.filters, _build_producer_indexes(self.filters))):
+            for input_name, producer in zip(filt.inputs or [], producers):
+                if (producer is None and input_name in changed) or (producer is not None and producer in stale):
+                    stale.add(idx)
+        if stale and not self._graph_cache_mode:
+            # later filters may read what the changed inputs became through the context
+            stale = set(range(min(stale), len(self.filters)))
+        for idx in sorted(stale):
+            logging.debug(f"Input changed: invalidating {self.filters[idx].name}")
+            cache = self.filters[idx].cache_mem
+            if cache is not None:
+                cache.invalidate()
@@ -0,0 +1,494 @@
+"""Process-pool execution of pipelines (``executor="processes"``).
+
+Filters run in worker processes, so pure-python filters holding the GIL still scale
+across CPU cores. Numpy buffers travel between processes through shared memory
+(:mod:`multiprocessing.shared_memory`): a worker writes each output array once into a
+new shared block and only the block name crosses the process boundary; consumers map
+the same block instead of receiving a pickled copy. Other values (scalars, curves,
+dicts...) are pickled as usual.
+
+Ownership of shared blocks:
+
+- the main process owns every block: it unlinks a block once the last array mapped on
+  it is garbage collected (arrays keep their :class:`_SharedBlock` alive as their base);
+- workers only close their own mapping when they are done with it.
+
+Shared state is shipped along with each task and merged back afterwards: the user
+context and ``global_params`` are snapshotted for the worker, and the keys the filter
+net-changed (plus the keys it read, for dependency tracking) are replayed in the main
+process under the filter's name, so graph cache modes behave as in-process. Styles set
+through ``layout.style`` and ``layout.grid`` are forwarded too; ``audio`` calls made
+from a worker are ignored.
+"""
+
+import logging
+import os
+import pickle
+import sys
+import time
+import traceback
+import weakref
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from copy import copy
+from dataclasses import dataclass
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union
+
+import numpy as np
+
+from interactive_pipe.core.context import _set_user_context, _user_context
+from interactive_pipe.core.context_tracking import ContextTracker
+from interactive_pipe.core.disk_cache import DiskCache
+from interactive_pipe.core.engine import PipelineEngine, _FilterRun
+from interactive_pipe.core.filter import FilterCore
+from interactive_pipe.core.framework_state import FrameworkState
+
+
+class _SharedBlock:
+    """Shared memory block exposed as a numpy array through ``__array_interface__``.
+
+    ``np.asarray(block)`` returns an ndarray whose base is the block, so the mapping
+    lives exactly as long as the arrays using it. The owning process also unlinks the
+    block when it is released.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, shape: tuple, dtype: np.dtype, owner: bool):
+        self.name = shm.name
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.nbytes = int(np.prod(self.shape, dtype=np.int64)) * self.dtype.itemsize
+        self._shm = shm
+        self._owner = owner
+        # the anchor holds the buffer export, its address backs every array of the block
+        assert shm.buf is not None, "shared memory block already closed"
+        self._anchor = np.frombuffer(shm.buf, dtype=np.uint8, count=self.nbytes)
+        self.address = self._anchor.ctypes.data
+        self.__array_interface__ = {
+            "shape": self.shape,
+            "typestr": self.dtype.str,
+            "descr": self.dtype.descr,
+            "data": (self.address, False),
+            "version": 3,
+        }
+        _blocks[self.name] = self
+
+    def __del__(self):
+        self._anchor = None
+        try:
+            self._shm.close()
+            if self._owner:
+                self._shm.unlink()
+        except (BufferError, OSError):
+            # still exported elsewhere / already unlinked: nothing left to release
+            pass
+
+
+# blocks mapped in the current process, by name: a block received several times is
+# mapped (and later unlinked) only once
+_blocks: "weakref.WeakValueDictionary[str, _SharedBlock]" = weakref.WeakValueDictionary()
+
+
+@dataclass(frozen=True)
+class _SharedArrayRef:
+    """Picklable reference to a numpy array stored in a shared memory block."""
+
+    name: str
+    shape: tuple
+    dtype: str
+
+
+def _is_shareable(value: Any) -> bool:
+    """Plain numpy arrays with a fixed-size dtype (object arrays hold pointers)."""
+    value_type = type(value)
+    return (
+        value_type.__module__ == "numpy"
+        and value_type.__name__ == "ndarray"
+        and not value.dtype.hasobject
+        and value.nbytes > 0
+    )
+
+
+def _owning_block(array: np.ndarray) -> Optional[_SharedBlock]:
+    """The shared block an array fully covers, if any (then it travels without copy)."""
+    block = array.base
+    if not isinstance(block, _SharedBlock):
+        return None
+    if (
+        array.__array_interface__["data"][0] != block.address
+        or array.shape != block.shape
+        or array.dtype != block.dtype
+        or not array.flags.c_contiguous
+    ):
+        return None
+    return block
+
+
+def _copy_to_shared(array: np.ndarray, owner: bool) -> _SharedBlock:
+    shm = shared_memory.SharedMemory(create=True, size=array.nbytes)
+    block = _SharedBlock(shm, array.shape, array.dtype, owner=owner)
+    np.asarray(block)[...] = array
+    return block
+
+
+def _to_shared(value: Any, blocks: List[_SharedBlock], owner: bool) -> Any:
+    """Replace numpy arrays by shared memory references (recursing into lists/tuples).
+
+    Arrays already covering a whole shared block (e.g. an input passed through) are
+    referenced as is; the blocks created for the others are appended to ``blocks``.
+    """
+    if _is_shareable(value):
+        block = _owning_block(value)
+        if block is None:
+            block = _copy_to_shared(value, owner=owner)
+            blocks.append(block)
+        return _SharedArrayRef(block.name, block.shape, block.dtype.str)
+    if isinstance(value, (list, tuple)):
+        return type(value)(_to_shared(item, blocks, owner) for item in value)
+    return value
+
+
+def _from_shared(value: Any, owner: bool) -> Any:
+    """Map shared memory references back to numpy arrays (recursing into lists/tuples)."""
+    if isinstance(value, _SharedArrayRef):
+        block = _blocks.get(value.name)
+        if block is None:
+            shm = shared_memory.SharedMemory(name=value.name)
+            block = _SharedBlock(shm, value.shape, np.dtype(value.dtype), owner=owner)
+        return np.asarray(block)
+    if isinstance(value, (list, tuple)):
+        return type(value)(_from_shared(item, owner) for item in value)
+    return value
+
+
+def _collect_ids(value: Any, ids: Set[int]) -> None:
+    ids.add(id(value))
+    if isinstance(value, (list, tuple)):
+        for item in value:
+            _collect_ids(item, ids)
+
+
+# ----------------------------------------------------------------------------
+# Worker side
+# ----------------------------------------------------------------------------
+
+
+class _GridRecorder:
+    """Stands for the pipeline in a worker so that layout.grid() calls are captured."""
+
+    outputs = None
+
+
+@dataclass
+class _WorkerOutcome:
+    """What a worker sends back for one filter execution."""
+
+    out: Any
+    context_report: Optional[tuple]  # None when the pipeline has no user context
+    global_params_report: tuple
+    events_report: tuple
+    output_styles: Dict[str, Dict[str, Any]]
+    grid: Any
+    error: Optional[Tuple[Exception, traceback.StackSummary]]
+    elapsed: float
+
+
+_worker_filters: List[FilterCore] = []
+_worker_engine: Optional[PipelineEngine] = None
+
+
+def _portable_filter(prc: FilterCore) -> FilterCore:
+    """Copy of a filter without the state bound to the main process (pipeline, GUI controls, cache)."""
+    portable = copy(prc)
+    portable.__dict__.pop("controls", None)
+    portable.__dict__.pop("dirty_sink", None)
+    portable.cache_mem = None
+    portable.framework_state = FrameworkState()
+    portable.global_params = {}
+    return portable
+
+
+def _init_worker(filters: List[FilterCore], readonly_inputs: bool) -> None:
+    global _worker_filters, _worker_engine
+    _worker_filters = filters
+    # only used for its input protection (read-only views, inplace copies)
+    _worker_engine = PipelineEngine(readonly_inputs=readonly_inputs)
+
+
+def _access_report(trk: ContextTracker, name: str) -> tuple:
+    """(keys read, whole context read, values of keys written or net-changed, deleted keys).
+
+    Keys assigned an equal value are reported too: they are part of the context writes
+    stored with the cached result of the filter.
+    """
+    changed = trk.finish_filter() | trk.last_writes(name)
+    reads, read_all = trk.reads_of(name)
+    written = {key: dict.__getitem__(trk, key) for key in changed if dict.__contains__(trk, key)}
+    deleted = {key for key in changed if not dict.__contains__(trk, key)}
+    return reads, read_all, written, deleted
+
+
+def _portable_error(error: Exception, tb) -> Tuple[Exception, traceback.StackSummary]:
+    """Exception and frames in a form that survives pickling back to the main process."""
+    frames = traceback.extract_tb(tb)
+    try:
+        pickle.loads(pickle.dumps(error))
+    except Exception:
+        error = RuntimeError(f"{type(error).__name__}: {error}")
+    return error, frames
+
+
+def _run_filter_in_worker(
+    idx: int, values: dict, inputs: list, shared_state: tuple, events: Dict[str, bool]
+) -> _WorkerOutcome:
+    tic = time.perf_counter()
+    prc = _worker_filters[idx]
+    prc.values = values
+    context_snapshot, global_params_snapshot, strict = shared_state
+    context = ContextTracker(context_snapshot, strict=strict) if context_snapshot is not None else None
+    prc.global_params = ContextTracker(global_params_snapshot)
+    recorder = _GridRecorder()
+    events_tracker = ContextTracker(events)
+    prc.framework_state = FrameworkState(events=events_tracker)
+    prc.framework_state.pipeline = recorder
+    trackers = [trk for trk in (context, prc.global_params, events_tracker) if trk is not None]
+    _set_user_context(context)
+    for trk in trackers:
+        trk.begin_filter(prc.name)
+    out, error = None, None
+    created: List[_SharedBlock] = []
+    try:
+        out = _worker_engine._apply_filter(prc, [_from_shared(buf, owner=False) for buf in inputs])  # type: ignore[union-attr]
+        out = _to_shared(out, created, owner=False)
+    except Exception as e:
+        # outputs already written to shared memory will never reach the main process
+        for block in created:
+            block._owner = True
+        out, error = None, _portable_error(e, sys.exc_info()[2])
+    finally:
+        _set_user_context(None)
+        context_report = _access_report(context, prc.name) if context is not None else None
+        global_params_report = _access_report(prc.global_params, prc.name)
+        events_report = _access_report(events_tracker, prc.name)
+    return _WorkerOutcome(
+        out=out,
+        context_report=context_report,
+        global_params_report=global_params_report,
+        events_report=events_report,
+        output_styles=prc.framework_state.output_styles,
+        grid=recorder.outputs,
+        error=error,
+        elapsed=time.perf_counter() - tic,
+    )
+
+
+def _replay_accesses(target: dict, report: tuple) -> None:
+    """Apply a worker's context accesses to the main process dict (attributed by its tracker)."""
+    reads, read_all, written, deleted = report
+    if read_all:
+        target.keys()
+    for key in reads:
+        target.get(key)
+    for key, value in written.items():
+        target[key] = value
+    for key in deleted:
+        target.pop(key, None)
+
+
+# ----------------------------------------------------------------------------
+# Main process side
+# ----------------------------------------------------------------------------
+
+
+class ProcessPipelineEngine(PipelineEngine):
+    """PipelineEngine running filters on a pool of worker processes.
+
+    Scheduling, cache modes and readonly_inputs semantics are the ones of
+    executor="threads": filters whose producers completed run concurrently, cache
+    decisions and context bookkeeping happen in the main process. Differences:
+
+    - filters are shipped to the workers once, when the pool starts (it restarts when
+      the list of filters changes); parameters travel with every task. Filters must be
+      picklable when the platform spawns workers instead of forking them.
+    - numpy arrays move through shared memory; other values are pickled. The pipeline
+      inputs are copied to shared memory on every run, which replaces the deepcopy of
+      safe_input_buffer_deepcopy and freeze_inputs (workers never touch the caller's
+      buffers).
+    - the user context and global_params are snapshotted for each task, so their
+      content is pickled once per filter execution: keep large arrays out of them.
+    - in graph cache modes, the first run executes the filters one at a time (in
+      list order) to learn their context accesses, like the threaded executor.
+    """
+
+    supported_executors = ("processes",)
+
+    def __init__(
+        self,
+        cache: Union[bool, str] = False,
+        safe_input_buffer_deepcopy=True,
+        readonly_inputs: bool = True,
+        executor: str = "processes",
+        max_workers: Optional[int] = None,
+        cache_memory_limit: Union[int, str, None] = None,
+        cache_dir: Union[str, os.PathLike, DiskCache, None] = None,
+        cache_disk_limit: Union[int, str, None] = "10GB",
+        freeze_outputs: bool = False,
+        freeze_inputs: bool = False,
+        release_buffers: bool = False,
+        demand_driven: bool = False,
+    ) -> None:
+        super().__init__(
+            cache,
+            safe_input_buffer_deepcopy=safe_input_buffer_deepcopy,
+            readonly_inputs=readonly_inputs,
+            executor=executor,
+            max_workers=max_workers,
+            cache_memory_limit=cache_memory_limit,
+            cache_dir=cache_dir,
+            cache_disk_limit=cache_disk_limit,
+            freeze_outputs=freeze_outputs,
+            freeze_inputs=freeze_inputs,
+            release_buffers=release_buffers,
+            demand_driven=demand_driven,
+        )
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._pool_signature: Optional[tuple] = None
+        self._input_ids: Set[int] = set()  # pipeline inputs: may change in place between runs
+        self._run_blocks: List[_SharedBlock] = []  # blocks handed to workers during the current run
+        # shared copies of main-process arrays (cached results) reused across runs
+        self._exports: Dict[int, Tuple[weakref.ref, _SharedBlock]] = {}
+
+    def close(self) -> None:
+        """Shut down the worker processes (a new pool is started on the next run)."""
+        super().close()
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=True, cancel_futures=True)
+            self._process_pool = None
+            self._pool_signature = None
+
+    def _load_inputs(self, imglst) -> dict:
+        result = {}
+        if isinstance(imglst, list):
+            result = dict(enumerate(imglst))
+        elif isinstance(imglst, dict):
+            result = dict(imglst)
+        self._input_ids = set()
+        for value in result.values():
+            _collect_ids(value, self._input_ids)
+        return result
+
+    def _dispatch(
+        self,
+        filters: List[FilterCore],
+        result: dict,
+        trackers: List[ContextTracker],
+        changed_keys: dict,
+        run_writes: List[tuple],
+    ) -> List[str]:
+        self._start_pool(filters)
+        try:
+            return self._run_concurrent(
+                filters,
+                result,
+                trackers,
+                changed_keys,
+                run_writes,
+                # one filter at a time while context accesses are unknown (always without trackers)
+                serialize=not self._accesses_known(filters, trackers),
+            )
+        finally:
+            self._run_blocks = []
+            self._exports = {key: entry for key, entry in self._exports.items() if entry[0]() is not None}
+
+    def _start_pool(self, filters: List[FilterCore]) -> None:
+        # workers hold the filters of the execution plan: a new plan (topology changed) restarts them
+        signature = self.compile(filters).signature
+        if self._process_pool is not None and signature is self._pool_signature:
+            return
+        self.close()
+        # workers must share the main process resource tracker: a tracker of their own
+        # would unlink the blocks they created when they exit
+        resource_tracker.ensure_running()
+        logging.debug(f"Starting {self.max_workers or 'default number of'} worker processes")
+        self._process_pool = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            initializer=_init_worker,
+            initargs=([_portable_filter(prc) for prc in filters], self.readonly_inputs),
+        )
+        self._pool_signature = signature
+
+    def _export(self, value: Any) -> Any:
+        """Shared memory reference for a buffer of the main process (recursing into lists/tuples)."""
+        if _is_shareable(value):
+            block = _owning_block(value)
+            if block is None:
+                cached = self._exports.get(id(value))
+                if cached is not None and cached[0]() is value:
+                    block = cached[1]
+                else:
+                    block = _copy_to_shared(value, owner=True)
+                    if id(value) not in self._input_ids:
+                        self._exports[id(value)] = (weakref.ref(value), block)
+            self._run_blocks.append(block)
+            return _SharedArrayRef(block.name, block.shape, block.dtype.str)
+        if isinstance(value, (list, tuple)):
+            return type(value)(self._export(item) for item in value)
+        return value
+
+    def _submit(
+        self,
+        idx: int,
+        prc: FilterCore,
+        resolve_inputs: Callable[[], list],
+        trackers: List[ContextTracker],
+    ) -> Future:
+        try:
+            inputs = [self._export(buf) for buf in resolve_inputs()]
+            context = _user_context.get()
+            shared_state = (
+                dict.copy(context) if context is not None else None,
+                dict.copy(prc.global_params),
+                self.cache == "graph-strict",
+            )
+            events = dict(prc.framework_state.events)
+            return self._process_pool.submit(  # type: ignore[union-attr]
+                _run_filter_in_worker, idx, dict(prc.values), inputs, shared_state, events
+            )
+        except Exception as e:
+            # e.g. missing input: reported through _collect like a filter error
+            future: Future = Future()
+            future.set_exception(e)
+            return future
+
+    def _collect(self, prc: FilterCore, future: Future, trackers: List[ContextTracker]) -> _FilterRun:
+        try:
+            outcome: _WorkerOutcome = future.result()
+        except Exception as e:
+            # the task never ran or its result could not travel (unpicklable values,
+            # worker killed): report it against the filter like an error it raised
+            if isinstance(e, BrokenProcessPool):
+                self.close()
+            return None, [(trk, set()) for trk in trackers], (e, e.__traceback__), 0.0
+        for trk in trackers:
+            # replay the worker's accesses under the filter's name
+            trk.begin_filter(prc.name)
+        try:
+            context = _user_context.get()
+            if context is not None and outcome.context_report is not None:
+                _replay_accesses(context, outcome.context_report)
+            _replay_accesses(prc.global_params, outcome.global_params_report)
+            if isinstance(prc.framework_state.events, ContextTracker):
+                _replay_accesses(prc.framework_state.events, outcome.events_report)
+            prc.framework_state.output_styles.update(outcome.output_styles)
+            pipeline = prc.framework_state.pipeline
+            if outcome.grid is not None and pipeline is not None:
+                pipeline.outputs = outcome.grid
+        finally:
+            filter_changes = [(trk, trk.finish_filter()) for trk in trackers]
+        if not trackers and self.cache and self._keeps_writes(prc):
+            # cache=True: context writes stored with the result (see _execute_filter)
+            reports = {"context": outcome.context_report, "global_params": outcome.global_params_report}
+            writes = {role: (rep[2], rep[3]) for role, rep in reports.items() if rep is not None and (rep[2] or rep[3])}
+            self._untracked_writes[prc.name] = writes or None
+        out = _from_shared(outcome.out, owner=True)
+        return out, filter_changes, outcome.error, outcome.elapsed
@@ -122,7 +122,7 @@ class InteractivePipeGUI:
                 logging.info(f"TRIGGERED A KEY EVENT {key_pressed} - {event_dict['doc']}")
                 is_any_event_triggered = True
         if is_any_event_triggered:
-            self.pipeline.reset_cache()
+            self.pipeline.events_changed()
             if refresh_func is not None:
                 refresh_func()
         self.reset_context_events()
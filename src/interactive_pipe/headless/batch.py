@@ -0,0 +1,153 @@
+"""Batch processing: run a pipeline on many sets of inputs, a chunk at a time.
+
+Filters declared batched (``@interactive(batched=True)``) process a whole chunk in a
+single call, their inputs stacked along a leading batch axis. The other filters run
+once per item. Stacked buffers are only built when a batched filter consumes them,
+and items are views of the stacked outputs, so a chain of batched filters never
+unstacks in between.
+
+Consecutive filters which are not batched run item by item (the first item through
+all of them, then the next), so that context values written by one of them and read
+by the next stay those of the same item. The context is otherwise shared by the whole
+batch: batched filters must not exchange per-item data through it.
+"""
+
+import sys
+import time
+from itertools import groupby, islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from interactive_pipe.core.context import _set_user_context
+from interactive_pipe.core.engine import FilterError, _flatten_outputs, _route_outputs
+from interactive_pipe.core.filter import FilterCore
+from interactive_pipe.core.pipeline import PipelineCore
+
+
+class _ChunkBuffer:
+    """Buffers of a chunk of items: one dict per item, plus stacked copies on demand."""
+
+    def __init__(self, items: List[Dict[Any, Any]]):
+        self.items = items
+        self.stacked: Dict[Any, np.ndarray] = {}
+
+    def stack(self, key: Any) -> Optional[np.ndarray]:
+        """Values of key stacked along a batch axis (None: not same-shaped numpy arrays)."""
+        if key not in self.stacked:
+            values = [item[key] for item in self.items]
+            if not all(isinstance(value, np.ndarray) for value in values):
+                return None
+            if len({(value.shape, value.dtype) for value in values}) != 1:
+                return None
+            self.stacked[key] = np.stack(values)
+        return self.stacked[key]
+
+    def store(self, index: int, routed: Dict[Any, Any]) -> None:
+        self.items[index].update(routed)
+        for key in routed:
+            self.stacked.pop(key, None)
+
+    def store_stacked(self, routed: Dict[Any, np.ndarray]) -> None:
+        for key, value in routed.items():
+            for index, item in enumerate(self.items):
+                item[key] = value[index]
+            self.stacked[key] = value
+
+
+def _apply(
+    pipeline: PipelineCore, prc: FilterCore, routing_in: list, framework_state, timings: Optional[Dict[str, float]]
+) -> Any:
+    tic = time.perf_counter()
+    try:
+        return pipeline.engine._apply_filter(prc, routing_in, framework_state=framework_state)
+    except Exception as e:
+        raise FilterError(prc.name, e, sys.exc_info()[2]) from None
+    finally:
+        if timings is not None:
+            timings[prc.name] = timings.get(prc.name, 0.0) + time.perf_counter() - tic
+
+
+def _run_batched(
+    pipeline: PipelineCore, prc: FilterCore, buffer: _ChunkBuffer, framework_state, timings: Optional[Dict[str, float]]
+) -> bool:
+    """Run a batched filter once on the stacked inputs (False: inputs cannot be stacked)."""
+    if not prc.inputs or None in prc.inputs:
+        return False
+    stacked = [buffer.stack(key) for key in prc.inputs]
+    if any(value is None for value in stacked):
+        return False
+    routed = _route_outputs(prc, _apply(pipeline, prc, stacked, framework_state, timings))
+    size = len(buffer.items)
+    for key, value in routed.items():
+        if not isinstance(value, np.ndarray) or value.ndim == 0 or value.shape[0] != size:
+            raise ValueError(
+                f"{prc.name}: batched filter returned {key} of shape {np.shape(value)}, "
+                f"expected the {size} items along its first axis"
+            )
+    buffer.store_stacked(routed)
+    return True
+
+
+def _run_chunk(
+    pipeline: PipelineCore, items: List[Dict[Any, Any]], timings: Optional[Dict[str, float]]
+) -> List[Dict[Any, Any]]:
+    buffer = _ChunkBuffer([dict(item) for item in items])
+    framework_state = pipeline.framework_state.snapshot()
+    framework_state.pipeline = None  # layout.grid() does not change the pipeline outputs
+    for batched, segment in groupby(pipeline.filters, key=lambda prc: prc.batched and len(items) > 1):
+        if not batched:
+            _run_per_item(pipeline, list(segment), buffer, framework_state, timings)
+            continue
+        for prc in segment:
+            if not _run_batched(pipeline, prc, buffer, framework_state, timings):
+                _run_per_item(pipeline, [prc], buffer, framework_state, timings)
+    return buffer.items
+
+
+def _run_per_item(
+    pipeline: PipelineCore,
+    segment: List[FilterCore],
+    buffer: _ChunkBuffer,
+    framework_state,
+    timings: Optional[Dict[str, float]],
+) -> None:
+    """Run consecutive filters on each item in turn (the first item through all of them first)."""
+    for index, item in enumerate(buffer.items):
+        for prc in segment:
+            routing_in = [None if key is None else item[key] for key in prc.inputs or []]
+            out = _apply(pipeline, prc, routing_in, framework_state, timings)
+            buffer.store(index, _route_outputs(prc, out))
+
+
+def run_batch(
+    pipeline: PipelineCore,
+    inputs: Iterable[Any],
+    batch_size: int = 32,
+    timings: Optional[Dict[str, float]] = None,
+) -> Iterator[Dict[Any, Any]]:
+    """Outputs of the pipeline for each set of inputs, see HeadlessPipeline.run_batch.
+
+    :param timings: the seconds spent in each filter are added to it (by filter name).
+    """
+    if batch_size < 1:
+        raise ValueError(f"batch_size must be a positive integer, got {batch_size}")
+    routed_inputs = (pipeline._route_inputs(item) or {} for item in inputs)
+    return _run_chunks(pipeline, routed_inputs, batch_size, timings)
+
+
+def _run_chunks(
+    pipeline: PipelineCore, routed_inputs: Iterator[dict], batch_size: int, timings: Optional[Dict[str, float]]
+) -> Iterator[Dict[Any, Any]]:
+    output_names = _flatten_outputs(pipeline.outputs if pipeline.outputs is not None else pipeline.filters[-1].outputs)
+    while True:
+        chunk = list(islice(routed_inputs, batch_size))
+        if not chunk:
+            return
+        _set_user_context(pipeline._user_context)
+        try:
+            results = _run_chunk(pipeline, chunk, timings)
+        finally:
+            _set_user_context(None)
+        for result in results:
+            yield {name: result[name] for name in output_names if name in result}
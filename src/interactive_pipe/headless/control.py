@@ -233,6 +233,8 @@ class Control:
     @value.setter
     def value(self, value=None):
         self._value = deepcopy(self.check_value(value) if value is not None else self.value_default)
+        # propagated to the connected filter by the next HeadlessPipeline run
+        self.dirty = True
 
     def reset(self):
         self.value = None
@@ -242,6 +244,7 @@ class Control:
         self.value = new_value
         if self.update_param_func is not None:
             self.update_param_func(self.value)
+            self.dirty = False
 
     def _clone_unconnected(self, name: str) -> "Control":
         """Shallow clone for a repeated filter instance: same value spec,
@@ -268,6 +271,7 @@ class Control:
         self.update_param_func = update_param_func
         self.parameter_name_to_connect = parameter_name
         self.filter_to_connect = filt
+        self.dirty = True
 
 
 class CircularControl(Control):
@@ -1,13 +1,19 @@
 import logging
+import os
 from pathlib import Path
-from typing import Any, Callable, List, Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Union
 
+from interactive_pipe.core.engine import _flatten_outputs
 from interactive_pipe.core.filter import FilterCore, analyze_apply_fn_signature
 from interactive_pipe.core.graph import get_call_graph
 from interactive_pipe.core.pipeline import PipelineCore
 from interactive_pipe.data_objects.parameters import Parameters
+from interactive_pipe.headless.batch import run_batch
 from interactive_pipe.headless.control import Control, TimeControl
 from interactive_pipe.headless.keyboard import KeyboardControl
+from interactive_pipe.headless.stream import stream
+from interactive_pipe.headless.sweep import SweepResult, sweep, sweep_axes
+from interactive_pipe.headless.sweep_store import SweepStore, inputs_digest, parameters_digest
 
 
 class HeadlessPipeline(PipelineCore):
@@ -22,6 +28,7 @@ class HeadlessPipeline(PipelineCore):
     """
 
     controls: List[Control]  # List of controls connected to filters
+    sweep_store: Optional[SweepStore] = None  # sweep results served instead of running (see use_sweep_store)
 
     @property
     def parameters(self):
@@ -114,6 +121,11 @@ class HeadlessPipeline(PipelineCore):
                     outputs=outputs_filt,
                     apply_fn=filt_dict["function_object"],
                     inplace=bool(getattr(filt_dict["function_object"], "__interactive_pipe_inplace__", False)),
+                    cache_max_entries=getattr(
+                        filt_dict["function_object"], "__interactive_pipe_cache_max_entries__", None
+                    ),
+                    vectorized=bool(getattr(filt_dict["function_object"], "__interactive_pipe_vectorized__", False)),
+                    batched=bool(getattr(filt_dict["function_object"], "__interactive_pipe_batched__", False)),
                 )
                 func_kwargs = analyze_apply_fn_signature(filt_dict["function_object"])[1]
                 if id(filt_dict["function_object"]) not in seen_function_ids:
@@ -226,23 +238,34 @@ class HeadlessPipeline(PipelineCore):
         return ret
 
     def update_parameters_from_controls(self):
+        """Push the values of the controls changed since the last call to their filter.
+
+        Controls mark themselves dirty when their value is assigned (key bindings,
+        resets, parameters setter); Control.update pushes the value right away. Only
+        dirty controls are propagated, to their own filter: a tick of one slider costs
+        the same with 10 or 500 controls.
+        """
         if not hasattr(self, "controls"):
             # Not having .controls attribute
             # This happens for headless pipelines which have no list of controls
             return
         for ctrl in self.controls:
+            if not ctrl.dirty:
+                continue
+            ctrl.dirty = False
             if ctrl.filter_to_connect is not None:
-                logging.info(f"{ctrl.filter_to_connect.name}, {ctrl.parameter_name_to_connect}, {ctrl.value}")
-                # Merge control value into existing parameters instead of replacing
-                current_params = self.parameters  # Get current parameters
-                if ctrl.filter_to_connect.name not in current_params:
-                    current_params[ctrl.filter_to_connect.name] = {}
-                current_params[ctrl.filter_to_connect.name][ctrl.parameter_name_to_connect] = ctrl.value
-                self.parameters = current_params  # Set merged parameters
+                logging.debug(f"{ctrl.filter_to_connect.name}, {ctrl.parameter_name_to_connect}, {ctrl.value}")
+                ctrl.filter_to_connect.values = {ctrl.parameter_name_to_connect: ctrl.value}
 
     def __run(self):
         self.update_parameters_from_controls()
-        result_full = super().run()
+        result_full = self._stored_results()
+        if result_full is None:
+            result_full = super().run()
+        return self._arrange_outputs(result_full)
+
+    def _arrange_outputs(self, result_full: dict):
+        """Outputs of a run laid out like the pipeline outputs (a tuple, or rows of a grid)."""
         if self.outputs is not None:
             output_indexes = self.outputs
         else:
@@ -266,6 +289,70 @@ class HeadlessPipeline(PipelineCore):
         self.results = self.__run()
         return self.results
 
+    def run_batch(self, inputs: Iterable[Any], batch_size: int = 32) -> Iterator[Any]:
+        """Run the pipeline on each set of inputs, streaming the outputs.
+
+        Filters declared batched (@interactive(batched=True)) process a chunk of
+        batch_size items in one call, their same-shaped numpy inputs stacked along a
+        leading axis. Other filters, and batched filters whose inputs differ in shape,
+        run once per item. Caches are not used and the pipeline inputs are left as
+        they are; parameters are the current ones.
+
+        :param inputs: iterable of inputs, each one like the value assigned to
+            pipeline.inputs (a single array for a pipeline with a single input).
+        :param batch_size: number of items processed together.
+        :return: generator of the outputs of each item, laid out like run().
+        """
+        self.update_parameters_from_controls()
+        return (self._arrange_outputs(result) for result in run_batch(self, inputs, batch_size=batch_size))
+
+    def stream(self, frames: Iterable[Any], prefetch: int = 4) -> Iterator[Any]:
+        """Run the pipeline on a sequence of frames, streaming the outputs.
+
+        Frames are pulled from the iterator on a background thread, up to prefetch
+        frames ahead of the one being processed (0: pulled in the calling thread).
+        The frames run on a private copy of the pipeline with the current parameters
+        and a dependency-aware cache: filters which do not depend on the frames are
+        computed once for the whole sequence. The pipeline itself is left untouched.
+
+        :param frames: iterable of inputs, each one like the value assigned to
+            pipeline.inputs (a single array for a pipeline with a single input).
+        :param prefetch: number of frames pulled ahead (bounds the frames in memory).
+        :return: generator of the outputs of each frame, laid out like run().
+        """
+        self.update_parameters_from_controls()
+        return (self._arrange_outputs(result) for result in stream(self, frames, prefetch=prefetch))
+
+    def use_sweep_store(self, store: Union[str, os.PathLike, SweepStore, None]) -> None:
+        """Serve the outputs from the results of a sweep when possible (None: stop).
+
+        When the inputs and the parameters which were not swept match the sweep, and
+        every swept parameter lands on one of its swept values (slider positions on
+        the sweep grid), run() reads the outputs from the store instead of running
+        the filters. Other settings run the pipeline as usual.
+        """
+        if store is not None and not isinstance(store, SweepStore):
+            store = SweepStore.open(store)
+        self.sweep_store = store
+
+    def _stored_results(self) -> Optional[dict]:
+        store = self.sweep_store
+        if store is None:
+            return None
+        inputs = self.inputs if self.inputs_routing else None
+        digest = inputs_digest(inputs)
+        if digest is None or store.manifest["inputs"] != digest:  # no digest: never matches
+            return None
+        parameters = self.parameters
+        digest = parameters_digest(parameters, store.axes)
+        if digest is None or store.manifest["parameters"] != digest:
+            return None
+        stored = store.lookup(parameters)
+        if stored is None or not _flatten_outputs(self.outputs) <= stored.keys():
+            return None
+        logging.debug(f"Outputs served from the sweep store {store.path}")
+        return stored
+
     def save(
         self,
         path: Optional[Path] = None,
@@ -281,7 +368,7 @@ class HeadlessPipeline(PipelineCore):
                 output_indexes = self.filters[-1].outputs
         if save_entire_buffer:
             output_indexes = None  # you may force specific buffer index you'd like to save
-        result_full = super().run()
+        result_full = super().run(entire_buffer=output_indexes != self.outputs)
         if result_full is None:
             return None
         if path is None:
@@ -355,6 +442,52 @@ class HeadlessPipeline(PipelineCore):
             self.parameters = current_params  # Calls setter to apply to filters
         return self.run()
 
+    def sweep(
+        self,
+        space: Dict[str, Union[Sequence[Any], None]],
+        strategy: str = "grid",
+        samples: Optional[int] = None,
+        seed: Optional[int] = None,
+        workers: int = 1,
+        store: Union[str, os.PathLike, None] = None,
+    ) -> Iterator[SweepResult]:
+        """Evaluate the pipeline over a parameter space, streaming the results.
+
+        ```
+        for res in pipeline.sweep({"gain": np.linspace(0, 2, 5), "sigma": [1, 2]}, workers=4):
+            print(res.parameters, res.outputs)
+        ```
+
+        The sweep runs on a private copy of the pipeline (current inputs, parameters and
+        context), ordered to reuse cached results: parameters of upstream filters vary
+        slowest. A pipeline without cache sweeps with cache="graph".
+
+        :param space: {parameter or control name: values}. None takes every value of
+            the control driving the parameter (choices, or its range at its step).
+        :param strategy: "grid" (every combination), "random" or "sobol" (samples points
+            drawn among the values).
+        :param samples: number of points of random and sobol sweeps.
+        :param seed: seed of random sweeps.
+        :param workers: number of worker processes (1: evaluate in this process). With
+            several workers, results arrive in completion order. Filters must be
+            picklable when the platform spawns workers instead of forking them.
+        :param store: directory where the outputs are written as they arrive (see
+            SweepStore), to browse them back later with use_sweep_store.
+        :return: generator of SweepResult (parameters, coordinates, outputs).
+        """
+        self.update_parameters_from_controls()
+        results = sweep(self, space, strategy=strategy, samples=samples, seed=seed, workers=workers)
+        if store is None:
+            return results
+        axes = sweep_axes(self, space)
+        sweep_store = SweepStore.create(
+            store,
+            axes,
+            inputs=inputs_digest(self.inputs if self.inputs_routing else None),
+            parameters=parameters_digest(self.parameters, axes),
+        )
+        return _stored(results, sweep_store)
+
     def graph_representation(self, path=None, ortho=True, view=False):
         def find_previous_key(searched_out, current_index, input_indexes, debug=False):
             last_filter_found = None
@@ -464,3 +597,11 @@ class HeadlessPipeline(PipelineCore):
                 logging.error(f"Failed to render graph: {exc}")
             return None
         return dot
+
+
+def _stored(results: Iterator[SweepResult], store: SweepStore) -> Iterator[SweepResult]:
+    """Write sweep results to a store as they stream by."""
+    with store:
+        for result in results:
+            store.write(result)
+            yield result
@@ -0,0 +1,87 @@
+"""Streaming: run a pipeline on a sequence of frames (video, bursts).
+
+Frames are pulled from the iterator (where decoding usually happens) on a background
+thread, at most ``prefetch`` frames ahead, while the pipeline processes the current
+one. Frames run one after the other on a private copy of the pipeline with a
+dependency-aware cache: assigning a new frame only invalidates the filters fed by the
+inputs which changed, so filters which do not depend on the frames (look-up tables,
+kernels derived from the sliders) are computed once for the whole sequence.
+"""
+
+import queue
+import threading
+from typing import Any, Dict, Iterable, Iterator
+
+from interactive_pipe.core.engine import _flatten_outputs
+from interactive_pipe.core.pipeline import PipelineCore
+from interactive_pipe.headless.sweep import _pipeline_spec, _private_pipeline
+
+_END = object()
+
+
+class _Prefetcher:
+    """Pulls items from an iterator on a background thread, at most maxsize ahead."""
+
+    def __init__(self, items: Iterable[Any], maxsize: int):
+        self.items = iter(items)
+        self.queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._pull, name="interactive_pipe-prefetch", daemon=True)
+        self.thread.start()
+
+    def _put(self, entry: tuple) -> bool:
+        while not self.stopped.is_set():
+            try:
+                self.queue.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _pull(self) -> None:
+        try:
+            for item in self.items:
+                if not self._put((item, None)):
+                    return
+        except BaseException as e:
+            # raised again in the consuming thread
+            self._put((_END, e))
+            return
+        self._put((_END, None))
+
+    def __iter__(self) -> Iterator[Any]:
+        try:
+            while True:
+                item, error = self.queue.get()
+                if error is not None:
+                    raise error
+                if item is _END:
+                    return
+                yield item
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        self.stopped.set()
+        self.thread.join()
+
+
+def stream(pipeline: PipelineCore, frames: Iterable[Any], prefetch: int = 4) -> Iterator[Dict[Any, Any]]:
+    """Outputs of the pipeline for each frame, see HeadlessPipeline.stream."""
+    if prefetch < 0:
+        raise ValueError(f"prefetch must be a non-negative integer, got {prefetch}")
+    private = _private_pipeline(_pipeline_spec(pipeline, inputs=False))
+    return _stream(private, frames, prefetch)
+
+
+def _stream(private: PipelineCore, frames: Iterable[Any], prefetch: int) -> Iterator[Dict[Any, Any]]:
+    output_names = _flatten_outputs(private.outputs if private.outputs is not None else private.filters[-1].outputs)
+    source = _Prefetcher(frames, prefetch) if prefetch > 0 else frames
+    try:
+        for frame in source:
+            private.inputs = frame
+            result = private.run()
+            yield {name: result[name] for name in output_names if name in result}
+    finally:
+        if isinstance(source, _Prefetcher):
+            source.close()  # the consumer may stop before the end of the frames
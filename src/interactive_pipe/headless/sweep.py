@@ -0,0 +1,330 @@
+"""Parameter sweeps: evaluate a pipeline over a grid or a sample of parameter values.
+
+Points are ordered to reuse the filter caches: the parameters of the most upstream
+filters vary slowest, so consecutive evaluations share the results of every filter
+before the one whose parameter moved. Evaluations run on a private copy of the
+pipeline (the caller's parameters and caches are left untouched), in the calling
+process or fanned out across worker processes, each worker evaluating contiguous
+chunks of the ordered points. Numpy outputs come back from workers through shared
+memory, like with ``executor="processes"``.
+"""
+
+import logging
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from itertools import groupby
+from multiprocessing import resource_tracker
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from interactive_pipe.core.engine import FilterError, _flatten_outputs
+from interactive_pipe.core.filter import FilterCore
+from interactive_pipe.core.pipeline import PipelineCore
+from interactive_pipe.core.process_engine import (
+    _from_shared,
+    _portable_error,
+    _portable_filter,
+    _to_shared,
+)
+from interactive_pipe.headless.control import Control
+
+SWEEP_STRATEGIES = ("grid", "random", "sobol")
+
+# Sobol direction numbers (Joe & Kuo) of dimensions 2 and above: (degree, coefficients, initial m)
+_SOBOL_DIRECTIONS = (
+    (1, 0, (1,)),
+    (2, 1, (1, 3)),
+    (3, 1, (1, 3, 1)),
+    (3, 2, (1, 1, 1)),
+    (4, 1, (1, 1, 3, 3)),
+    (4, 4, (1, 3, 5, 13)),
+    (5, 2, (1, 1, 5, 5, 17)),
+    (5, 4, (1, 1, 5, 5, 5)),
+    (5, 7, (1, 1, 7, 11, 19)),
+    (5, 11, (1, 1, 5, 1, 1)),
+    (5, 13, (1, 1, 1, 3, 11)),
+    (5, 14, (1, 3, 5, 5, 31)),
+)
+_SOBOL_BITS = 30
+
+
+@dataclass
+class SweepAxis:
+    """A swept parameter: the filter parameters it drives and the values it takes."""
+
+    name: str
+    targets: List[Tuple[str, str]]  # (filter name, parameter name)
+    values: list
+    position: int  # index of the most upstream filter it drives (axes vary slowest first)
+
+
+@dataclass
+class SweepResult:
+    """Outputs of the pipeline for one point of a sweep.
+
+    coordinates are the indexes of the parameter values along each axis (in the order
+    of the space given to sweep).
+    """
+
+    parameters: Dict[str, Any]
+    coordinates: Tuple[int, ...]
+    outputs: Dict[Any, Any]
+
+
+def sobol_points(num_points: int, dimensions: int) -> np.ndarray:
+    """First points of the Sobol low-discrepancy sequence in [0, 1)^dimensions."""
+    if dimensions > len(_SOBOL_DIRECTIONS) + 1:
+        raise ValueError(f"sobol sweeps support up to {len(_SOBOL_DIRECTIONS) + 1} parameters, got {dimensions}")
+    directions = np.zeros((dimensions, _SOBOL_BITS), dtype=np.int64)
+    directions[0] = [1 << (_SOBOL_BITS - 1 - bit) for bit in range(_SOBOL_BITS)]
+    for dim in range(1, dimensions):
+        degree, coefficients, initial = _SOBOL_DIRECTIONS[dim - 1]
+        values = [m << (_SOBOL_BITS - 1 - bit) for bit, m in enumerate(initial)]
+        for bit in range(degree, _SOBOL_BITS):
+            value = values[bit - degree] ^ (values[bit - degree] >> degree)
+            for k in range(1, degree):
+                if (coefficients >> (degree - 1 - k)) & 1:
+                    value ^= values[bit - k]
+            values.append(value)
+        directions[dim] = values
+    points = np.zeros((num_points, dimensions), dtype=np.int64)
+    current = np.zeros(dimensions, dtype=np.int64)
+    for index in range(1, num_points):
+        # Gray code order: flip the direction of the lowest zero bit of index - 1
+        bit = (~(index - 1) & index).bit_length() - 1
+        current ^= directions[:, bit]
+        points[index] = current
+    return points / float(1 << _SOBOL_BITS)
+
+
+def control_values(ctrl: Control) -> list:
+    """Values a control can take in the GUI: choices, booleans, or its range at its step."""
+    if ctrl._type is bool:
+        return [False, True]
+    if ctrl.value_range is None:
+        raise ValueError(f"control {ctrl.name} has no range: give the values to sweep explicitly")
+    if ctrl._type is str:
+        return list(ctrl.value_range)
+    low, high = (float(bound) for bound in ctrl.value_range)  # numeric range (str handled above)
+    num = int(round((high - low) / ctrl.step)) + 1  # type: ignore[operator]
+    if ctrl._type is int:
+        return [int(value) for value in np.unique(np.round(np.linspace(low, high, num)))]
+    return [float(value) for value in np.linspace(low, high, num)]
+
+
+def sweep_order(
+    axes: List[SweepAxis], strategy: str = "grid", samples: Optional[int] = None, seed: Optional[int] = None
+) -> List[Tuple[int, ...]]:
+    """Coordinates of the points of a sweep, in evaluation order.
+
+    grid: every combination. random / sobol: samples points drawn among the values of
+    each axis (uniformly, or following a Sobol sequence). Points are sorted so that the
+    axes of upstream filters vary slowest: consecutive points share their upstream results.
+    """
+    if strategy not in SWEEP_STRATEGIES:
+        raise ValueError(f"Unknown sweep strategy {strategy!r}, expected one of {SWEEP_STRATEGIES}")
+    sizes = np.array([len(axis.values) for axis in axes])
+    if strategy == "grid":
+        if samples is not None:
+            raise ValueError("samples only applies to the random and sobol strategies")
+        coordinates = np.indices(tuple(int(size) for size in sizes)).reshape(len(axes), -1).T
+    else:
+        if samples is None or samples < 1:
+            raise ValueError(f"{strategy} sweeps need a positive number of samples, got {samples}")
+        if strategy == "random":
+            unit = np.random.default_rng(seed).random((samples, len(axes)))
+        else:
+            unit = sobol_points(samples, len(axes))
+        coordinates = np.minimum((unit * sizes).astype(np.int64), sizes - 1)
+    order = sorted(range(len(axes)), key=lambda dim: axes[dim].position)
+    points = [tuple(int(coord) for coord in point) for point in coordinates]
+    return sorted(points, key=lambda point: tuple(point[dim] for dim in order))
+
+
+def _pipeline_spec(pipeline: PipelineCore, inputs: bool = True) -> dict:
+    """What a private copy of a pipeline is built from (picklable, sent to the workers).
+
+    :param inputs: copy the current inputs (False: the copy gets its own).
+    """
+    engine = pipeline.engine
+    return dict(
+        filters=[_portable_filter(filt) for filt in pipeline.filters],
+        name=pipeline.name,
+        cache=engine.cache or "graph",  # sweeps are ordered for cache reuse
+        inputs=pipeline.inputs_routing,
+        context=dict(dict.items(pipeline._user_context)),
+        outputs=pipeline.outputs,
+        readonly_inputs=engine.readonly_inputs,
+        freeze_inputs=engine.freeze_inputs,
+        freeze_outputs=engine.freeze_outputs,
+        input_values=pipeline.inputs if inputs and pipeline.inputs_routing else None,
+    )
+
+
+def _private_pipeline(spec: dict) -> PipelineCore:
+    """Copy of a pipeline with its own filters, caches and context (evaluates sweep points)."""
+    spec = dict(spec)
+    input_values = spec.pop("input_values")
+    private = PipelineCore(**spec)
+    if input_values is not None or not private.inputs_routing:
+        private.inputs = input_values
+    return private
+
+
+def _evaluate_points(
+    pipeline: PipelineCore, axes: List[SweepAxis], points: Sequence[Tuple[int, ...]]
+) -> Iterator[SweepResult]:
+    vectorized, batched = _vectorized_axes(pipeline, axes)
+    for _, group in groupby(points, key=lambda point: tuple(c for dim, c in enumerate(point) if dim not in batched)):
+        group = list(group)
+        if vectorized is not None and len(group) > 1:
+            # a single call of the vectorized filter for the whole group
+            vectorized.prefetch([_point_parameters(axes, point).get(vectorized.name, {}) for point in group])
+        try:
+            for coordinates in group:
+                pipeline.parameters = _point_parameters(axes, coordinates)
+                buffer = pipeline.run()
+                outputs = {name: buffer[name] for name in _flatten_outputs(pipeline.outputs) if name in buffer}
+                values = {axis.name: axis.values[coord] for axis, coord in zip(axes, coordinates)}
+                yield SweepResult(values, coordinates, outputs)
+        finally:
+            if vectorized is not None:
+                vectorized.prefetch(None)
+
+
+def _point_parameters(axes: List[SweepAxis], coordinates: Tuple[int, ...]) -> Dict[str, Dict[str, Any]]:
+    parameters: Dict[str, Dict[str, Any]] = {}
+    for axis, coord in zip(axes, coordinates):
+        for filter_name, parameter_name in axis.targets:
+            parameters.setdefault(filter_name, {})[parameter_name] = axis.values[coord]
+    return parameters
+
+
+def _vectorized_axes(pipeline: PipelineCore, axes: List[SweepAxis]) -> Tuple[Optional[FilterCore], set]:
+    """Most downstream vectorized filter with axes of its own, and these axes.
+
+    Its axes vary fastest (see sweep_order): consecutive points which only differ along
+    them are evaluated in one call of the filter.
+    """
+    for filt in reversed(pipeline.filters):
+        if not filt.vectorized:
+            continue
+        batched = {dim for dim, axis in enumerate(axes) if all(name == filt.name for name, _ in axis.targets)}
+        if batched:
+            return filt, batched
+    return None, set()
+
+
+# ----------------------------------------------------------------------------
+# Worker side
+# ----------------------------------------------------------------------------
+
+_worker_pipeline: Optional[PipelineCore] = None
+_worker_axes: List[SweepAxis] = []
+
+
+def _init_sweep_worker(spec: dict, axes: List[SweepAxis]) -> None:
+    global _worker_pipeline, _worker_axes
+    _worker_pipeline, _worker_axes = _private_pipeline(spec), axes
+
+
+def _run_sweep_chunk(points: List[Tuple[int, ...]]) -> tuple:
+    """Evaluate consecutive points; numpy outputs are sent back through shared memory."""
+    results = []
+    try:
+        for result in _evaluate_points(_worker_pipeline, _worker_axes, points):  # type: ignore[arg-type]
+            names = list(result.outputs)
+            shared = _to_shared([result.outputs[name] for name in names], [], owner=False)
+            results.append((result.parameters, result.coordinates, names, shared))
+    except FilterError as e:
+        # the points evaluated so far still reach the main process
+        return results, (e.filter_name, _portable_error(e.original_error, e.tb))
+    return results, None
+
+
+class _SweepPool:
+    """Worker processes evaluating chunks of sweep points, each with a private pipeline."""
+
+    def __init__(self, spec: dict, axes: List[SweepAxis], workers: int):
+        # workers must share the main process resource tracker (see ProcessPipelineEngine)
+        resource_tracker.ensure_running()
+        self.executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_sweep_worker, initargs=(spec, axes))
+
+    def run(self, chunks: List[List[Tuple[int, ...]]]) -> Iterator[SweepResult]:
+        pending = {self.executor.submit(_run_sweep_chunk, chunk) for chunk in chunks}
+        try:
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results, error = future.result()
+                    for parameters, coordinates, names, shared in results:
+                        outputs = dict(zip(names, _from_shared(shared, owner=True)))
+                        yield SweepResult(parameters, coordinates, outputs)
+                    if error is not None:
+                        filter_name, (original_error, frames) = error
+                        raise FilterError(filter_name, original_error, frames)
+        finally:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _control_target(ctrl: Control) -> Tuple[str, str]:
+    """(filter name, parameter name) driven by a connected control."""
+    assert ctrl.filter_to_connect is not None and ctrl.parameter_name_to_connect is not None
+    return ctrl.filter_to_connect.name, ctrl.parameter_name_to_connect
+
+
+def sweep_axes(pipeline: PipelineCore, space: Dict[str, Union[Sequence[Any], None]]) -> List[SweepAxis]:
+    """Axes of a sweep from {parameter or control name: values}.
+
+    None values take the values of the control driving the parameter (see control_values).
+    A parameter name shared by several filters drives all of them.
+    """
+    controls: List[Control] = [ctrl for ctrl in getattr(pipeline, "controls", []) if ctrl.filter_to_connect is not None]
+    axes = []
+    for name, values in space.items():
+        matching = [ctrl for ctrl in controls if ctrl.name == name]
+        targets: List[Tuple[str, str]]
+        if matching:
+            targets = [_control_target(ctrl) for ctrl in matching]
+        else:
+            targets = [(filt.name, name) for filt in pipeline.filters if name in filt.values]
+            matching = [ctrl for ctrl in controls if _control_target(ctrl) in targets]
+        if not targets:
+            raise ValueError(f"{name} is neither a parameter nor a control of pipeline {pipeline.name}")
+        if values is None:
+            if not matching:
+                raise ValueError(f"{name} is not driven by a control: give the values to sweep explicitly")
+            values = control_values(matching[0])
+        values = list(values)
+        if not values:
+            raise ValueError(f"no value to sweep for {name}")
+        filter_names = [filt.name for filt in pipeline.filters]
+        position = min(filter_names.index(filter_name) for filter_name, _ in targets)
+        axes.append(SweepAxis(name, targets, values, position))
+    return axes
+
+
+def sweep(
+    pipeline: PipelineCore,
+    space: Dict[str, Union[Sequence[Any], None]],
+    strategy: str = "grid",
+    samples: Optional[int] = None,
+    seed: Optional[int] = None,
+    workers: int = 1,
+) -> Iterator[SweepResult]:
+    """Evaluate the pipeline over a parameter space, see HeadlessPipeline.sweep."""
+    if workers < 1:
+        raise ValueError(f"workers must be a positive integer, got {workers}")
+    axes = sweep_axes(pipeline, space)
+    points = sweep_order(axes, strategy, samples=samples, seed=seed)
+    spec = _pipeline_spec(pipeline)
+    logging.info(f"Sweeping {len(points)} points of {[axis.name for axis in axes]} on {workers} worker(s)")
+    if workers == 1:
+        return _evaluate_points(_private_pipeline(spec), axes, points)
+    # contiguous chunks keep the cache reuse of the ordering within each worker,
+    # several chunks per worker balance the load
+    num_chunks = min(len(points), 4 * workers)
+    chunks = [chunk.tolist() for chunk in np.array_split(np.arange(len(points)), num_chunks)]
+    chunks = [[points[idx] for idx in chunk] for chunk in chunks if chunk]
+    return _SweepPool(spec, axes, workers).run(chunks)
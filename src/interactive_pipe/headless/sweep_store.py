@@ -0,0 +1,228 @@
+"""On-disk store of sweep results, browsed back without recomputing.
+
+A store is a directory holding one memory-mapped ``.npy`` array per pipeline output,
+indexed by the coordinates of the parameter values along the sweep axes (the output
+shape follows), plus a mask of the points already written and a ``sweep.json``
+manifest (axes, outputs, and digests of the inputs and of the parameters which were
+not swept). Reading a point maps a slice of each array: browsing a large sweep loads
+only what is displayed. Each output is a single array file rather than a set of chunk
+files: a memory map already reads only the pages of the displayed point.
+
+A pipeline browsing a store (HeadlessPipeline.use_sweep_store) serves its outputs
+from the store whenever its inputs and unswept parameters match the sweep and every
+swept parameter lands on a value of its axis; other settings run the pipeline. The
+pipeline context is not part of the manifest: a store does not tell results computed
+with another context apart.
+"""
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from interactive_pipe.core.engine import _digest, _input_token
+from interactive_pipe.core.fingerprint import _fingerprint
+from interactive_pipe.headless.sweep import SweepAxis, SweepResult
+
+MANIFEST = "sweep.json"
+FILLED = "filled.npy"
+
+
+def _json_value(value: Any) -> Any:
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def inputs_digest(inputs: Optional[dict]) -> Optional[str]:
+    """Digest of the content of the pipeline inputs (None: cannot be digested)."""
+    tokens = [(repr(name), _input_token(value)) for name, value in (inputs or {}).items()]
+    if any(token is None for _, token in tokens):
+        return None
+    return _digest(tuple(sorted(tokens, key=lambda pair: pair[0]))).hex()
+
+
+def parameters_digest(parameters: Dict[str, dict], axes: List[SweepAxis]) -> Optional[str]:
+    """Digest of the parameters which are not swept (None: cannot be digested)."""
+    swept = {target for axis in axes for target in axis.targets}
+    fixed = {
+        filter_name: {name: value for name, value in values.items() if (filter_name, name) not in swept}
+        for filter_name, values in parameters.items()
+    }
+    fingerprint = _fingerprint(fixed)
+    return None if type(fingerprint) is object else _digest(fingerprint).hex()
+
+
+class SweepStore:
+    """Columnar store of sweep results: one memory-mapped array per output.
+
+    Create one with SweepStore.create (or pipeline.sweep(..., store=path)), open an
+    existing one with SweepStore.open. Outputs which are not numpy compatible (object
+    dtype) or whose shape changes along the sweep are not stored.
+    """
+
+    def __init__(self, path: Union[str, os.PathLike], manifest: dict, mode: str):
+        self.path = Path(path)
+        self.manifest = manifest
+        self.mode = mode
+        self.axes = [
+            SweepAxis(axis["name"], [tuple(t) for t in axis["targets"]], axis["values"], 0) for axis in manifest["axes"]
+        ]
+        self.shape = tuple(len(axis.values) for axis in self.axes)
+        self.filled: np.memmap = np.lib.format.open_memmap(self.path / FILLED, mode="r+" if mode == "w" else "r")
+        self._arrays: Dict[Any, np.memmap] = {}
+        for entry in manifest["outputs"]:
+            self._arrays[entry["name"]] = np.lib.format.open_memmap(
+                self.path / entry["file"], mode="r+" if mode == "w" else "r"
+            )
+
+    @classmethod
+    def create(
+        cls,
+        path: Union[str, os.PathLike],
+        axes: List[SweepAxis],
+        inputs: Optional[str],
+        parameters: Optional[str],
+    ) -> "SweepStore":
+        """New empty store for the given axes (an existing store at path is replaced).
+
+        :param inputs: digest of the swept inputs (see inputs_digest).
+        :param parameters: digest of the unswept parameters (see parameters_digest).
+        :raises ValueError: a digest is missing (results could not be told apart).
+        """
+        _check_digests(inputs, parameters, path)
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        for stale in path.glob("*.npy"):
+            stale.unlink()
+        manifest = {
+            "version": 1,
+            "axes": [
+                {"name": axis.name, "targets": axis.targets, "values": [_json_value(v) for v in axis.values]}
+                for axis in axes
+            ],
+            "outputs": [],
+            "dropped": [],
+            "inputs": inputs,
+            "parameters": parameters,
+        }
+        shape = tuple(len(axis.values) for axis in axes)
+        np.lib.format.open_memmap(path / FILLED, mode="w+", dtype=np.bool_, shape=shape).flush()
+        store = cls(path, manifest, mode="w")
+        store._save_manifest()
+        return store
+
+    @classmethod
+    def open(cls, path: Union[str, os.PathLike]) -> "SweepStore":
+        """Open an existing store, read-only."""
+        path = Path(path)
+        if not (path / MANIFEST).is_file():
+            raise FileNotFoundError(f"No sweep store at {path} (missing {MANIFEST})")
+        with open(path / MANIFEST) as manifest_file:
+            manifest = json.load(manifest_file)
+        _check_digests(manifest.get("inputs"), manifest.get("parameters"), path)
+        return cls(path, manifest, mode="r")
+
+    def _save_manifest(self) -> None:
+        with open(self.path / MANIFEST, "w") as manifest_file:
+            json.dump(self.manifest, manifest_file, indent=2)
+
+    def write(self, result: SweepResult) -> None:
+        """Store the outputs of a sweep point."""
+        if self.mode != "w":
+            raise RuntimeError(f"Sweep store {self.path} is opened read-only")
+        for name, value in result.outputs.items():
+            if name in self.manifest["dropped"]:
+                continue
+            array = np.asarray(value)
+            stored = self._arrays.get(name)
+            if stored is None:
+                if array.dtype.hasobject:
+                    self._drop(name, "not a numpy compatible value")
+                    continue
+                entry = {"name": name, "file": f"output_{len(self.manifest['outputs'])}.npy"}
+                stored = np.lib.format.open_memmap(
+                    self.path / entry["file"], mode="w+", dtype=array.dtype, shape=self.shape + array.shape
+                )
+                self._arrays[name] = stored
+                self.manifest["outputs"].append(entry)
+                self._save_manifest()
+            elif stored.shape[len(self.shape) :] != array.shape:
+                self._drop(name, f"shape changes along the sweep ({array.shape})")
+                continue
+            stored[result.coordinates] = array
+        self.filled[result.coordinates] = True
+
+    def _drop(self, name: Any, reason: str) -> None:
+        logging.warning(f"Sweep store: output {name} is not stored, {reason}")
+        self.manifest["dropped"].append(name)
+        self.manifest["outputs"] = [entry for entry in self.manifest["outputs"] if entry["name"] != name]
+        stored = self._arrays.pop(name, None)
+        self._save_manifest()
+        if stored is not None and stored.filename is not None:
+            filename = stored.filename
+            del stored
+            Path(filename).unlink(missing_ok=True)
+
+    def flush(self) -> None:
+        """Write the pending changes to disk."""
+        for array in (self.filled, *self._arrays.values()):
+            array.flush()
+
+    @property
+    def outputs(self) -> List[Any]:
+        """Names of the stored outputs."""
+        return list(self._arrays)
+
+    def coordinates(self, parameters: Dict[str, dict]) -> Optional[Tuple[int, ...]]:
+        """Coordinates of the swept values found in parameters (None: off the sweep values)."""
+        coordinates = []
+        for axis in self.axes:
+            filter_name, parameter_name = axis.targets[0]
+            value = parameters.get(filter_name, {}).get(parameter_name)
+            index = _index_of(axis.values, value)
+            if index is None:
+                return None
+            coordinates.append(index)
+        return tuple(coordinates)
+
+    def lookup(self, parameters: Dict[str, dict]) -> Optional[Dict[Any, np.ndarray]]:
+        """Stored outputs for the swept values of parameters (None: point not stored).
+
+        Arrays are read-only memory-mapped views: only the displayed point is loaded.
+        """
+        coordinates = self.coordinates(parameters)
+        if coordinates is None or not self.filled[coordinates]:
+            return None
+        return {name: array[coordinates] for name, array in self._arrays.items()}
+
+    def __enter__(self) -> "SweepStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self.mode == "w":
+            self.flush()
+
+
+def _check_digests(inputs: Optional[str], parameters: Optional[str], path: Union[str, os.PathLike]) -> None:
+    """Refuse a store whose inputs or unswept parameters cannot be digested."""
+    missing = [name for name, digest in (("inputs", inputs), ("parameters", parameters)) if digest is None]
+    if missing:
+        raise ValueError(
+            f"Sweep store {path}: the {' and '.join(missing)} cannot be digested, "
+            "stored results could not be matched to the pipeline settings"
+        )
+
+
+def _index_of(values: list, value: Any) -> Optional[int]:
+    """Index of value among the values of an axis (numbers compared with a tolerance)."""
+    value = _json_value(value)
+    numeric = isinstance(value, (int, float)) and not isinstance(value, bool)
+    for index, candidate in enumerate(values):
+        if numeric and isinstance(candidate, (int, float)) and not isinstance(candidate, bool):
+            if np.isclose(value, candidate, rtol=1e-9, atol=1e-12):
+                return index
+        elif type(value) is type(candidate) and value == candidate:
+            return index
+    return None
@@ -0,0 +1,223 @@
+"""Command line batch runner: ``python -m interactive_pipe run module:pipeline_fn ...``.
+
+Builds a HeadlessPipeline from a pipeline function, applies a tuning file, and
+processes image files on a pool of worker processes. Each worker builds its own
+pipeline (the module is imported again in the worker), processes chunks of files with
+run_batch (filters declared batched see a whole chunk at once) and writes the outputs
+on background threads while the next images are processed. Throughput and the time
+spent in each filter are printed at the end.
+
+    python -m interactive_pipe run my_module:process --inputs 'raw/*.png' --tuning tune.yaml --out out/ --workers 16
+"""
+
+import argparse
+import glob
+import importlib
+import importlib.abc
+import importlib.util
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from interactive_pipe.core.engine import _flatten_outputs
+from interactive_pipe.data_objects.image import Image
+from interactive_pipe.data_objects.parameters import Parameters
+from interactive_pipe.headless.batch import run_batch
+from interactive_pipe.headless.pipeline import HeadlessPipeline
+
+
+def load_pipeline(target: str, tuning: Optional[Path] = None) -> HeadlessPipeline:
+    """Pipeline from "module:function" (module name or path to a python file), tuned from a file."""
+    module_name, _, attribute = target.rpartition(":")
+    if not module_name or not attribute:
+        raise ValueError(f"expected module:function, got {target!r}")
+    if module_name.endswith(".py") or Path(module_name).is_file():
+        spec = importlib.util.spec_from_file_location(Path(module_name).stem, module_name)
+        loader = None if spec is None else spec.loader
+        if spec is None or not isinstance(loader, importlib.abc.InspectLoader):
+            raise ValueError(f"cannot import {module_name}: not a python module")
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[spec.name] = module
+        loader.exec_module(module)
+    else:
+        module = importlib.import_module(module_name)
+    pipeline_fn = getattr(module, attribute, None)
+    if pipeline_fn is None:
+        raise ValueError(f"{module_name} has no attribute {attribute}")
+    pipeline = pipeline_fn if isinstance(pipeline_fn, HeadlessPipeline) else HeadlessPipeline.from_function(pipeline_fn)
+    if tuning is not None:
+        # unlike import_tuning (bound to a GUI key), a broken tuning file stops the batch
+        pipeline.parameters = Parameters.from_file(tuning).data
+    return pipeline
+
+
+# ----------------------------------------------------------------------------
+# Worker side
+# ----------------------------------------------------------------------------
+
+_worker_pipeline: Optional[HeadlessPipeline] = None
+
+
+def _init_worker(target: str, tuning: Optional[Path]) -> None:
+    global _worker_pipeline
+    _worker_pipeline = load_pipeline(target, tuning)
+
+
+def _write_outputs(result: Dict[Any, Any], source: Path, root: Path, out_dir: Path, extension: str) -> int:
+    """Write the numpy outputs of an image next to each other, return the bytes written.
+
+    Outputs go to the path of the image relative to root, mirrored under out_dir (images
+    with the same name in different directories do not overwrite each other).
+    """
+    written = 0
+    target_dir = out_dir / source.parent.relative_to(root)
+    target_dir.mkdir(parents=True, exist_ok=True)
+    for name, value in result.items():
+        if not isinstance(value, np.ndarray):
+            logging.warning(f"{source.name}: output {name} is not an image, not written")
+            continue
+        path = target_dir / f"{source.stem}_{name}{extension}"
+        Image.save_image(value, path)
+        written += path.stat().st_size
+    return written
+
+
+def _process_files(files: List[Path], root: Path, out_dir: Path, extension: str, batch_size: int) -> dict:
+    """Process files with the pipeline of this process; outputs are written on background threads."""
+    pipeline = _worker_pipeline
+    if pipeline is None:
+        raise RuntimeError("batch runner worker used before initialization")
+    timings: Dict[str, float] = {}
+
+    def images() -> Iterator[np.ndarray]:
+        for path in files:
+            yield Image.load_image(path)
+
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix="interactive_pipe-writer") as writer:
+        pending = [
+            writer.submit(_write_outputs, result, path, root, out_dir, extension)
+            for path, result in zip(files, run_batch(pipeline, images(), batch_size=batch_size, timings=timings))
+        ]
+        written = sum(future.result() for future in pending)
+    return {
+        "images": len(files),
+        "bytes_read": sum(path.stat().st_size for path in files),
+        "bytes_written": written,
+        "timings": timings,
+    }
+
+
+# ----------------------------------------------------------------------------
+# Main process
+# ----------------------------------------------------------------------------
+
+
+def _input_files(patterns: Sequence[str]) -> List[Path]:
+    files = sorted({Path(path).resolve() for pattern in patterns for path in glob.glob(pattern, recursive=True)})
+    return [path for path in files if path.is_file()]
+
+
+def _input_root(files: List[Path]) -> Path:
+    """Deepest directory holding every input file (their paths are mirrored from it)."""
+    return Path(os.path.commonpath([path.parent for path in files]))
+
+
+def _summary(stats: List[dict], elapsed: float) -> str:
+    images = sum(stat["images"] for stat in stats)
+    megabytes_read = sum(stat["bytes_read"] for stat in stats) / 1e6
+    megabytes_written = sum(stat["bytes_written"] for stat in stats) / 1e6
+    timings: Dict[str, float] = {}
+    for stat in stats:
+        for name, seconds in stat["timings"].items():
+            timings[name] = timings.get(name, 0.0) + seconds
+    total = sum(timings.values()) or 1.0
+    lines = [
+        f"{images} images in {elapsed:.2f} s: {images / elapsed:.1f} images/s, "
+        f"{megabytes_read / elapsed:.1f} MB/s read, {megabytes_written / elapsed:.1f} MB/s written",
+        "Time spent in each filter (all workers):",
+    ]
+    for name, seconds in sorted(timings.items(), key=lambda item: -item[1]):
+        lines.append(
+            f"  {name:<30} {seconds:9.3f} s  {100 * seconds / total:5.1f} %  {1000 * seconds / images:8.2f} ms/image"
+        )
+    return "\n".join(lines)
+
+
+def run(args: argparse.Namespace) -> int:
+    files = _input_files(args.inputs)
+    if not files:
+        raise ValueError(f"no input file matches {args.inputs}")
+    # fail early, in the main process, on a wrong target, tuning file or pipeline
+    pipeline = load_pipeline(args.target, args.tuning)
+    if len(pipeline.inputs_routing or []) != 1:
+        raise ValueError(f"{args.target} takes {len(pipeline.inputs_routing or [])} inputs, the runner feeds one image")
+    if not _flatten_outputs(pipeline.outputs):
+        raise ValueError(f"{args.target} returns no output to write")
+    args.out.mkdir(parents=True, exist_ok=True)
+    root = _input_root(files)
+    chunks = [files[start : start + args.batch_size] for start in range(0, len(files), args.batch_size)]
+    logging.info(f"{len(files)} images, {len(chunks)} chunks on {args.workers} worker(s)")
+    tic = time.perf_counter()
+    stats = []
+    if args.workers == 1:
+        global _worker_pipeline
+        _worker_pipeline = pipeline
+        try:
+            for chunk in chunks:
+                stats.append(_process_files(chunk, root, args.out, args.extension, args.batch_size))
+        finally:
+            _worker_pipeline = None
+    else:
+        with ProcessPoolExecutor(
+            max_workers=args.workers, initializer=_init_worker, initargs=(args.target, args.tuning)
+        ) as executor:
+            futures = [
+                executor.submit(_process_files, chunk, root, args.out, args.extension, args.batch_size)
+                for chunk in chunks
+            ]
+            for future in as_completed(futures):
+                stats.append(future.result())
+    print(_summary(stats, time.perf_counter() - tic))
+    return 0
+
+
+def _positive(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"expected a positive integer, got {value}")
+    return number
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m interactive_pipe", description="Run interactive_pipe pipelines without GUI"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="process image files with a pipeline, without GUI")
+    run_parser.add_argument("target", help="pipeline function, as module:function or path/to/file.py:function")
+    run_parser.add_argument("--inputs", nargs="+", required=True, help="input image files (glob patterns)")
+    run_parser.add_argument("--out", type=Path, required=True, help="output directory")
+    run_parser.add_argument("--tuning", type=Path, default=None, help="yaml or json tuning file (see export_tuning)")
+    run_parser.add_argument("--workers", type=_positive, default=1, help="number of worker processes")
+    run_parser.add_argument("--batch-size", type=_positive, default=8, help="images processed together")
+    run_parser.add_argument("--extension", default=".png", help="format of the written images")
+    run_parser.add_argument("-v", "--verbose", action="store_true", help="log progress")
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.verbose:
+        logging.basicConfig(level=logging.INFO)
+    try:
+        return run(args)
+    except (ValueError, FileNotFoundError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
@@ -130,7 +130,13 @@ def filter_from_function(apply_fn, default_params=None, inplace: bool = False, *
     return filter_instance
 
 
-def interactive(inplace: bool = False, **decorator_controls: Any):
+def interactive(
+    inplace: bool = False,
+    cache_max_entries: Optional[int] = None,
+    vectorized: bool = False,
+    batched: bool = False,
+    **decorator_controls: Any,
+):
     """Declare controls bound to a filter's keyword arguments.
 
     The decorated function keeps working as a plain function, but when used
@@ -143,6 +149,19 @@ def interactive(inplace: bool = False, **decorator_controls: Any):
             engine then hands it private writable copies instead of
             read-only views. Prefer copying explicitly
             (``img = img.copy()``) in new code.
+        cache_max_entries: Number of results of this filter kept in the
+            cache (least recently used evicted first), so that going back to
+            a recent setting is a lookup. Defaults to the pipeline setting.
+        vectorized: Declare that the filter broadcasts over its parameters
+            (pure numpy such as ``img * gain`` or ``img > threshold``).
+            Sweeps then evaluate several values of its parameters in one
+            call: each parameter that varies arrives as an array of shape
+            ``(B, 1, ..., 1)`` and every output must be stacked along a
+            leading batch axis of length ``B``.
+        batched: Declare that the filter processes a stack of images along
+            a leading batch axis (per-pixel numpy such as ``img * gain``
+            usually does). ``pipeline.run_batch`` then calls it once per
+            chunk of same-shaped inputs instead of once per image.
         **decorator_controls: Mapping of keyword-argument name to a control
             declaration — a ``Control`` instance (or subclass such as
             ``KeyboardControl``) or the ``(default, [min, max])`` tuple
@@ -178,6 +197,9 @@ def interactive(inplace: bool = False, **decorator_controls: Any):
 
         # picked up by HeadlessPipeline.from_function when building the FilterCore
         setattr(inner, "__interactive_pipe_inplace__", inplace)
+        setattr(inner, "__interactive_pipe_cache_max_entries__", cache_max_entries)
+        setattr(inner, "__interactive_pipe_vectorized__", vectorized)
+        setattr(inner, "__interactive_pipe_batched__", batched)
         return inner
 
     return wrapper
@@ -1,4 +1,5 @@
 import functools
+import os
 from typing import Any, Callable, Optional, Union
 
 from interactive_pipe.core.backend import Backend
@@ -25,6 +26,17 @@ def interactive_pipeline(
     safe_input_buffer_deepcopy: bool = True,
     cache: Union[bool, str] = False,
     readonly_inputs: bool = True,
+    executor: str = "sequential",
+    max_workers: Optional[int] = None,
+    cache_max_entries: Optional[int] = None,
+    cache_memory_limit: Union[int, str, None] = None,
+    cache_dir: Union[str, os.PathLike, None] = None,
+    cache_disk_limit: Union[int, str, None] = "10GB",
+    freeze_outputs: bool = False,
+    freeze_inputs: bool = False,
+    release_buffers: bool = False,
+    demand_driven: bool = False,
+    sweep_store: Union[str, os.PathLike, None] = None,
     context: Optional[dict] = None,
     markdown_description: Optional[str] = None,
     name: Optional[str] = None,
@@ -62,6 +74,65 @@ def interactive_pipeline(
             - "graph-strict": same as "graph", but context reads return
               numpy arrays as read-only views so accidental in-place
               mutation raises at the offending line (debug helper).
+        executor: How filters are executed.
+            - "sequential" (default): one after the other, in source order.
+            - "threads": filters whose inputs are ready run concurrently on a
+              thread pool, so independent branches overlap. Results and
+              cache behavior are identical; pays off when filters release
+              the GIL (numpy, OpenCV, torch).
+            - "processes": same scheduling on worker processes, numpy
+              buffers being exchanged through shared memory. Pays off for
+              pure-python filters holding the GIL.
+        max_workers: Pool size for ``executor="threads"``/``"processes"``
+            (defaults to the ``concurrent.futures`` heuristic).
+        cache_max_entries: Number of results kept per filter when caching
+            (least recently used evicted first), so that going back to a
+            recent setting (A/B toggling, scrubbing a slider back) is a
+            lookup instead of a recomputation. Defaults to 1; filters can
+            override it with ``@interactive(cache_max_entries=...)``.
+        cache_memory_limit: Memory budget shared by all filter caches, in
+            bytes or as a string such as ``"2GB"`` or ``"512MiB"``. When
+            exceeded, cached results are evicted by value (recompute time x
+            reuse / size); an evicted result is recomputed when needed.
+        cache_dir: Directory where cached results are persisted (requires
+            ``cache="graph"`` or ``"graph-strict"``). Results are keyed by
+            the filter source code, parameters, context reads and input
+            content, so a restarted session loads the results it already
+            computed instead of recomputing them. Numpy outputs are stored
+            as ``.npy`` files, loaded memory-mapped.
+        cache_disk_limit: Size limit of ``cache_dir`` (bytes or a string
+            such as ``"10GB"``); least recently used results are removed
+            first. None for no limit.
+        freeze_inputs: Hand numpy inputs to the filters as read-only views
+            instead of deep-copying them on every run (``np.memmap`` inputs
+            are never loaded into memory). Filters get the same protection:
+            writing to an input raises, ``inplace=True`` filters receive
+            private copies. Inputs which cannot be made read-only (torch
+            tensors, arbitrary objects) are still copied on every run.
+        freeze_outputs: Cache filter outputs by reference, made read-only,
+            instead of deep copies, so recomputing a filter no longer copies
+            its outputs. The outputs are read-only afterwards: a filter that
+            keeps writing into a buffer it returned must copy it first, and
+            filters declared ``@interactive(inplace=True)`` receive private
+            copies of their inputs as before.
+        release_buffers: Free each intermediate result as soon as the last
+            filter consuming it ran, instead of keeping every intermediate
+            alive until the end of the run: peak memory is bounded by the
+            buffers actually alive at the same time. Only the pipeline
+            outputs are kept (cached results stay in their caches). The
+            peak size of the buffers is reported as
+            ``pipeline.engine.peak_buffer_bytes``.
+        demand_driven: Only run the filters needed to compute the outputs
+            currently displayed: their upstream filters, plus the filters
+            writing ``context`` keys they read. Hiding a panel of heavy
+            diagnostic outputs (``layout.grid``) skips the filters computing
+            them. Requires ``cache="graph"`` or ``"graph-strict"``; the
+            first run computes every filter.
+        sweep_store: Directory of a sweep written by
+            ``pipeline.sweep(..., store=...)``. Slider positions landing on
+            swept values display the stored outputs instead of running the
+            filters, as long as the inputs and the other parameters are
+            those of the sweep; any other setting runs the pipeline.
         context: Initial content of the shared context dictionary, readable
             and writable from filters through the ``context`` proxy.
         markdown_description: Description displayed by backends that support
@@ -104,8 +175,20 @@ def interactive_pipeline(
             safe_input_buffer_deepcopy=safe_input_buffer_deepcopy,
             cache=cache,
             readonly_inputs=readonly_inputs,
+            executor=executor,
+            max_workers=max_workers,
+            cache_max_entries=cache_max_entries,
+            cache_memory_limit=cache_memory_limit,
+            cache_dir=cache_dir,
+            cache_disk_limit=cache_disk_limit,
+            freeze_outputs=freeze_outputs,
+            freeze_inputs=freeze_inputs,
+            release_buffers=release_buffers,
+            demand_driven=demand_driven,
             context=context,
         )
+        if sweep_store is not None:
+            headless_pipeline.use_sweep_store(sweep_store)
         if gui is None or gui == "headless":
             return headless_pipeline
         else:
@@ -1,10 +1,13 @@
-from interactive_pipe.core.cache import StateChange
+import numpy as np
+import pytest
+
+from interactive_pipe.core.cache import CachedResults, StateChange, freeze
 
 
 def test_initial_state():
     sc = StateChange(name="Sample_Filter")
     assert sc.name == "Sample_Filter"
-    assert sc._stored_params is None
+    assert sc._stored_fingerprint is None
     assert sc._update_needed is False
     assert repr(sc) == "Sample_Filter: no update needed"
 
@@ -13,7 +16,8 @@ def test_has_changed_with_none_stored_params():
     sc = StateChange(name="Sample_Filter")
     assert sc.has_changed(new_params={"param1": "value1"}) is True
     assert sc.update_needed is True
-    assert sc._stored_params == {"param1": "value1"}
+    assert sc._stored_fingerprint is not None
+    assert sc._stored_params is None  # no copy of the parameters is kept
     assert repr(sc) == "Sample_Filter: needs update"
 
 
@@ -31,3 +35,84 @@ def test_has_changed_with_different_params():
     assert sc.has_changed({"param1": "value2"}) is True
     assert sc.update_needed is True
     assert repr(sc) == "Sample_Filter: needs update"
+
+
+def test_has_changed_with_array_parameters():
+    sc = StateChange(name="Sample_Filter")
+    weights = np.linspace(0.0, 1.0, 5)
+    assert sc.has_changed({"weights": weights}) is True
+    assert sc.has_changed({"weights": weights.copy()}) is False
+    assert sc.has_changed({"weights": weights.astype(np.float32)}) is True
+
+
+def test_has_changed_detects_in_place_mutation_of_parameters():
+    sc = StateChange(name="Sample_Filter")
+    points = [[0.0, 0.0], [1.0, 1.0]]
+    sc.has_changed({"points": points})
+    points[1][1] = 0.5
+    assert sc.has_changed({"points": points}) is True
+    assert sc.has_changed({"flag": True}) is True
+    assert sc.has_changed({"flag": 1}) is True  # typed: True != 1
+
+
+def test_has_changed_falls_back_to_copies_for_unpicklable_parameters():
+    sc = StateChange(name="Sample_Filter")
+    callback = lambda x: x  # noqa: E731 - unpicklable
+    assert sc.has_changed({"callback": callback}) is True
+    assert sc.has_changed({"callback": callback}) is False
+    assert sc.has_changed({"callback": print}) is True
+
+
+def test_cached_results_lookup_and_lru_eviction():
+    cache = CachedResults(name="Sample_Filter", max_entries=2)
+    assert cache.lookup(b"a") is False
+    cache.update([1], key=b"a")
+    cache.update([2], key=b"b")
+    assert cache.lookup(b"a") is True
+    assert cache.result == [1] and cache.key == b"a"
+    cache.update([3], key=b"c")  # evicts b, the least recently used
+    assert b"b" not in cache
+    assert b"a" in cache and b"c" in cache
+    assert cache.lookup(None) is False
+
+
+def test_cached_results_forced_change_drops_stored_results():
+    cache = CachedResults(name="Sample_Filter", max_entries=4)
+    cache.has_changed({"param1": "value1"})
+    cache.update([1], key=b"a")
+    cache.force_change = True
+    assert cache.has_changed({"param1": "value1"}) is True
+    assert b"a" not in cache
+
+
+def test_cached_results_rejects_invalid_max_entries():
+    with pytest.raises(ValueError):
+        CachedResults(max_entries=0)
+
+
+def test_freeze_makes_owned_arrays_read_only_without_copy():
+    owned = np.zeros((4, 4))
+    frozen = freeze([owned, 3, "label", {"lut": np.arange(3)}])
+    assert frozen[0] is owned and not owned.flags.writeable
+    assert frozen[1:3] == [3, "label"]
+    assert not frozen[3]["lut"].flags.writeable
+
+
+def test_freeze_copies_views_of_writable_buffers():
+    buffer = np.zeros((4, 4))
+    view = buffer[1:3]
+    frozen = freeze(view)
+    assert frozen is not view and not frozen.flags.writeable
+    buffer[1:3] = 1.0  # the owner keeps writing: the frozen result is unaffected
+    assert np.all(frozen == 0.0)
+    readonly_view = frozen[::2]
+    assert freeze(readonly_view) is readonly_view  # view of frozen data: no copy
+
+
+def test_cached_results_can_store_by_reference():
+    cache = CachedResults("filter")
+    result = [np.ones(3)]
+    cache.update(result, key=b"k", copy=False)
+    assert cache.result is result
+    cache.update(result, key=b"k")
+    assert cache.result is not result
@@ -0,0 +1,117 @@
+"""Tests for the pipeline cache memory budget (cache_memory_limit).
+
+Covers:
+- human readable sizes
+- byte accounting of nested results
+- eviction order: stored-for-later results before current ones, then lowest value first
+- a pipeline never holds more than its budget after a run, and stays correct
+"""
+
+import numpy as np
+import pytest
+
+from interactive_pipe.core.cache import CacheBudget, CachedResults, nbytes_of, parse_size
+from interactive_pipe.core.filter import FilterCore
+from interactive_pipe.core.pipeline import PipelineCore
+from interactive_pipe.helper.pipeline_decorator import interactive_pipeline
+
+input_image = np.ones((100, 100), dtype=np.float32)  # 40 kB
+
+
+@pytest.mark.parametrize(
+    "size, expected",
+    [(1024, 1024), ("2GB", 2 * 10**9), ("512 MiB", 512 * 2**20), ("1.5kb", 1500), ("10", 10)],
+)
+def test_parse_size(size, expected):
+    assert parse_size(size) == expected
+
+
+@pytest.mark.parametrize("size", ["2 parsecs", "GB", -1])
+def test_parse_size_rejects_garbage(size):
+    with pytest.raises(ValueError):
+        parse_size(size)
+
+
+def test_nbytes_of_nested_results():
+    array = np.zeros((10, 10), dtype=np.float64)
+    assert nbytes_of(array) == 800
+    assert nbytes_of((array, [array, {"a": array}])) == 2400
+
+
+def test_budget_evicts_lowest_value_and_stored_results_first():
+    budget = CacheBudget(1000)
+    cheap = CachedResults("cheap", max_entries=2)
+    costly = CachedResults("costly", max_entries=2)
+    for cache in (cheap, costly):
+        budget.register(cache)
+    cheap.update(np.zeros(50), key=b"old", cost=0.001)  # 400 bytes, kept for a later lookup
+    cheap.update(np.zeros(50), key=b"new", cost=0.001)
+    costly.update(np.zeros(50), key=b"new", cost=10.0)
+    assert budget.nbytes == 1200
+    # mid-run: only the result kept for a later lookup can go
+    assert budget.enforce(include_current=False) == 400
+    assert b"old" not in cheap and cheap.result is not None
+    budget.limit = 500
+    budget.enforce()
+    assert cheap.result is None  # cheapest current result dropped
+    assert costly.result is not None
+    assert cheap.has_changed(None) is True  # dropped result must be recomputed
+
+
+def make_pipeline(counters, limit):
+    def scale(img, gain=1.0):
+        counters["scale"] += 1
+        return [img * gain]
+
+    def blur(img):
+        counters["blur"] += 1
+        return [(img + np.roll(img, 1, axis=0)) / 2]
+
+    filters = [
+        FilterCore(apply_fn=scale, inputs=[0], outputs=[1]),
+        FilterCore(apply_fn=blur, inputs=[1], outputs=[2]),
+    ]
+    pip = PipelineCore(
+        filters=filters,
+        inputs=[0],
+        outputs=[2],
+        cache="graph",
+        cache_max_entries=8,
+        cache_memory_limit=limit,
+    )
+    pip.inputs = [input_image]
+    return pip
+
+
+def test_pipeline_stays_within_budget():
+    counters = {"scale": 0, "blur": 0}
+    pip = make_pipeline(counters, limit="100kB")  # room for 2 results of 40 kB
+    for gain in [1.0, 2.0, 3.0, 4.0]:
+        pip.parameters = {"scale": {"gain": gain}}
+        res = pip.run()
+        assert np.allclose(res[2], input_image * gain)
+        assert pip.engine.cache_budget.nbytes <= 100_000
+
+
+def test_evicted_current_result_is_recomputed():
+    counters = {"scale": 0, "blur": 0}
+    pip = make_pipeline(counters, limit=50_000)  # a single 40 kB result fits
+    pip.run()
+    assert counters == {"scale": 1, "blur": 1}
+    res = pip.run()
+    assert np.allclose(res[2], input_image)
+    assert sum(counters.values()) == 3  # one of the two results was dropped and recomputed
+
+
+def _identity(img):
+    return img
+
+
+def _identity_pipeline(img):
+    out = _identity(img)
+    return out
+
+
+def test_decorator_forwards_cache_memory_limit():
+    pip = interactive_pipeline(gui=None, cache=True, cache_memory_limit="1GB")(_identity_pipeline)
+    assert pip.engine.cache_budget.limit == 10**9
@@ -0,0 +1,147 @@
+"""Tests for the command line batch runner (python -m interactive_pipe run).
+
+Covers:
+- outputs written for each input file, tuning file applied, summary printed
+- worker processes
+- inputs with the same name in different directories: directories mirrored under the output
+- errors: no input file, wrong target, pipelines the runner cannot feed
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from interactive_pipe.data_objects.image import Image
+from interactive_pipe.data_objects.parameters import Parameters
+from interactive_pipe.helper.cli import load_pipeline, main
+
+PIPELINE_MODULE = """
+from interactive_pipe import interactive
+
+
+@interactive(gain=(0.5, [0.0, 1.0]))
+def darken(img, gain=0.5):
+    return img * gain
+
+
+def invert(img):
+    return 1.0 - img
+
+
+def process(img):
+    dark = darken(img)
+    inverted = invert(dark)
+    return dark, inverted
+
+
+def blend(img, other):
+    return (img + other) / 2
+
+
+def two_inputs(img, other):
+    blended = blend(img, other)
+    return blended
+"""
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    (tmp_path / "pipelines.py").write_text(PIPELINE_MODULE)
+    raw = tmp_path / "raw"
+    raw.mkdir()
+    for index in range(3):
+        Image.save_image(np.full((4, 5, 3), 0.2 * (index + 1)), raw / f"frame_{index}.png")
+    return tmp_path
+
+
+def read(path):
+    return Image.load_image(path)
+
+
+def test_outputs_are_written(workspace, capsys):
+    Parameters({"darken": {"gain": 1.0}}).save(workspace / "tune.yaml")
+    code = main(
+        [
+            "run",
+            f"{workspace / 'pipelines.py'}:process",
+            "--inputs",
+            str(workspace / "raw" / "*.png"),
+            "--tuning",
+            str(workspace / "tune.yaml"),
+            "--out",
+            str(workspace / "out"),
+            "--batch-size",
+            "2",
+        ]
+    )
+    assert code == 0
+    written = sorted(path.name for path in (workspace / "out").iterdir())
+    assert written == [f"frame_{index}_{name}.png" for index in range(3) for name in ("dark", "inverted")]
+    assert np.allclose(read(workspace / "out" / "frame_1_dark.png"), 0.4, atol=1 / 255)  # gain 1 from the tuning
+    assert np.allclose(read(workspace / "out" / "frame_1_inverted.png"), 0.6, atol=1 / 255)
+    summary = capsys.readouterr().out
+    assert "3 images" in summary and "images/s" in summary and "MB/s" in summary
+    assert "darken" in summary and "invert" in summary
+
+
+def test_worker_processes(workspace):
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "interactive_pipe",
+            "run",
+            f"{workspace / 'pipelines.py'}:process",
+            "--inputs",
+            str(workspace / "raw" / "*.png"),
+            "--out",
+            str(workspace / "out"),
+            "--workers",
+            "2",
+            "--batch-size",
+            "1",
+        ],
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert result.returncode == 0, result.stderr
+    assert len(list((workspace / "out").iterdir())) == 6
+    assert np.allclose(read(workspace / "out" / "frame_2_dark.png"), 0.3, atol=1 / 255)
+
+
+def test_recursive_inputs_keep_their_directory(workspace):
+    for folder in ("day", "night"):
+        (workspace / "raw" / folder).mkdir()
+        Image.save_image(np.full((4, 5, 3), 0.4), workspace / "raw" / folder / "frame_0.png")
+    inputs = str(workspace / "raw" / "**" / "frame_0.png")
+    assert (
+        main(["run", f"{workspace / 'pipelines.py'}:process", "--inputs", inputs, "--out", str(workspace / "out")]) == 0
+    )
+    written = sorted(str(path.relative_to(workspace / "out")) for path in (workspace / "out").rglob("*.png"))
+    assert written == sorted(
+        str(Path(folder) / f"frame_0_{name}.png") for folder in ("", "day", "night") for name in ("dark", "inverted")
+    )
+    assert np.allclose(read(workspace / "out" / "frame_0_dark.png"), 0.1, atol=1 / 255)
+    assert np.allclose(read(workspace / "out" / "night" / "frame_0_dark.png"), 0.2, atol=1 / 255)
+
+
+def test_errors(workspace, capsys):
+    module = workspace / "pipelines.py"
+    assert main(["run", f"{module}:process", "--inputs", str(workspace / "*.jpg"), "--out", str(workspace)]) == 1
+    assert "no input file" in capsys.readouterr().err
+    inputs = str(workspace / "raw" / "*.png")
+    assert main(["run", f"{module}:two_inputs", "--inputs", inputs, "--out", str(workspace / "out")]) == 1
+    assert "takes 2 inputs" in capsys.readouterr().err
+    with pytest.raises(ValueError, match="has no attribute"):
+        load_pipeline(f"{module}:missing")
+    with pytest.raises(ValueError, match="module:function"):
+        load_pipeline("pipelines")
+    (workspace / "table.csv").write_text("a,b\n")
+    with pytest.raises(ValueError, match="not a python module"):
+        load_pipeline(f"{workspace / 'table.csv'}:process")
+    with pytest.raises(SystemExit):
+        main(["run", f"{module}:process", "--inputs", inputs, "--out", str(workspace), "--workers", "0"])
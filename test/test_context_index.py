@@ -0,0 +1,80 @@
+"""Tests for the inverted reader/writer indexes of ContextTracker.
+
+Covers:
+- readers_of, readers_of_keys, writers_of and reads_changed_keys agree with the per-filter registries
+- whole-context readers, readers_index view
+- feedback invalidation through the index in a pipeline
+"""
+
+import random
+
+import numpy as np
+import pytest
+
+from interactive_pipe.core.context import context
+from interactive_pipe.core.context_tracking import ContextTracker
+from interactive_pipe.core.filter import FilterCore
+from interactive_pipe.core.pipeline import PipelineCore
+
+
+def test_index_matches_registries():
+    rng = random.Random(0)
+    tracker = ContextTracker({f"key_{index}": index for index in range(20)})
+    for step in range(200):
+        tracker.begin_filter(f"filter_{rng.randrange(30)}")
+        key = f"key_{rng.randrange(25)}"
+        if rng.random() < 0.7:
+            tracker.get(key)
+        else:
+            tracker[key] = step
+        tracker.finish_filter()
+    for index in range(25):
+        key = f"key_{index}"
+        assert tracker.readers_of(key) == {name for name, keys in tracker._reads.items() if key in keys}
+        assert tracker.writers_of(key) == {name for name, keys in tracker._writes.items() if key in keys}
+        assert tracker.readers_index.get(key, set()) == tracker.readers_of(key)
+    changed = {"key_3", "key_7"}
+    for index in range(30):
+        name = f"filter_{index}"
+        assert tracker.reads_changed_keys(name, changed) == bool(tracker.reads_of(name)[0] & changed)
+    assert tracker.readers_of_keys(changed) == tracker.readers_of("key_3") | tracker.readers_of("key_7")
+    with pytest.raises(TypeError):
+        tracker.readers_index["key_0"] = {"intruder"}
+
+
+def test_whole_context_readers():
+    tracker = ContextTracker({"a": 1})
+    tracker.begin_filter("summary")
+    list(tracker.items())
+    tracker.finish_filter()
+    tracker.begin_filter("reader")
+    tracker["a"]
+    tracker.finish_filter()
+    assert tracker.readers_of("never_read") == {"summary"}
+    assert tracker.readers_of_keys(["a"]) == {"summary", "reader"}
+    assert "summary" not in tracker.readers_index.get("a", set())
+    assert tracker.reads_changed_keys("summary", {"never_read"})
+    assert not tracker.reads_changed_keys("reader", set())
+
+
+def test_feedback_invalidation_in_a_pipeline():
+    counters = {"early": 0, "late": 0}
+
+    def early(img):
+        counters["early"] += 1
+        return [img * context.get("gain", 1.0)]
+
+    def late(img, gain=1.0):
+        counters["late"] += 1
+        context["gain"] = gain
+        return [img]
+
+    filters = [FilterCore(apply_fn=early, inputs=[0], outputs=[1]), FilterCore(apply_fn=late, inputs=[1], outputs=[2])]
+    pip = PipelineCore(filters=filters, inputs=[0], outputs=[2], cache="graph")
+    pip.inputs = [np.ones((2, 2))]
+    pip.run()
+    pip.parameters = {"late": {"gain": 3.0}}
+    pip.run()
+    assert pip._user_context.readers_index["gain"] == {"early"}
+    assert np.allclose(pip.run()[2], 3.0)  # the earlier reader sees the fed back value
+    assert counters["early"] == 3  # gain created by the first run, changed by the second
@@ -0,0 +1,89 @@
+"""Tests for the propagation of control values to filters (update_parameters_from_controls).
+
+Covers:
+- values assigned to controls (key bindings, resets) reach their filter at the next run
+- only dirty controls are propagated, to their own filter
+- parameters set on the pipeline update the controls
+- a new pipeline pushes the current values of shared controls at its first run
+"""
+
+import numpy as np
+
+from interactive_pipe.core.filter import FilterCore
+from interactive_pipe.headless.control import Control
+from interactive_pipe.headless.keyboard import KeyboardControl
+from interactive_pipe.headless.pipeline import HeadlessPipeline
+from interactive_pipe.helper.filter_decorator import interactive
+
+
+def amplify(img, gain=1.0, offset=0.0):
+    return img * gain + offset
+
+
+def build_pipeline():
+    filters = [FilterCore(apply_fn=amplify, name=f"amplify_{idx}", inputs=[idx], outputs=[idx + 1]) for idx in range(3)]
+    pip = HeadlessPipeline(filters=filters, inputs=[0], outputs=[3])
+    pip.controls = [
+        Control(1.0, [0.0, 4.0], name=f"gain_{idx}", filter_to_connect=filt, parameter_name_to_connect="gain")
+        for idx, filt in enumerate(filters)
+    ]
+    pip.inputs = [np.ones((2, 2))]
+    return pip, filters
+
+
+def test_assigned_values_reach_the_filter():
+    pip, filters = build_pipeline()
+    pip.controls[1].value = 2.0  # like a key binding or a reset
+    assert pip.controls[1].dirty
+    res = pip.run()
+    assert np.allclose(res[0], 2.0)
+    assert filters[1].values["gain"] == 2.0
+    assert not any(ctrl.dirty for ctrl in pip.controls)
+    pip.controls[2].update(3.0)  # widgets push the value right away
+    assert filters[2].values["gain"] == 3.0 and not pip.controls[2].dirty
+    assert np.allclose(pip.run()[0], 6.0)
+
+
+def test_only_dirty_controls_are_propagated():
+    pip, filters = build_pipeline()
+    pip.run()
+    assigned = []
+    for filt in filters:
+        filt.dirty_sink = assigned_names = set()
+        assigned.append(assigned_names)
+    pip.controls[0].value = 0.5
+    pip.update_parameters_from_controls()
+    assert [len(names) for names in assigned] == [1, 0, 0]
+    pip.update_parameters_from_controls()
+    assert [len(names) for names in assigned] == [1, 0, 0]
+
+
+def test_parameters_update_the_controls():
+    pip, filters = build_pipeline()
+    pip.parameters = {"amplify_0": {"gain": 9.0, "offset": 1.0}}
+    assert pip.controls[0].value == 4.0  # clamped by the control range...
+    pip.run()
+    assert filters[0].values == {"gain": 4.0, "offset": 1.0}  # ...and pushed back to the filter
+
+
+@interactive(strength=KeyboardControl(1, [0, 5], keyup="u"))
+def sharpen(img, strength=1):
+    return img * strength
+
+
+def sharpening(img):
+    sharp = sharpen(img)
+    return sharp
+
+
+def test_new_pipelines_keep_moved_shared_controls():
+    first = HeadlessPipeline.from_function(sharpening)
+    first.controls[0].reset()
+    first.controls[0].on_key_up()
+    first.inputs = [np.ones(2)]
+    assert np.allclose(first.run()[0], 2.0)
+    second = HeadlessPipeline.from_function(sharpening)  # connecting marks the shared control dirty
+    second.inputs = [np.ones(2)]
+    assert second.controls[0].value == 2
+    assert np.allclose(second.run()[0], 2.0)
+    second.controls[0].reset()
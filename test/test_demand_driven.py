@@ -0,0 +1,146 @@
+"""Tests for demand-driven evaluation (demand_driven=True).
+
+Covers:
+- filters which do not feed the requested outputs are skipped (after a first full run)
+- showing an output again computes it from up-to-date upstream results
+- filters writing context keys read by needed filters still run
+- layout.grid() switching to other outputs during a run
+- sequential and thread executors, configuration errors
+"""
+
+import numpy as np
+import pytest
+
+from interactive_pipe.core.context import context, layout
+from interactive_pipe.core.filter import FilterCore
+from interactive_pipe.core.pipeline import PipelineCore
+
+input_image = np.arange(6, dtype=np.float64).reshape(2, 3)
+
+counters = {"prepare": 0, "develop": 0, "diagnose": 0, "measure": 0, "annotate": 0}
+
+
+def prepare(img, gain=1.0):
+    counters["prepare"] += 1
+    return [img * gain]
+
+
+def develop(img, offset=0.0):
+    counters["develop"] += 1
+    return [img + offset]
+
+
+def diagnose(img, bins=4):
+    counters["diagnose"] += 1
+    return [img * bins]
+
+
+def measure(img):
+    counters["measure"] += 1
+    context["mean"] = float(img.mean())
+    return [img.mean()]
+
+
+def annotate(img):
+    counters["annotate"] += 1
+    return [img - context["mean"]]
+
+
+@pytest.fixture(autouse=True)
+def reset_counters():
+    for name in counters:
+        counters[name] = 0
+
+
+def make_pipeline(outputs, executor="sequential"):
+    """input -> prepare -> develop (displayed) / diagnose (debug branch)."""
+    filters = [
+        FilterCore(apply_fn=prepare, inputs=[0], outputs=["prepared"]),
+        FilterCore(apply_fn=develop, inputs=["prepared"], outputs=["developed"]),
+        FilterCore(apply_fn=diagnose, inputs=["prepared"], outputs=["diagnosis"]),
+    ]
+    pip = PipelineCore(
+        filters=filters, inputs=[0], outputs=outputs, cache="graph", demand_driven=True, executor=executor
+    )
+    pip.inputs = [input_image]
+    return pip
+
+
+@pytest.mark.parametrize("executor", ["sequential", "threads"])
+def test_hidden_branch_is_skipped(executor):
+    pip = make_pipeline(["developed"], executor=executor)
+    pip.run()  # first run: every filter
+    assert counters == {"prepare": 1, "develop": 1, "diagnose": 1, "measure": 0, "annotate": 0}
+    pip.parameters = {"prepare": {"gain": 2.0}}
+    res = pip.run()
+    assert np.allclose(res["developed"], 2.0 * input_image)
+    assert "diagnosis" not in res
+    assert counters["diagnose"] == 1
+
+
+def test_shown_again_output_uses_up_to_date_upstream():
+    pip = make_pipeline(["developed"])
+    pip.run()
+    pip.parameters = {"prepare": {"gain": 2.0}}
+    pip.run()
+    pip.outputs = ["developed", "diagnosis"]
+    res = pip.run()
+    assert np.allclose(res["diagnosis"], 2.0 * input_image * 4)
+    assert counters == {"prepare": 2, "develop": 2, "diagnose": 2, "measure": 0, "annotate": 0}
+
+
+def test_parameter_changed_while_hidden():
+    pip = make_pipeline(["developed"])
+    pip.run()
+    pip.parameters = {"diagnose": {"bins": 8}}
+    pip.run()
+    assert counters["diagnose"] == 1
+    pip.outputs = ["diagnosis"]
+    res = pip.run()
+    assert np.allclose(res["diagnosis"], input_image * 8)
+    assert counters == {"prepare": 1, "develop": 1, "diagnose": 2, "measure": 0, "annotate": 0}
+
+
+def test_context_writers_of_needed_filters_run():
+    filters = [
+        FilterCore(apply_fn=measure, inputs=[0], outputs=["mean"]),
+        FilterCore(apply_fn=prepare, inputs=[0], outputs=["prepared"]),
+        FilterCore(apply_fn=annotate, inputs=["prepared"], outputs=["annotated"]),
+    ]
+    pip = PipelineCore(filters=filters, inputs=[0], outputs=["annotated"], cache="graph", demand_driven=True)
+    pip.inputs = [input_image]
+    pip.run()
+    pip.inputs = [input_image + 1]
+    res = pip.run()
+    assert counters["measure"] == 2
+    assert np.allclose(res["annotated"], input_image - input_image.mean())
+
+
+def choose_view(img, show_diagnosis=False):
+    layout.grid(["developed", "diagnosis"] if show_diagnosis else ["developed"])
+    return [img]
+
+
+def test_layout_grid_switching_outputs():
+    filters = [
+        FilterCore(apply_fn=prepare, inputs=[0], outputs=["prepared"]),
+        FilterCore(apply_fn=diagnose, inputs=["prepared"], outputs=["diagnosis"]),
+        FilterCore(apply_fn=choose_view, inputs=["prepared"], outputs=["view"]),
+        FilterCore(apply_fn=develop, inputs=["prepared"], outputs=["developed"]),
+    ]
+    pip = PipelineCore(filters=filters, inputs=[0], outputs=[["developed"]], cache="graph", demand_driven=True)
+    pip.inputs = [input_image]
+    pip.run()
+    pip.parameters = {"prepare": {"gain": 3.0}}
+    pip.run()
+    assert counters["diagnose"] == 1  # hidden
+    pip.parameters = {"choose_view": {"show_diagnosis": True}}
+    res = pip.run()  # choose_view runs (it arranges the grid) and requests the diagnosis
+    assert pip.outputs == [["developed", "diagnosis"]]
+    assert np.allclose(res["diagnosis"], 3.0 * input_image * 4)
+    assert counters["diagnose"] == 2
+
+
+def test_demand_driven_requires_a_graph_cache():
+    with pytest.raises(ValueError, match="demand_driven"):
+        PipelineCore(filters=[FilterCore(apply_fn=prepare, inputs=[0], outputs=[1])], cache=True, demand_driven=True)
@@ -0,0 +1,181 @@
+"""Tests for dirty-set propagation in cache="graph" mode.
+
+Covers:
+- after a first full run, only the filters whose parameters were assigned and what
+  they feed are checked
+- parameters assigned in place (pipeline.parameters, filter.values items) are seen too
+- results match a pipeline without cache on a branching graph
+- context keys written by a recomputed filter dirty their readers
+- new pipeline inputs, failing filters and forced recomputation
+"""
+
+import numpy as np
+import pytest
+
+from interactive_pipe.core.cache import CachedResults
+from interactive_pipe.core.context import context
+from interactive_pipe.core.filter import FilterCore
+from interactive_pipe.core.pipeline import PipelineCore
+
+input_image = np.arange(6, dtype=np.float64).reshape(2, 3)
+
+counters = {"step": 0, "checked": 0}
+
+
+def step(img, amount=1.0):
+    counters["step"] += 1
+    return [img + amount]
+
+
+def blend(img_a, img_b, ratio=0.5):
+    return [ratio * img_a + (1 - ratio) * img_b]
+
+
+def fragile(img, fail=False):
+    if fail:
+        raise ValueError("fragile filter failed")
+    return [img * 2]
+
+
+def measure(img, scale=1.0):
+    context["mean"] = float(img.mean()) * scale
+    return [img]
+
+
+def annotate(img):
+    return [img - context["mean"]]
+
+
+@pytest.fixture(autouse=True)
+def count_checks(monkeypatch):
+    counters["step"] = 0
+    counters["checked"] = 0
+    has_changed = CachedResults.has_changed
+
+    def counting_has_changed(self, new_params):
+        counters["checked"] += 1
+        return has_changed(self, new_params)
+
+    monkeypatch.setattr(CachedResults, "has_changed", counting_has_changed)
+
+
+def make_chain(num_steps=10, cache="graph"):
+    filters = [
+        FilterCore(apply_fn=step, name=f"step_{idx}", inputs=[idx], outputs=[idx + 1]) for idx in range(num_steps)
+    ]
+    pip = PipelineCore(filters=filters, inputs=[0], outputs=[num_steps], cache=cache)
+    pip.inputs = [input_image]
+    return pip
+
+
+def test_only_the_dirty_subgraph_is_checked():
+    pip = make_chain(10)
+    pip.run()  # first run of the plan: every filter
+    assert counters == {"step": 10, "checked": 10}
+    counters["checked"] = 0
+    pip.parameters = {"step_7": {"amount": 2.0}}
+    res = pip.run()
+    assert np.allclose(res[10], input_image + 11)
+    assert counters == {"step": 13, "checked": 3}  # step_7, step_8, step_9
+    assert set(res) == set(range(11))  # clean filters keep their outputs in the buffer
+    counters["checked"] = 0
+    pip.run()  # nothing changed
+    assert counters == {"step": 13, "checked": 0}
+
+
+def test_value_set_back_stops_the_propagation():
+    pip = make_chain(10)
+    pip.run()
+    pip.parameters = {"step_2": {"amount": 1.0}}  # same value
+    pip.run()
+    assert counters["step"] == 10
+
+
+def test_parameters_assigned_in_place_are_seen():
+    pip = make_chain(4)
+    pip.run()
+    pip.parameters["step_1"]["amount"] = 3.0  # the getter returns the live parameter dicts
+    res = pip.run()
+    assert np.allclose(res[4], input_image + 6)
+    pip.filters[3].values["amount"] = 0.0
+    res = pip.run()
+    assert np.allclose(res[4], input_image + 5)
+    assert counters["step"] == 8  # 4, then step_1 to step_3, then step_3
+
+
+def make_branches(cache):
+    filters = [
+        FilterCore(apply_fn=step, name="left", inputs=[0], outputs=["left"]),
+        FilterCore(apply_fn=step, name="right", inputs=[0], outputs=["right"]),
+        FilterCore(apply_fn=step, name="right_more", inputs=["right"], outputs=["right_more"]),
+        FilterCore(apply_fn=blend, inputs=["left", "right_more"], outputs=["blended"]),
+    ]
+    pip = PipelineCore(filters=filters, inputs=[0], outputs=["blended", "left"], cache=cache)
+    pip.inputs = [input_image]
+    return pip
+
+
+def test_results_match_an_uncached_pipeline():
+    reference, pip = make_branches(False), make_branches("graph")
+    changes = [
+        {"left": {"amount": 3.0}},
+        {"right_more": {"amount": -1.0}},
+        {"blend": {"ratio": 0.2}},
+        {"right": {"amount": 4.0}, "left": {"amount": 0.0}},
+        {"left": {"amount": 0.0}},
+    ]
+    for parameters in [{}] + changes:
+        for pipeline in (reference, pip):
+            pipeline.parameters = parameters
+        expected, res = reference.run(), pip.run()
+        assert np.allclose(res["blended"], expected["blended"])
+        assert np.allclose(res["left"], expected["left"])
+
+
+def test_context_writer_dirties_its_readers():
+    filters = [
+        FilterCore(apply_fn=measure, inputs=[0], outputs=["measured"]),
+        FilterCore(apply_fn=step, name="offset", inputs=[0], outputs=["offset"]),
+        FilterCore(apply_fn=annotate, inputs=["offset"], outputs=["annotated"]),
+    ]
+    pip = PipelineCore(filters=filters, inputs=[0], outputs=["annotated"], cache="graph")
+    pip.inputs = [input_image]
+    pip.run()
+    pip.parameters = {"measure": {"scale": 2.0}}
+    res = pip.run()
+    assert counters["step"] == 1  # offset untouched
+    assert np.allclose(res["annotated"], input_image + 1 - 2 * input_image.mean())
+
+
+def test_new_inputs_dirty_their_consumers():
+    pip = make_chain(4)
+    pip.run()
+    pip.inputs = [input_image * 2]
+    res = pip.run()
+    assert np.allclose(res[4], input_image * 2 + 4)
+    assert counters["step"] == 8
+
+
+def test_failed_filter_is_checked_again():
+    filters = [
+        FilterCore(apply_fn=step, inputs=[0], outputs=[1]),
+        FilterCore(apply_fn=fragile, inputs=[1], outputs=[2]),
+        FilterCore(apply_fn=step, name="last", inputs=[2], outputs=[3]),
+    ]
+    pip = PipelineCore(filters=filters, inputs=[0], outputs=[3], cache="graph")
+    pip.inputs = [input_image]
+    pip.run()
+    pip.parameters = {"fragile": {"fail": True}}
+    with pytest.raises(Exception, match="fragile filter failed"):
+        pip.run()
+    pip.parameters = {"fragile": {"fail": False}}
+    res = pip.run()
+    assert np.allclose(res[3], (input_image + 1) * 2 + 1)
+
+
+def test_forced_change_is_recomputed():
+    pip = make_chain(4)
+    pip.run()
+    pip.filters[2].cache_mem.force_change = True
+    pip.run()
+    assert counters["step"] == 5  # step_2, step_3 finds its stored result for the same input
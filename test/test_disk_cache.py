@@ -0,0 +1,237 @@
+"""Tests for the persistent disk tier of the filter caches (cache_dir).
+
+Covers:
+- storing/loading results (numpy arrays memory-mapped, read-only)
+- size limit with least recently used eviction, unreadable entries ignored
+- a new pipeline (restarted session) reuses the results of a previous one
+- keys follow parameters, input content, filter source code and context reads
+- results loaded from disk restore the context values their execution wrote
+- configuration through PipelineCore and the decorator
+"""
+
+import numpy as np
+import pytest
+
+from interactive_pipe.core.context import context
+from interactive_pipe.core.disk_cache import DiskCache
+from interactive_pipe.core.filter import FilterCore
+from interactive_pipe.core.pipeline import PipelineCore
+from interactive_pipe.helper.pipeline_decorator import interactive_pipeline
+
+input_image = np.arange(12, dtype=np.float32).reshape(3, 4)
+
+counters = {"gain": 0, "offset": 0, "reader": 0}
+
+
+def gain(img, amount=1.0):
+    counters["gain"] += 1
+    return [img * amount]
+
+
+def offset(img, shift=0.0):
+    counters["offset"] += 1
+    return [img + shift]
+
+
+def reader(img):
+    counters["reader"] += 1
+    return [img * context["factor"]]
+
+
+@pytest.fixture(autouse=True)
+def reset_counters():
+    for name in counters:
+        counters[name] = 0
+
+
+def make_pipeline(cache_dir, image=input_image, **kwargs):
+    filters = [
+        FilterCore(apply_fn=gain, inputs=[0], outputs=[1]),
+        FilterCore(apply_fn=offset, inputs=[1], outputs=[2]),
+    ]
+    pip = PipelineCore(filters=filters, inputs=[0], outputs=[2], cache="graph", cache_dir=cache_dir, **kwargs)
+    pip.inputs = [image]
+    return pip
+
+
+def test_results_roundtrip_memory_mapped(tmp_path):
+    disk = DiskCache(tmp_path, min_compute_time=0.0)
+    result = [input_image, 3, {"label": "text", "mask": input_image > 4}]
+    disk.put(b"key", result, cost=1.0)
+    disk.flush()
+    found, loaded, cost, _ = disk.get(b"key")
+    assert found and cost == 1.0
+    assert np.array_equal(loaded[0], input_image) and type(loaded[0]) is np.ndarray
+    assert not loaded[0].flags.writeable
+    assert loaded[1] == 3 and loaded[2]["label"] == "text"
+    assert np.array_equal(loaded[2]["mask"], input_image > 4)
+    assert disk.get(b"other")[0] is False
+
+
+def test_cheap_results_are_not_written(tmp_path):
+    disk = DiskCache(tmp_path, min_compute_time=0.5)
+    disk.put(b"key", [input_image], cost=0.01)
+    disk.flush()
+    assert b"key" not in disk
+
+
+def test_least_recently_used_entries_beyond_the_limit_are_removed(tmp_path):
+    disk = DiskCache(tmp_path, max_size=2500, min_compute_time=0.0)  # ~1 kB per entry
+    block = np.zeros(100, dtype=np.float64)
+    for key in (b"a", b"b"):
+        disk.put(key, [block], cost=1.0)
+        disk.flush()
+    assert disk.get(b"a")[0]  # "b" becomes the least recently used
+    disk.put(b"c", [block], cost=1.0)
+    disk.flush()
+    assert b"a" in disk and b"c" in disk and b"b" not in disk
+    assert disk.nbytes <= 2500
+    assert DiskCache(tmp_path).nbytes == disk.nbytes  # index rebuilt from the directory
+
+
+def test_unreadable_entry_is_ignored(tmp_path):
+    disk = DiskCache(tmp_path, min_compute_time=0.0)
+    disk.put(b"key", [input_image], cost=1.0)
+    disk.flush()
+    (disk._entry(b"key") / "0.npy").write_bytes(b"garbage")
+    assert disk.get(b"key")[0] is False
+    assert b"key" not in disk
+
+
+def test_restarted_pipeline_loads_results_from_disk(tmp_path):
+    disk = DiskCache(tmp_path, min_compute_time=0.0)
+    first = make_pipeline(disk)
+    first.parameters = {"gain": {"amount": 2.0}}
+    first.run()
+    first.engine.close()
+    assert counters == {"gain": 1, "offset": 1, "reader": 0}
+
+    second = make_pipeline(DiskCache(tmp_path, min_compute_time=0.0))  # new session
+    second.parameters = {"gain": {"amount": 2.0}}
+    res = second.run()
+    assert np.allclose(res[2], input_image * 2.0)
+    assert counters == {"gain": 1, "offset": 1, "reader": 0}
+    second.parameters = {"offset": {"shift": 1.0}}  # only the new setting is computed
+    res = second.run()
+    assert np.allclose(res[2], input_image * 2.0 + 1.0)
+    assert counters == {"gain": 1, "offset": 2, "reader": 0}
+
+
+def test_other_input_content_is_a_miss(tmp_path):
+    disk = DiskCache(tmp_path, min_compute_time=0.0)
+    make_pipeline(disk).run()
+    disk.flush()
+    res = make_pipeline(disk, image=input_image + 1).run()
+    assert np.allclose(res[2], input_image + 1)
+    assert counters["gain"] == 2
+    make_pipeline(disk, image=input_image.copy()).run()  # same content, other buffer
+    assert counters["gain"] == 2
+
+
+def gain_v2(img, amount=1.0):
+    counters["gain"] += 1
+    return [img * amount * 10]
+
+
+def test_edited_filter_source_is_a_miss(tmp_path):
+    disk = DiskCache(tmp_path, min_compute_time=0.0)
+    make_pipeline(disk).run()
+    disk.flush()
+    edited = PipelineCore(
+        filters=[FilterCore(apply_fn=gain_v2, name="gain", inputs=[0], outputs=[1])],
+        inputs=[0],
+        outputs=[1],
+        cache="graph",
+        cache_dir=disk,
+    )
+    edited.inputs = [input_image]
+    res = edited.run()
+    assert np.allclose(res[1], input_image * 10)
+    assert counters["gain"] == 2
+
+
+def test_context_reads_are_part_of_the_key(tmp_path):
+    disk = DiskCache(tmp_path, min_compute_time=0.0)
+
+    def make_reader_pipeline(factor):
+        pip = PipelineCore(
+            filters=[FilterCore(apply_fn=reader, inputs=[0], outputs=[1])],
+            inputs=[0],
+            outputs=[1],
+            cache="graph",
+            cache_dir=disk,
+            context={"factor": factor},
+        )
+        pip.inputs = [input_image]
+        return pip
+
+    make_reader_pipeline(1.0).run()
+    disk.flush()
+    pip = make_reader_pipeline(3.0)  # new session, other context value
+    res = pip.run()
+    assert np.allclose(res[1], input_image * 3.0)
+    assert counters["reader"] == 2
+    pip.update_user_context({"factor": 1.0})
+    res = pip.run()
+    assert np.allclose(res[1], input_image)
+    assert counters["reader"] == 2  # stored by the earlier session
+
+
+def test_context_writes_are_restored_from_disk(tmp_path):
+    runs = {"measure": 0, "normalize": 0}
+
+    def measure(img, gain=1.0):
+        runs["measure"] += 1
+        context["level"] = float(img.max()) * gain
+        return [img]
+
+    def normalize(img, scale=1.0):
+        runs["normalize"] += 1
+        return [img * scale / context["level"]]
+
+    def make_measure_pipeline(scale):
+        pip = PipelineCore(
+            filters=[
+                FilterCore(apply_fn=measure, inputs=[0], outputs=[1]),
+                FilterCore(apply_fn=normalize, inputs=[1], outputs=[2]),
+            ],
+            inputs=[0],
+            outputs=[2],
+            cache="graph",
+            cache_dir=DiskCache(tmp_path, min_compute_time=0.0),
+        )
+        pip.parameters = {"normalize": {"scale": scale}}
+        pip.inputs = [input_image]
+        return pip
+
+    first = make_measure_pipeline(1.0)
+    for gain in [2.0, 1.0]:  # a writer is persisted once its context reads are known
+        first.parameters = {"measure": {"gain": gain}}
+        first.run()
+    first.engine.close()
+    second = make_measure_pipeline(2.0)  # new session: measure is loaded, normalize computed
+    second.parameters = {"measure": {"gain": 1.0}}
+    res = second.run()
+    assert np.allclose(res[2], input_image * 2.0 / input_image.max())
+    assert runs == {"measure": 2, "normalize": 3}
+
+
+def test_cache_dir_requires_a_graph_cache(tmp_path):
+    with pytest.raises(ValueError, match="cache_dir"):
+        PipelineCore(filters=[FilterCore(apply_fn=gain, inputs=[0], outputs=[1])], cache=True, cache_dir=tmp_path)
+
+
+def _scale(img, amount=3.0):
+    return img * amount
+
+
+def _scale_pipeline(img):
+    scaled = _scale(img)
+    return scaled
+
+
+def test_decorator_forwards_cache_dir(tmp_path):
+    pip = interactive_pipeline(gui=None, cache="graph", cache_dir=tmp_path, cache_disk_limit="1MB")(_scale_pipeline)
+    assert pip.engine.disk_cache.path == tmp_path
+    assert pip.engine.disk_cache.max_size == 10**6
+    assert np.allclose(pip(input_image), 3.0 * input_image)
@@ -0,0 +1,154 @@
+"""Tests for PipelineCore.evaluate, the side-effect-free run API.
+
+Covers:
+- results follow the given inputs, parameters and context
+- the pipeline (parameters, caches, context, outputs) is left untouched
+- concurrent evaluations of one pipeline from several threads
+- results cached by previous runs are reused (graph cache), filters not feeding the
+  requested outputs are skipped
+- errors
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from interactive_pipe.core.context import context, layout
+from interactive_pipe.core.engine import FilterError
+from interactive_pipe.core.filter import FilterCore
+from interactive_pipe.core.pipeline import PipelineCore
+
+input_image = np.arange(6, dtype=np.float64).reshape(2, 3)
+
+counters = {"gain": 0, "offset": 0, "diagnose": 0}
+counters_lock = threading.Lock()
+
+
+def gain(img, amount=2.0):
+    with counters_lock:
+        counters["gain"] += 1
+    return [img * amount]
+
+
+def offset(img, shift=1.0):
+    with counters_lock:
+        counters["offset"] += 1
+    time.sleep(0.01)  # let concurrent evaluations overlap
+    return [img + shift + context.get("bias", 0.0)]
+
+
+def diagnose(img, bins=4):
+    counters["diagnose"] += 1
+    context["diagnosed"] = bins
+    layout.style("diagnosis", title=f"{bins} bins")
+    return [img * bins]
+
+
+def choose_view(img, show_diagnosis=False):
+    layout.grid(["shifted", "diagnosis"] if show_diagnosis else ["shifted"])
+    return [img]
+
+
+def fragile(img, fail=False):
+    if fail:
+        raise ValueError("fragile filter failed")
+    return [img]
+
+
+@pytest.fixture(autouse=True)
+def reset_counters():
+    for name in counters:
+        counters[name] = 0
+
+
+def make_pipeline(cache="graph"):
+    filters = [
+        FilterCore(apply_fn=gain, inputs=[0], outputs=["gained"]),
+        FilterCore(apply_fn=offset, inputs=["gained"], outputs=["shifted"]),
+        FilterCore(apply_fn=diagnose, inputs=[0], outputs=["diagnosis"]),
+    ]
+    pip = PipelineCore(filters=filters, inputs=[0], outputs=["shifted"], cache=cache, context={"bias": 0.0})
+    pip.inputs = [input_image]
+    return pip
+
+
+@pytest.mark.parametrize("cache", [False, True, "graph"])
+def test_evaluate_leaves_the_pipeline_untouched(cache):
+    pip = make_pipeline(cache)
+    reference = pip.run()
+    res = pip.evaluate([input_image + 1], parameters={"gain": {"amount": 3.0}}, context={"bias": 10.0})
+    assert np.allclose(res["shifted"], (input_image + 1) * 3.0 + 1.0 + 10.0)
+    assert pip.parameters["gain"] == {"amount": 2.0}
+    assert pip._user_context == {"bias": 0.0, "diagnosed": 4}
+    assert pip.outputs == ["shifted"]
+    assert pip.inputs[0] is input_image
+    assert np.allclose(pip.run()["shifted"], reference["shifted"])
+
+
+def test_evaluate_uses_the_current_inputs_by_default():
+    pip = make_pipeline()
+    res = pip.evaluate(parameters={"offset": {"shift": 0.0}})
+    assert np.allclose(res["shifted"], input_image * 2.0)
+
+
+def test_concurrent_evaluations():
+    pip = make_pipeline()
+    pip.run()
+    amounts = [float(amount) for amount in range(16)]
+
+    def evaluate(amount):
+        res = pip.evaluate(parameters={"gain": {"amount": amount}}, context={"bias": amount})
+        return res["shifted"]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(evaluate, amounts))
+    for amount, shifted in zip(amounts, results):
+        assert np.allclose(shifted, input_image * amount + 1.0 + amount)
+    assert pip.parameters["gain"] == {"amount": 2.0}
+
+
+def test_cached_results_are_reused():
+    pip = make_pipeline()
+    pip.run()
+    assert counters == {"gain": 1, "offset": 1, "diagnose": 1}
+    res = pip.evaluate(parameters={"offset": {"shift": 5.0}}, outputs=["shifted"])
+    assert np.allclose(res["shifted"], input_image * 2.0 + 5.0)
+    # gain served from its cache, diagnose not needed
+    assert counters == {"gain": 1, "offset": 2, "diagnose": 1}
+    res = pip.evaluate(context={"bias": 1.0})  # offset reads the bias: recomputed
+    assert np.allclose(res["shifted"], input_image * 2.0 + 2.0)
+    assert counters == {"gain": 1, "offset": 3, "diagnose": 1}
+    pip.evaluate([input_image + 1])
+    assert counters == {"gain": 2, "offset": 4, "diagnose": 1}
+    pip.run()  # nothing was stored or invalidated
+    assert counters == {"gain": 2, "offset": 4, "diagnose": 1}
+
+
+def test_context_and_layout_writes_stay_private():
+    pip = make_pipeline()
+    pip.run()
+    res = pip.evaluate(parameters={"diagnose": {"bins": 8}}, outputs=["shifted", "diagnosis"])
+    assert np.allclose(res["diagnosis"], input_image * 8)
+    assert pip._user_context["diagnosed"] == 4
+    assert pip.framework_state.output_styles["diagnosis"] == {"title": "4 bins"}
+    pip.filters.append(FilterCore(apply_fn=choose_view, inputs=[0], outputs=["view"]))
+    pip.evaluate(parameters={"choose_view": {"show_diagnosis": True}})
+    assert pip.outputs == ["shifted"]
+
+
+def test_unknown_filter_is_rejected():
+    pip = make_pipeline()
+    with pytest.raises(ValueError, match="does not exist"):
+        pip.evaluate(parameters={"unknown": {"amount": 1.0}})
+
+
+def test_filter_errors():
+    filters = [FilterCore(apply_fn=fragile, inputs=[0], outputs=[1])]
+    pip = PipelineCore(filters=filters, inputs=[0], outputs=[1], cache="graph")
+    pip.inputs = [input_image]
+    with pytest.raises(FilterError, match="fragile filter failed"):
+        pip.evaluate(parameters={"fragile": {"fail": True}})
+    assert np.allclose(pip.evaluate()[1], input_image)
@@ -0,0 +1,100 @@
+"""Tests for event-targeted invalidation (key-bound events with cache="graph").
+
+Covers:
+- a key press only recomputes the filters reading the event and what they feed
+- the run after the press recomputes them with the event reset
+- other cache modes still reset every cache
+- event reads of filters running in worker processes
+"""
+
+import numpy as np
+import pytest
+
+from interactive_pipe.core.context import events
+from interactive_pipe.core.context_tracking import ContextTracker
+from interactive_pipe.graphical.gui import InteractivePipeGUI
+from interactive_pipe.headless.pipeline import HeadlessPipeline
+
+counters = {"expensive": 0, "boost": 0, "finish": 0}
+observed = []
+
+
+def expensive(img):
+    counters["expensive"] += 1
+    return img + 1.0
+
+
+def boost(img):
+    counters["boost"] += 1
+    observed.append(events.get("boost"))
+    return img * (2.0 if events.get("boost") else 1.0)
+
+
+def finish(img):
+    counters["finish"] += 1
+    return img - 1.0
+
+
+def processing(img):
+    base = expensive(img)
+    boosted = boost(base)
+    out = finish(boosted)
+    return out
+
+
+class HeadlessGUI(InteractivePipeGUI):
+    def init_app(self):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def reset_counters():
+    for name in counters:
+        counters[name] = 0
+    observed.clear()
+
+
+def build(cache="graph", **kwargs):
+    pipeline = HeadlessPipeline.from_function(processing, cache=cache, **kwargs)
+    pipeline.inputs = [np.ones((2, 2))]
+    gui = HeadlessGUI(pipeline=pipeline)
+    gui.bind_key_to_context("b", "boost", "boost the image")
+    return gui
+
+
+def test_key_press_recomputes_event_readers_only():
+    gui = build()
+    gui.pipeline.run()
+    assert counters == {"expensive": 1, "boost": 1, "finish": 1}
+    results = []
+    gui.on_press("b", refresh_func=lambda: results.append(gui.pipeline.run()))
+    assert counters == {"expensive": 1, "boost": 2, "finish": 2}
+    assert observed == [False, True]
+    assert np.allclose(results[0][0], 3.0)
+    gui.pipeline.run()  # the event was reset after the press
+    assert counters == {"expensive": 1, "boost": 3, "finish": 3}
+    assert observed == [False, True, False]
+    gui.pipeline.run()
+    assert counters == {"expensive": 1, "boost": 3, "finish": 3}
+    gui.on_press("x", refresh_func=gui.pipeline.run)  # unbound key: nothing to recompute
+    assert counters == {"expensive": 1, "boost": 3, "finish": 3}
+    assert isinstance(gui.pipeline.framework_state.events, ContextTracker)
+    assert gui.pipeline.framework_state.events.readers_of("boost") == {"boost"}
+
+
+def test_other_cache_modes_reset_every_cache():
+    gui = build(cache=True)
+    gui.pipeline.run()
+    gui.on_press("b", refresh_func=gui.pipeline.run)
+    assert counters == {"expensive": 2, "boost": 2, "finish": 2}
+    assert observed == [False, True]
+
+
+def test_event_reads_in_worker_processes():
+    gui = build(executor="processes", max_workers=1)
+    try:
+        gui.pipeline.run()
+        gui.on_press("b", refresh_func=gui.pipeline.run)
+        assert gui.pipeline.framework_state.events.readers_of("boost") == {"boost"}
+    finally:
+        gui.pipeline.engine.close()
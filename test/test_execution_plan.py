@@ -0,0 +1,93 @@
+"""Tests for the execution plan compiled once per filter list (PipelineEngine.compile).
+
+Covers:
+- runs reuse the same plan while the topology is unchanged (parameters may change)
+- changing the filters, their routing or their implementation compiles a new plan
+- results follow the new routing
+- unknown parameters are still rejected
+"""
+
+import numpy as np
+import pytest
+
+from interactive_pipe.core.filter import FilterCore
+from interactive_pipe.core.pipeline import PipelineCore
+
+input_image = np.arange(6, dtype=np.float64).reshape(2, 3)
+
+
+def gain(img, amount=2.0):
+    return [img * amount]
+
+
+def offset(img, shift=1.0):
+    return [img + shift]
+
+
+def negate(img):
+    return [-img]
+
+
+def subtract(img, shift=1.0):
+    return [img - shift]
+
+
+def make_pipeline(cache=False):
+    filters = [
+        FilterCore(apply_fn=gain, inputs=[0], outputs=[1]),
+        FilterCore(apply_fn=offset, inputs=[1], outputs=[2]),
+    ]
+    pip = PipelineCore(filters=filters, inputs=[0], outputs=[2], cache=cache)
+    pip.inputs = [input_image]
+    return pip
+
+
+@pytest.mark.parametrize("cache", [False, True, "graph"])
+def test_plan_is_reused_across_runs(cache):
+    pip = make_pipeline(cache)
+    pip.run()
+    plan = pip.engine._plan
+    pip.parameters = {"gain": {"amount": 3.0}}
+    res = pip.run()
+    assert pip.engine._plan is plan
+    assert np.allclose(res[2], input_image * 3.0 + 1.0)
+
+
+def test_new_routing_compiles_a_new_plan():
+    pip = make_pipeline()
+    pip.run()
+    plan = pip.engine._plan
+    pip.filters[1].inputs = [0]  # offset now reads the pipeline input
+    res = pip.run()
+    assert pip.engine._plan is not plan
+    assert pip.engine._plan.producers == [[None], [None]]
+    assert np.allclose(res[2], input_image + 1.0)
+
+
+def test_new_filter_list_compiles_a_new_plan():
+    pip = make_pipeline()
+    pip.run()
+    plan = pip.engine._plan
+    pip.filters.append(FilterCore(apply_fn=negate, inputs=[2], outputs=[3]))
+    pip.outputs = [3]
+    res = pip.run()
+    assert pip.engine._plan is not plan
+    assert np.allclose(res[3], -(input_image * 2.0 + 1.0))
+
+
+def test_new_implementation_compiles_a_new_plan():
+    pip = make_pipeline("graph")
+    pip.run()
+    plan = pip.engine._plan
+    pip.filters[1].apply = subtract
+    pip.filters[1].reset_cache()
+    res = pip.run()
+    assert pip.engine._plan is not plan
+    assert np.allclose(res[2], input_image * 2.0 - 1.0)
+
+
+def test_unknown_parameter_is_rejected():
+    pip = make_pipeline()
+    pip.filters[0].values = {"unknown": 1}
+    with pytest.raises(Exception, match="unknown not in"):  # FilterError wrapping the ValueError
+        pip.run()
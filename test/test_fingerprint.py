@@ -0,0 +1,119 @@
+"""Tests for content fingerprints (interactive_pipe.core.fingerprint).
+
+Covers:
+- equal content gives equal fingerprints, in-place changes are detected
+- chunked hashing of large buffers, non-contiguous arrays, object arrays
+- arrays held by containers and data objects are hashed, not serialized
+- the __ip_fingerprint__ protocol, values which cannot be fingerprinted
+"""
+
+import threading
+
+import numpy as np
+import pytest
+
+import interactive_pipe.core.fingerprint as fingerprint_module
+from interactive_pipe.core.fingerprint import _fingerprint
+from interactive_pipe.data_objects.curves import Curve, SingleCurve
+
+
+def test_equal_content_equal_fingerprints():
+    array = np.arange(24, dtype=np.float32).reshape(2, 3, 4)
+    assert _fingerprint(array) == _fingerprint(array.copy())
+    assert _fingerprint(array) != _fingerprint(array.astype(np.float64))
+    assert _fingerprint(array) != _fingerprint(array.reshape(4, 3, 2))
+    previous = _fingerprint(array)
+    array[1, 2, 3] += 1
+    assert _fingerprint(array) != previous
+    assert _fingerprint(True) != _fingerprint(1)
+
+
+@pytest.mark.parametrize("chunk_bytes", [7, 64, 2**20])
+def test_chunked_and_non_contiguous_arrays(monkeypatch, chunk_bytes):
+    monkeypatch.setattr(fingerprint_module, "_CHUNK_BYTES", chunk_bytes)
+    array = np.random.default_rng(0).random((16, 9, 3))
+    for view in (array, array.T, array.transpose(1, 0, 2), array[2:-3, ::2]):
+        assert _fingerprint(view) == _fingerprint(np.ascontiguousarray(view))
+        changed = np.array(view, order="C")
+        changed[(-1,) * changed.ndim] += 1
+        assert _fingerprint(view) != _fingerprint(changed)
+    assert _fingerprint(array[:, :0]) == _fingerprint(np.empty((16, 0, 3)))
+
+
+def test_chunks_are_hashed_on_threads(monkeypatch):
+    monkeypatch.setattr(fingerprint_module, "_CHUNK_BYTES", 64)
+    monkeypatch.setattr(fingerprint_module.os, "cpu_count", lambda: 4)
+    monkeypatch.setattr(fingerprint_module, "_pool", None)
+    threads = set()
+    hash_bytes = fingerprint_module._hash_bytes
+
+    def recording_hash(buffer):
+        threads.add(threading.current_thread().name)
+        return hash_bytes(buffer)
+
+    array = np.arange(1000, dtype=np.float64)
+    sequential = _fingerprint(array)
+    monkeypatch.setattr(fingerprint_module, "_hash_bytes", recording_hash)
+    assert _fingerprint(array) == sequential
+    assert any(name.startswith("interactive_pipe-hash") for name in threads)
+    fingerprint_module._pool.shutdown()
+
+
+def test_object_arrays_hash_their_objects():
+    assert _fingerprint(np.array([[1], "a"], dtype=object)) == _fingerprint(np.array([[1], "a"], dtype=object))
+    assert _fingerprint(np.array([[1], "a"], dtype=object)) != _fingerprint(np.array([[2], "a"], dtype=object))
+
+
+def test_containers_and_data_objects():
+    array = np.zeros((64, 64))
+    dict_value = {"image": array, "gain": 2.0}
+    previous = _fingerprint(dict_value)
+    assert previous == _fingerprint({"image": array.copy(), "gain": 2.0})
+    array[3, 4] = 1.0
+    assert _fingerprint(dict_value) != previous
+
+    x = np.linspace(0, 1, 50)
+    curve = Curve([SingleCurve(x, x**2)], title="square")
+    assert _fingerprint(curve) == _fingerprint(Curve([SingleCurve(x.copy(), x**2)], title="square"))
+    assert _fingerprint(curve) != _fingerprint(Curve([SingleCurve(x, x**3)], title="square"))
+
+
+class Versioned:
+    def __init__(self, version):
+        self.version = version
+        self.handle = threading.Lock()  # cannot be pickled
+
+    def __ip_fingerprint__(self):
+        return self.version
+
+
+class Broken:
+    def __ip_fingerprint__(self):
+        return threading.Lock()
+
+
+def test_fingerprint_protocol():
+    assert _fingerprint(Versioned(1)) == _fingerprint(Versioned(1))
+    assert _fingerprint(Versioned(1)) != _fingerprint(Versioned(2))
+    assert _fingerprint([Versioned(1), np.ones(3)]) == _fingerprint([Versioned(1), np.ones(3)])
+    assert _fingerprint(Versioned) == _fingerprint(Versioned)  # the class itself is pickled by name
+
+
+def test_unfingerprintable_values():
+    for value in (threading.Lock(), {"lock": threading.Lock()}, Broken(), [Broken()]):
+        fingerprint = _fingerprint(value)
+        assert type(fingerprint) is object
+        assert fingerprint != _fingerprint(value)
+
+
+def test_torch_tensors():
+    torch = pytest.importorskip("torch")
+    tensor = torch.arange(12, dtype=torch.float32).reshape(3, 4)
+    assert _fingerprint(tensor) == _fingerprint(tensor.clone())
+    assert _fingerprint(tensor.T) == _fingerprint(tensor.T.contiguous())
+    assert _fingerprint(tensor) != _fingerprint(tensor.double())
+    assert _fingerprint(tensor.bfloat16()) == _fingerprint(tensor.bfloat16())
+    previous = _fingerprint(tensor)
+    tensor[1, 1] = -1
+    assert _fingerprint(tensor) != previous
+    assert _fingerprint({"weights": tensor.requires_grad_()}) == _fingerprint({"weights": tensor.detach().clone()})
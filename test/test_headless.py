@@ -75,11 +75,11 @@ def test_headless_pipeline_single_input(routing_indexes):
     pip.run()
     assert not filt1.cache_mem.state_change.update_needed
     assert not filt2.cache_mem.state_change.update_needed
-    # Setting new inputs means cache will be cleared.
-    pip.inputs = (input_image,)
+    # Setting the same input content again keeps the cache.
+    pip.inputs = (input_image.copy(),)
     pip.run()
-    assert filt1.cache_mem.state_change.update_needed
-    assert filt2.cache_mem.state_change.update_needed
+    assert not filt1.cache_mem.state_change.update_needed
+    assert not filt2.cache_mem.state_change.update_needed
     pip.run()
     assert not filt1.cache_mem.state_change.update_needed
     assert not filt2.cache_mem.state_change.update_needed
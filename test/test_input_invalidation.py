@@ -0,0 +1,144 @@
+"""Tests for input-granular cache invalidation (PipelineCore.inputs).
+
+Covers:
+- assigning the same input content again keeps every cache
+- only filters fed (directly or transitively) by a changed input slot are recomputed
+- with cache=True, every filter after the first one fed by a changed input, including
+  the ones it only reaches through the context
+- going back to a previous input is a lookup with multi-entry caches
+- calling a HeadlessPipeline twice with the same image recomputes nothing
+"""
+
+import numpy as np
+import pytest
+
+from interactive_pipe.core.context import context
+from interactive_pipe.core.filter import FilterCore
+from interactive_pipe.core.pipeline import PipelineCore
+from interactive_pipe.helper.pipeline_decorator import interactive_pipeline
+
+image_a = np.arange(6, dtype=np.float64).reshape(2, 3)
+image_b = np.ones((2, 3))
+image_c = np.full((2, 3), 2.0)
+
+counters = {"scale_a": 0, "scale_b": 0, "scale_c": 0, "merge": 0}
+
+
+def make_scale(name):
+    def apply(img, gain=1.0):
+        counters[name] += 1
+        return [img * gain]
+
+    apply.__name__ = name
+    return apply
+
+
+def merge(img_a, img_b):
+    counters["merge"] += 1
+    return [img_a + img_b]
+
+
+@pytest.fixture(autouse=True)
+def reset_counters():
+    for name in counters:
+        counters[name] = 0
+
+
+def make_pipeline(cache, cache_max_entries=None):
+    """Three inputs: a -> scale_a, b -> scale_b, c -> scale_c; merge(scale_a, scale_b)."""
+    filters = [
+        FilterCore(apply_fn=make_scale("scale_a"), inputs=[0], outputs=[3]),
+        FilterCore(apply_fn=make_scale("scale_b"), inputs=[1], outputs=[4]),
+        FilterCore(apply_fn=merge, inputs=[3, 4], outputs=[5]),
+        FilterCore(apply_fn=make_scale("scale_c"), inputs=[2], outputs=[6]),
+    ]
+    pip = PipelineCore(
+        filters=filters, inputs=[0, 1, 2], outputs=[5, 6], cache=cache, cache_max_entries=cache_max_entries
+    )
+    pip.inputs = [image_a, image_b, image_c]
+    return pip
+
+
+@pytest.mark.parametrize("cache", [True, "graph"])
+def test_same_input_content_keeps_the_cache(cache):
+    pip = make_pipeline(cache)
+    pip.run()
+    pip.inputs = [image_a.copy(), image_b.copy(), image_c.copy()]
+    res = pip.run()
+    assert counters == {"scale_a": 1, "scale_b": 1, "scale_c": 1, "merge": 1}
+    assert np.allclose(res[5], image_a + image_b)
+
+
+@pytest.mark.parametrize("cache", [True, "graph"])
+def test_only_dependents_of_a_changed_input_are_recomputed(cache):
+    pip = make_pipeline(cache)
+    pip.run()
+    pip.inputs = [image_a, 3 * image_b, image_c]
+    res = pip.run()
+    assert np.allclose(res[5], image_a + 3 * image_b)
+    assert np.allclose(res[6], image_c)
+    # cache=True: scale_c comes after scale_b, it may read what scale_b wrote to the context
+    scale_c_runs = 2 if cache is True else 1
+    assert counters == {"scale_a": 1, "scale_b": 2, "scale_c": scale_c_runs, "merge": 2}
+
+
+def probe(img):
+    context["mean"] = float(img.mean())
+    return [img]
+
+
+def shade(img):
+    return [img * context["mean"]]
+
+
+@pytest.mark.parametrize("cache", [True, "graph"])
+@pytest.mark.parametrize("cache_max_entries", [None, 4])
+def test_input_reaching_a_filter_through_the_context(cache, cache_max_entries):
+    filters = [
+        FilterCore(apply_fn=probe, inputs=[0], outputs=[2]),
+        FilterCore(apply_fn=shade, inputs=[1], outputs=[3]),
+    ]
+    pip = PipelineCore(filters=filters, inputs=[0, 1], outputs=[3], cache=cache, cache_max_entries=cache_max_entries)
+    means = []
+    for value in [1.0, 2.0, 3.0]:
+        pip.inputs = [np.full((2, 3), value), image_b]
+        means.append(pip.run()[3][0, 0])
+    assert means == [1.0, 2.0, 3.0]
+
+
+def test_going_back_to_a_previous_input_is_a_lookup():
+    pip = make_pipeline("graph", cache_max_entries=2)
+    pip.run()
+    pip.inputs = [image_a, 3 * image_b, image_c]
+    pip.run()
+    pip.inputs = [image_a, image_b, image_c]
+    res = pip.run()
+    assert np.allclose(res[5], image_a + image_b)
+    assert counters == {"scale_a": 1, "scale_b": 2, "scale_c": 1, "merge": 2}
+
+
+def test_without_cache_every_run_recomputes():
+    pip = make_pipeline(False)
+    pip.run()
+    pip.inputs = [image_a, image_b, image_c]
+    pip.run()
+    assert counters == {"scale_a": 2, "scale_b": 2, "scale_c": 2, "merge": 2}
+
+
+def _double(img):
+    counters["scale_a"] += 1
+    return 2 * img
+
+
+def _double_pipeline(img):
+    doubled = _double(img)
+    return doubled
+
+
+def test_calling_a_headless_pipeline_twice_with_the_same_image():
+    pip = interactive_pipeline(gui=None, cache="graph")(_double_pipeline)
+    assert np.allclose(pip(image_a), 2 * image_a)
+    assert np.allclose(pip(image_a), 2 * image_a)
+    assert counters["scale_a"] == 1
+    assert np.allclose(pip(image_b), 2 * image_b)
+    assert counters["scale_a"] == 2
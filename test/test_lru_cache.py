@@ -0,0 +1,205 @@
+"""Tests for multi-entry (LRU) filter caches (cache_max_entries).
+
+Covers:
+- going back to a recently seen setting is a lookup, for both cache=True and cache="graph"
+- downstream filters reuse their stored results when upstream comes back to a known result
+- the least recently used result is evicted beyond max_entries
+- stored results keyed by the context keys they read (graph mode)
+- reused results replay the context writes of their execution
+- configuration through FilterCore, PipelineCore and the decorators
+"""
+
+import numpy as np
+import pytest
+
+from interactive_pipe.core.context import context
+from interactive_pipe.core.filter import FilterCore
+from interactive_pipe.core.pipeline import PipelineCore
+from interactive_pipe.helper.filter_decorator import interactive
+from interactive_pipe.helper.pipeline_decorator import interactive_pipeline
+
+input_image = np.array([[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]])
+
+
+def make_chain_pipeline(counters, cache, executor="sequential", cache_max_entries=4):
+    """Chain: input 0 -> gain (1) -> offset (2), plus an independent branch (3)."""
+
+    def gain(img, amount=1.0):
+        counters["gain"] += 1
+        return [img * amount]
+
+    def offset(img, shift=0.0):
+        counters["offset"] += 1
+        return [img + shift]
+
+    def side(img, scale=1.0):
+        counters["side"] += 1
+        return [img * scale]
+
+    filters = [
+        FilterCore(apply_fn=gain, inputs=[0], outputs=[1]),
+        FilterCore(apply_fn=offset, inputs=[1], outputs=[2]),
+        FilterCore(apply_fn=side, inputs=[0], outputs=[3]),
+    ]
+    pip = PipelineCore(
+        filters=filters,
+        inputs=[0],
+        outputs=[2, 3],
+        cache=cache,
+        executor=executor,
+        cache_max_entries=cache_max_entries,
+    )
+    pip.inputs = [input_image]
+    return pip
+
+
+@pytest.mark.parametrize("cache", [True, "graph"])
+@pytest.mark.parametrize("executor", ["sequential", "threads"])
+def test_ab_toggle_is_a_lookup(cache, executor):
+    counters = {"gain": 0, "offset": 0, "side": 0}
+    pip = make_chain_pipeline(counters, cache=cache, executor=executor)
+    pip.parameters = {"gain": {"amount": 1.0}}
+    pip.run()
+    pip.parameters = {"gain": {"amount": 2.0}}
+    pip.run()
+    computed = dict(counters)
+    for amount in [1.0, 2.0, 1.0, 2.0]:
+        pip.parameters = {"gain": {"amount": amount}}
+        res = pip.run()
+        assert np.allclose(res[2], input_image * amount)
+    assert counters == computed  # every run served from stored results
+
+
+def test_downstream_change_then_back_reuses_results():
+    counters = {"gain": 0, "offset": 0, "side": 0}
+    pip = make_chain_pipeline(counters, cache="graph")
+    for shift in [0.0, 1.0, 2.0]:
+        pip.parameters = {"offset": {"shift": shift}}
+        pip.run()
+    assert counters == {"gain": 1, "offset": 3, "side": 1}
+    pip.parameters = {"offset": {"shift": 1.0}}
+    res = pip.run()
+    assert np.allclose(res[2], input_image + 1.0)
+    assert counters == {"gain": 1, "offset": 3, "side": 1}
+
+
+def test_least_recently_used_result_is_evicted():
+    counters = {"gain": 0, "offset": 0, "side": 0}
+    pip = make_chain_pipeline(counters, cache="graph", cache_max_entries=2)
+    for amount in [1.0, 2.0, 3.0]:  # 1.0 evicted when 3.0 is stored
+        pip.parameters = {"gain": {"amount": amount}}
+        pip.run()
+    assert counters["gain"] == 3
+    pip.parameters = {"gain": {"amount": 2.0}}
+    pip.run()
+    assert counters["gain"] == 3
+    pip.parameters = {"gain": {"amount": 1.0}}
+    pip.run()
+    assert counters["gain"] == 4
+
+
+def test_single_entry_default_keeps_previous_behavior():
+    counters = {"gain": 0, "offset": 0, "side": 0}
+    pip = make_chain_pipeline(counters, cache=True, cache_max_entries=None)
+    for amount in [1.0, 2.0, 1.0]:
+        pip.parameters = {"gain": {"amount": amount}}
+        pip.run()
+    assert counters == {"gain": 3, "offset": 3, "side": 3}
+
+
+def test_stored_results_are_keyed_by_context_reads():
+    counters = {"reader": 0}
+
+    def reader(img):
+        counters["reader"] += 1
+        return [img * context["factor"]]
+
+    pip = PipelineCore(
+        filters=[FilterCore(apply_fn=reader, inputs=[0], outputs=[1])],
+        inputs=[0],
+        outputs=[1],
+        cache="graph",
+        cache_max_entries=4,
+        context={"factor": 1.0},
+    )
+    pip.inputs = [input_image]
+    for factor, expected_count in [(1.0, 1), (2.0, 2), (1.0, 2), (3.0, 3), (2.0, 3)]:
+        pip.update_user_context({"factor": factor})
+        res = pip.run()
+        assert np.allclose(res[1], input_image * factor)
+        assert counters["reader"] == expected_count
+
+
+@pytest.mark.parametrize("cache", [True, "graph"])
+@pytest.mark.parametrize("executor", ["sequential", "threads"])
+def test_reused_results_replay_their_context_writes(cache, executor):
+    counters = {"measure": 0, "normalize": 0}
+
+    def measure(img, gain=1.0):
+        counters["measure"] += 1
+        context["level"] = 1.0 / gain
+        return [img]
+
+    def normalize(img):
+        counters["normalize"] += 1
+        return [img * context["level"]]
+
+    pip = PipelineCore(
+        filters=[
+            FilterCore(apply_fn=measure, inputs=[0], outputs=[1]),
+            FilterCore(apply_fn=normalize, inputs=[1], outputs=[2]),
+        ],
+        inputs=[0],
+        outputs=[2],
+        cache=cache,
+        executor=executor,
+        cache_max_entries=4,
+    )
+    pip.inputs = [input_image]
+    levels = []
+    for gain in [1.0, 2.0, 1.0]:
+        pip.parameters = {"measure": {"gain": gain}}
+        levels.append(pip.run()[2][0, 0])
+    assert levels == [1.0, 0.5, 1.0]  # like cache=False
+    assert counters == {"measure": 2, "normalize": 2}  # going back is a lookup for both
+    assert pip._user_context["level"] == 1.0
+    # an evaluation reusing a stored result (cache="graph") sees its writes as well
+    assert np.allclose(pip.evaluate(parameters={"measure": {"gain": 2.0}})[2], input_image * 0.5)
+    runs = 2 if cache == "graph" else 3
+    assert counters == {"measure": runs, "normalize": runs}
+
+
+def test_filter_setting_overrides_pipeline_default():
+    def identity(img):
+        return [img]
+
+    own = FilterCore(apply_fn=identity, name="own", inputs=[0], outputs=[1], cache_max_entries=8)
+    default = FilterCore(apply_fn=identity, name="default", inputs=[0], outputs=[2])
+    pip = PipelineCore(filters=[own, default], inputs=[0], outputs=[1, 2], cache=True, cache_max_entries=3)
+    assert own.cache_mem.max_entries == 8
+    assert default.cache_mem.max_entries == 3
+    with pytest.raises(ValueError, match="cache_max_entries"):
+        FilterCore(apply_fn=identity, cache_max_entries=0)
+    assert pip.filters[0] is own
+
+
+@interactive(cache_max_entries=5, gain=(2.0, [0.0, 4.0]))
+def _amplify(img, gain=2.0):
+    return gain * img
+
+
+def _shift(img, offset=1.0):
+    return img + offset
+
+
+def _amplify_shift(img):
+    amplified = _amplify(img)
+    shifted = _shift(amplified)
+    return shifted
+
+
+def test_decorators_forward_cache_max_entries():
+    pip = interactive_pipeline(gui=None, cache="graph", cache_max_entries=2)(_amplify_shift)
+    max_entries = {filt.name: filt.cache_mem.max_entries for filt in pip.filters}
+    assert max_entries == {"_amplify": 5, "_shift": 2}
+    assert np.allclose(pip(input_image), 2.0 * input_image + 1.0)
@@ -0,0 +1,240 @@
+"""Tests for the threaded DAG scheduler (executor="threads").
+
+Covers:
+- independent branches actually overlap (barrier shared by two branches)
+- results, buffer ordering and cache decisions match the sequential executor
+- context writers run before their readers (graph cache modes, sequential runs otherwise)
+- a variable re-assigned downstream never leaks into an earlier consumer
+- filter errors abort the run with the earliest failing filter
+"""
+
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from interactive_pipe.core.context import context
+from interactive_pipe.core.engine import FilterError, PipelineEngine
+from interactive_pipe.core.filter import FilterCore
+from interactive_pipe.core.pipeline import PipelineCore
+from interactive_pipe.helper.filter_decorator import interactive
+from interactive_pipe.helper.pipeline_decorator import interactive_pipeline
+
+input_image = np.array([[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]])
+
+
+def make_diamond_pipeline(counters, cache, executor="threads", barriers=()):
+    """Diamond: input 0 -> branch_a (1), input 0 -> branch_b (2), merge(1, 2) -> 3.
+
+    Both branches wait on the barriers in the list, if any (appended to after creation).
+    """
+
+    def branch_a(img, gain_a=1.0):
+        counters["branch_a"] += 1
+        for barrier in barriers:
+            barrier.wait()
+        return [img * gain_a]
+
+    def branch_b(img, gain_b=1.0):
+        counters["branch_b"] += 1
+        for barrier in barriers:
+            barrier.wait()
+        return [img * gain_b]
+
+    def merge(img_a, img_b, blend=0.5):
+        counters["merge"] += 1
+        return [blend * img_a + (1 - blend) * img_b]
+
+    filt_a = FilterCore(apply_fn=branch_a, inputs=[0], outputs=[1])
+    filt_b = FilterCore(apply_fn=branch_b, inputs=[0], outputs=[2])
+    filt_m = FilterCore(apply_fn=merge, inputs=[1, 2], outputs=[3])
+    pip = PipelineCore(
+        filters=[filt_a, filt_b, filt_m], inputs=[0], outputs=[3], cache=cache, executor=executor, max_workers=4
+    )
+    pip.inputs = [input_image]
+    return pip
+
+
+def test_independent_branches_run_concurrently():
+    counters = {"branch_a": 0, "branch_b": 0, "merge": 0}
+    barriers = []
+    pip = make_diamond_pipeline(counters, cache="graph", barriers=barriers)
+    pip.run()  # first run: context accesses unknown, runs sequentially and learns them
+    # both branches must be inside their filter at the same time to pass the barrier
+    barriers.append(threading.Barrier(2, timeout=5))
+    pip.parameters = {"branch_a": {"gain_a": 2.0}, "branch_b": {"gain_b": 2.0}}
+    res = pip.run()
+    assert np.allclose(res[3], 2.0 * input_image)
+    assert counters == {"branch_a": 2, "branch_b": 2, "merge": 2}
+
+
+@pytest.mark.parametrize("cache", [False, True, "graph"])
+def test_threads_match_sequential(cache):
+    seq_counters = {"branch_a": 0, "branch_b": 0, "merge": 0}
+    thr_counters = {"branch_a": 0, "branch_b": 0, "merge": 0}
+    seq = make_diamond_pipeline(seq_counters, cache=cache, executor="sequential")
+    thr = make_diamond_pipeline(thr_counters, cache=cache, executor="threads")
+    for parameters in [{}, {}, {"branch_a": {"gain_a": 2.0}}, {"merge": {"blend": 1.0}}, {}]:
+        seq.parameters = parameters
+        thr.parameters = parameters
+        res_seq = seq.run()
+        res_thr = thr.run()
+        assert list(res_seq.keys()) == list(res_thr.keys())
+        for key in res_seq:
+            assert np.allclose(res_seq[key], res_thr[key])
+        assert seq_counters == thr_counters
+
+
+def test_threads_graph_cache_skips_unaffected_branch():
+    counters = {"branch_a": 0, "branch_b": 0, "merge": 0}
+    pip = make_diamond_pipeline(counters, cache="graph")
+    pip.run()
+    pip.parameters = {"branch_a": {"gain_a": 2.0}}
+    res = pip.run()
+    assert counters == {"branch_a": 2, "branch_b": 1, "merge": 2}
+    assert np.allclose(res[3], 0.5 * 2.0 * input_image + 0.5 * input_image)
+
+
+@pytest.mark.parametrize("cache", ["graph", "graph-strict"])
+def test_threads_order_context_writer_before_reader(cache):
+    """No data edge between writer and reader: only tracked context accesses order them."""
+    seen = []
+
+    def writer(img, offset=1.0):
+        context["offset"] = offset
+        return [img + offset]
+
+    def reader(img):
+        seen.append(context["offset"])
+        return [img * context["offset"]]
+
+    filt_w = FilterCore(apply_fn=writer, inputs=[0], outputs=[1])
+    filt_r = FilterCore(apply_fn=reader, inputs=[0], outputs=[2])
+    pip = PipelineCore(filters=[filt_w, filt_r], inputs=[0], outputs=[1, 2], cache=cache, executor="threads")
+    pip.inputs = [input_image]
+    pip.run()  # first run: accesses unknown, runs sequentially and learns them
+    for offset in [2.0, 3.0, 4.0]:
+        pip.parameters = {"writer": {"offset": offset}}
+        res = pip.run()
+        assert np.allclose(res[2], input_image * offset)
+    assert seen == [1.0, 2.0, 3.0, 4.0]
+
+
+def make_context_pipeline(cache, executor, seen):
+    """Writer and reader of context["k"] without a variable between them."""
+
+    def writer(img):
+        time.sleep(0.05)  # a concurrent reader would get there first
+        context["k"] = 5
+        return [img]
+
+    def reader(img):
+        seen.append(context.get("k", -1))
+        return [img]
+
+    filters = [
+        FilterCore(apply_fn=writer, inputs=[0], outputs=[1]),
+        FilterCore(apply_fn=reader, inputs=[0], outputs=[2]),
+    ]
+    pip = PipelineCore(filters=filters, inputs=[0], outputs=[1, 2], cache=cache, executor=executor)
+    pip.inputs = [input_image]
+    return pip
+
+
+@pytest.mark.parametrize("cache", [False, True])
+def test_threads_stay_sequential_without_tracked_context(cache):
+    """Nothing tells which filters exchange data through the context: never concurrent."""
+    seen = []
+    pip = make_context_pipeline(cache, "threads", seen)
+    for _ in range(3):
+        pip.run()
+    assert seen == ([5, 5, 5] if cache is False else [5])  # cache=True: the reader is cached
+
+
+def test_threads_consumer_bound_to_its_own_producer():
+    """Variable 1 is re-assigned after being consumed: the consumer must see the first value."""
+
+    def first(img):
+        return [img + 1.0]
+
+    def consume(img):
+        return [img * 10.0]
+
+    def overwrite(img):
+        return [img - 100.0]
+
+    filters = [
+        FilterCore(apply_fn=first, inputs=[0], outputs=[1]),
+        FilterCore(apply_fn=consume, inputs=[1], outputs=[2]),
+        FilterCore(apply_fn=overwrite, inputs=[0], outputs=[1]),
+    ]
+    res = PipelineEngine(executor="threads").run(filters, imglst=[input_image])
+    assert np.allclose(res[2], (input_image + 1.0) * 10.0)
+    assert np.allclose(res[1], input_image - 100.0)
+
+
+def test_threads_error_reports_earliest_failing_filter():
+    def fail_first(img):
+        raise ValueError("first failure")
+
+    def fail_second(img):
+        raise KeyError("second failure")
+
+    filters = [
+        FilterCore(apply_fn=fail_first, inputs=[0], outputs=[1]),
+        FilterCore(apply_fn=fail_second, inputs=[0], outputs=[2]),
+    ]
+    with pytest.raises(FilterError) as exc_info:
+        PipelineEngine(executor="threads").run(filters, imglst=[input_image])
+    assert exc_info.value.filter_name == "fail_first"
+    assert isinstance(exc_info.value.original_error, ValueError)
+
+
+def test_threads_readonly_inputs_still_enforced():
+    def mutate(img):
+        img += 1
+        return [img]
+
+    def keep(img):
+        return [img]
+
+    filters = [
+        FilterCore(apply_fn=mutate, inputs=[0], outputs=[1]),
+        FilterCore(apply_fn=keep, inputs=[0], outputs=[2]),
+    ]
+    with pytest.raises(FilterError) as exc_info:
+        PipelineEngine(executor="threads").run(filters, imglst=[input_image.copy()])
+    assert isinstance(exc_info.value.original_error, ValueError)
+
+
+def test_unknown_executor_rejected():
+    with pytest.raises(ValueError, match="Unknown executor"):
+        PipelineEngine(executor="gpu")
+    with pytest.raises(ValueError, match="max_workers"):
+        PipelineEngine(executor="threads", max_workers=0)
+
+
+@interactive(gain=(2.0, [0.0, 4.0]))
+def _amplify(img, gain=2.0):
+    return gain * img
+
+
+@interactive(offset=(1.0, [0.0, 4.0]))
+def _shift(img, offset=1.0):
+    return img + offset
+
+
+def _branches(img):
+    amplified = _amplify(img)
+    shifted = _shift(img)
+    return amplified, shifted
+
+
+def test_decorator_forwards_executor():
+    pip = interactive_pipeline(gui=None, cache="graph", executor="threads", max_workers=2)(_branches)
+    assert pip.engine.executor == "threads"
+    assert pip.engine.max_workers == 2
+    amplified, shifted = pip(input_image)
+    assert np.allclose(amplified, 2.0 * input_image)
+    assert np.allclose(shifted, input_image + 1.0)
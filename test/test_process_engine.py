@@ -0,0 +1,223 @@
+"""Tests for the process-pool executor (executor="processes").
+
+Covers:
+- filters run in worker processes, results and cache decisions match the sequential executor
+- numpy buffers come back through shared memory, released once unused
+- context writes/reads are replayed in the main process (graph cache modes), filters
+  run one at a time when context accesses are not tracked
+- filter errors, read-only inputs and layout styles behave as in-process
+"""
+
+import gc
+import os
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+
+from interactive_pipe.core.context import context, layout
+from interactive_pipe.core.engine import FilterError, PipelineEngine
+from interactive_pipe.core.filter import FilterCore
+from interactive_pipe.core.pipeline import PipelineCore
+from interactive_pipe.core.process_engine import ProcessPipelineEngine, _SharedBlock
+from interactive_pipe.helper.filter_decorator import interactive
+from interactive_pipe.helper.pipeline_decorator import interactive_pipeline
+
+input_image = np.array([[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]])
+
+
+# filters live at module level: worker processes may need to import them
+def branch_a(img, gain_a=1.0):
+    return [img * gain_a]
+
+
+def branch_b(img, gain_b=1.0):
+    return [img * gain_b]
+
+
+def merge(img_a, img_b, blend=0.5):
+    return [blend * img_a + (1 - blend) * img_b]
+
+
+def stamp(img, offset=0.0):
+    # unique on every execution: tells whether the filter was recomputed or served from cache
+    return [img + offset, np.array([time.perf_counter_ns()]), np.array([os.getpid()])]
+
+
+def make_diamond_pipeline(cache, executor="processes"):
+    filters = [
+        FilterCore(apply_fn=branch_a, inputs=[0], outputs=[1]),
+        FilterCore(apply_fn=branch_b, inputs=[0], outputs=[2]),
+        FilterCore(apply_fn=merge, inputs=[1, 2], outputs=[3]),
+    ]
+    pip = PipelineCore(filters=filters, inputs=[0], outputs=[3], cache=cache, executor=executor, max_workers=2)
+    pip.inputs = [input_image]
+    return pip
+
+
+@pytest.mark.parametrize("cache", [False, True, "graph"])
+def test_processes_match_sequential(cache):
+    seq = make_diamond_pipeline(cache=cache, executor="sequential")
+    prc = make_diamond_pipeline(cache=cache)
+    try:
+        for parameters in [{}, {"branch_a": {"gain_a": 2.0}}, {"merge": {"blend": 1.0}}, {}]:
+            seq.parameters = parameters
+            prc.parameters = parameters
+            res_seq = seq.run()
+            res_prc = prc.run()
+            assert list(res_seq.keys()) == list(res_prc.keys())
+            for key in res_seq:
+                assert np.allclose(res_seq[key], res_prc[key])
+    finally:
+        prc.engine.close()
+
+
+def test_filters_run_in_worker_processes_and_cache_is_honoured():
+    filters = [
+        FilterCore(apply_fn=stamp, name="stamp_a", inputs=[0], outputs=[1, "tick_a", "pid_a"]),
+        FilterCore(apply_fn=stamp, name="stamp_b", inputs=[0], outputs=[2, "tick_b", "pid_b"]),
+    ]
+    pip = PipelineCore(filters=filters, inputs=[0], outputs=[1, 2], cache="graph", executor="processes")
+    pip.inputs = [input_image]
+    try:
+        first = pip.run()
+        assert first["pid_a"][0] != os.getpid()
+        pip.parameters = {"stamp_a": {"offset": 1.0}}
+        second = pip.run()
+        assert np.allclose(second[1], input_image + 1.0)
+        assert second["tick_a"][0] != first["tick_a"][0]  # recomputed
+        assert second["tick_b"][0] == first["tick_b"][0]  # served from cache
+    finally:
+        pip.engine.close()
+
+
+def test_outputs_travel_through_shared_memory_and_are_released():
+    pip = make_diamond_pipeline(cache=False)
+    try:
+        res = pip.run()
+        block = res[3].base
+        assert isinstance(block, _SharedBlock)
+        name = block.name
+        del res, block
+        gc.collect()
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=name)
+    finally:
+        pip.engine.close()
+
+
+def context_writer(img, offset=1.0):
+    context["offset"] = offset
+    return [img + offset]
+
+
+def context_reader(img):
+    return [img * context["offset"]]
+
+
+@pytest.mark.parametrize("cache", ["graph", "graph-strict"])
+def test_context_writes_are_replayed_in_order(cache):
+    filters = [
+        FilterCore(apply_fn=context_writer, inputs=[0], outputs=[1]),
+        FilterCore(apply_fn=context_reader, inputs=[0], outputs=[2]),
+    ]
+    pip = PipelineCore(filters=filters, inputs=[0], outputs=[1, 2], cache=cache, executor="processes")
+    pip.inputs = [input_image]
+    try:
+        pip.run()  # first run: accesses unknown, filters run one at a time
+        for offset in [2.0, 3.0]:
+            pip.parameters = {"context_writer": {"offset": offset}}
+            res = pip.run()
+            assert np.allclose(res[2], input_image * offset)
+            assert pip._user_context["offset"] == offset
+        assert pip._user_context.readers_of("offset") == {"context_reader"}
+    finally:
+        pip.engine.close()
+
+
+def slow_context_writer(img):
+    time.sleep(0.05)  # a concurrent reader would get there first
+    context["k"] = 5.0
+    return [img]
+
+
+def default_context_reader(img):
+    return [img * context.get("k", -1.0)]
+
+
+@pytest.mark.parametrize("cache", [False, True])
+def test_untracked_context_accesses_run_one_at_a_time(cache):
+    filters = [
+        FilterCore(apply_fn=slow_context_writer, inputs=[0], outputs=[1]),
+        FilterCore(apply_fn=default_context_reader, inputs=[0], outputs=[2]),
+    ]
+    pip = PipelineCore(filters=filters, inputs=[0], outputs=[1, 2], cache=cache, executor="processes")
+    pip.inputs = [input_image]
+    try:
+        for _ in range(3):
+            assert np.allclose(pip.run()[2], input_image * 5.0)
+    finally:
+        pip.engine.close()
+
+
+def fail(img):
+    raise ValueError("worker failure")
+
+
+def mutate(img):
+    img += 1
+    return [img]
+
+
+def test_worker_error_is_reported_as_filter_error():
+    engine = ProcessPipelineEngine(max_workers=1)
+    try:
+        with pytest.raises(FilterError) as exc_info:
+            engine.run([FilterCore(apply_fn=fail, inputs=[0], outputs=[1])], imglst=[input_image])
+        assert exc_info.value.filter_name == "fail"
+        assert isinstance(exc_info.value.original_error, ValueError)
+        assert any(frame.name == "fail" for frame in exc_info.value._user_frames)
+    finally:
+        engine.close()
+
+
+def test_readonly_inputs_enforced_in_workers():
+    source = input_image.copy()
+    engine = ProcessPipelineEngine(max_workers=1)
+    try:
+        with pytest.raises(FilterError) as exc_info:
+            engine.run([FilterCore(apply_fn=mutate, inputs=[0], outputs=[1])], imglst=[source])
+        assert isinstance(exc_info.value.original_error, ValueError)
+        res = engine.run([FilterCore(apply_fn=mutate, inputs=[0], outputs=[1], inplace=True)], imglst=[source])
+        assert np.allclose(res[1], input_image + 1)
+        assert np.allclose(source, input_image)  # the caller's buffer is never touched
+    finally:
+        engine.close()
+
+
+def test_processes_executor_requires_process_engine():
+    with pytest.raises(ValueError, match="does not support"):
+        PipelineEngine(executor="processes")
+
+
+@interactive(gain=(2.0, [0.0, 4.0]))
+def _amplify(img, gain=2.0):
+    layout.style("amplified", title=f"gain {gain}")
+    return gain * img
+
+
+def _amplify_pipeline(img):
+    amplified = _amplify(img)
+    return amplified
+
+
+def test_decorator_forwards_processes_executor_and_styles():
+    pip = interactive_pipeline(gui=None, cache="graph", executor="processes", max_workers=1)(_amplify_pipeline)
+    try:
+        assert isinstance(pip.engine, ProcessPipelineEngine)
+        amplified = pip(input_image)
+        assert np.allclose(amplified, 2.0 * input_image)
+        assert pip.framework_state.output_styles["amplified"]["title"] == "gain 2.0"
+    finally:
+        pip.engine.close()
@@ -0,0 +1,124 @@
+"""Tests for versioned context values (context.publish, cache="graph").
+
+Covers:
+- published keys are compared by version, never fingerprinted
+- publishing from a filter or from outside the pipeline invalidates the readers
+- immutable values are made read-only
+- deleting a published key makes it an ordinary key again, publish without graph cache
+"""
+
+import numpy as np
+import pytest
+
+import interactive_pipe.core.context_tracking as context_tracking
+from interactive_pipe.core.context import context
+from interactive_pipe.core.context_tracking import ContextTracker
+from interactive_pipe.core.filter import FilterCore
+from interactive_pipe.core.pipeline import PipelineCore
+
+input_image = np.ones((2, 3))
+
+
+@pytest.fixture
+def fingerprinted(monkeypatch):
+    """Values passed to _fingerprint by the tracker."""
+    seen = []
+    fingerprint = context_tracking._fingerprint
+
+    def recording_fingerprint(value):
+        seen.append(value)
+        return fingerprint(value)
+
+    monkeypatch.setattr(context_tracking, "_fingerprint", recording_fingerprint)
+    return seen
+
+
+def make_pipeline(counters, cache="graph", immutable=False):
+    def load_lut(img, size=4):
+        counters["load_lut"] += 1
+        context.publish("lut", np.linspace(0.0, 1.0, size), immutable=immutable)
+        return [img]
+
+    def apply_lut(img):
+        counters["apply_lut"] += 1
+        return [img * context["lut"][-1] * len(context["lut"])]
+
+    filters = [
+        FilterCore(apply_fn=load_lut, inputs=[0], outputs=[1]),
+        FilterCore(apply_fn=apply_lut, inputs=[1], outputs=[2]),
+    ]
+    pip = PipelineCore(filters=filters, inputs=[0], outputs=[2], cache=cache)
+    pip.inputs = [input_image]
+    return pip
+
+
+def test_published_keys_are_not_fingerprinted(fingerprinted):
+    counters = {"load_lut": 0, "apply_lut": 0}
+    pip = make_pipeline(counters)
+    assert np.allclose(pip.run()[2], 4.0)
+    version = pip._user_context.version("lut")
+    for _ in range(3):
+        pip.run()
+    assert counters == {"load_lut": 1, "apply_lut": 1}
+    assert not any(isinstance(value, np.ndarray) and value.shape == (4,) for value in fingerprinted)
+
+    pip.parameters = {"load_lut": {"size": 8}}
+    assert np.allclose(pip.run()[2], 8.0)
+    assert counters == {"load_lut": 2, "apply_lut": 2}
+    assert pip._user_context.version("lut") > version
+
+
+def test_publishing_an_equal_value_is_a_change():
+    tracker = ContextTracker()
+    tracker.publish("lut", np.zeros(3))
+    tracker.begin_filter("reader")
+    tracker["lut"]
+    tracker.finish_filter()
+    tracker.consume_external_changes()
+    tracker.publish("lut", np.zeros(3))
+    assert tracker.consume_external_changes() == {"lut"}
+    tracker["lut"] = np.zeros(3)  # plain assignment of a published key bumps its version too
+    assert tracker.consume_external_changes() == {"lut"}
+    assert "reader" in tracker.readers_of("lut")
+
+
+def test_external_publish_invalidates_readers():
+    counters = {"load_lut": 0, "apply_lut": 0}
+    pip = make_pipeline(counters)
+    pip.run()
+    lut = pip._user_context["lut"]
+    lut[-1] = 2.0  # in-place modification of a published value: not detected...
+    pip.run()
+    assert counters == {"load_lut": 1, "apply_lut": 1}
+    pip._user_context.publish("lut", lut)  # ...until it is published again
+    assert np.allclose(pip.run()[2], 8.0)
+    assert counters == {"load_lut": 1, "apply_lut": 2}
+
+
+def test_immutable_values_are_read_only():
+    counters = {"load_lut": 0, "apply_lut": 0}
+    pip = make_pipeline(counters, immutable=True)
+    pip.run()
+    with pytest.raises(ValueError, match="read-only"):
+        pip._user_context["lut"][0] = 1.0
+    tracker = ContextTracker()
+    tracker.publish("pair", {"a": np.zeros(2), "b": [np.ones(2)]}, immutable=True)
+    assert not tracker["pair"]["a"].flags.writeable and not tracker["pair"]["b"][0].flags.writeable
+
+
+def test_deleted_keys_are_fingerprinted_again(fingerprinted):
+    tracker = ContextTracker()
+    tracker.publish("lut", np.zeros(3))
+    del tracker["lut"]
+    assert tracker.version("lut") is None
+    tracker["lut"] = np.zeros(3)
+    assert fingerprinted and fingerprinted[-1] is tracker["lut"]
+    with pytest.raises(ValueError, match="reserved"):
+        ContextTracker(ignore_prefix="__").publish("__internal", 1)
+
+
+def test_publish_without_graph_cache():
+    counters = {"load_lut": 0, "apply_lut": 0}
+    pip = make_pipeline(counters, cache=False)
+    assert np.allclose(pip.run()[2], 4.0)
+    assert type(pip._user_context) is dict and pip._user_context["lut"].shape == (4,)
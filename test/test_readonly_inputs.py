@@ -88,6 +88,56 @@ def test_inplace_filter_does_not_corrupt_cache():
     assert np.allclose(res[2], input_image + 4.0)
 
 
+def test_freeze_outputs_caches_by_reference():
+    counters = {"first": 0}
+
+    def first(img, gain=1.0):
+        counters["first"] += 1
+        return [img * gain]
+
+    filt1 = FilterCore(apply_fn=first, inputs=[0], outputs=[1])
+    filt2 = FilterCore(apply_fn=mutating_add, inputs=[1], outputs=[2], inplace=True)
+    pip = PipelineCore(filters=[filt1, filt2], inputs=[0], outputs=[1, 2], cache="graph", freeze_outputs=True)
+    pip.inputs = [input_image]
+
+    res = pip.run()
+    assert res[1] is filt1.cache_mem.result[0]  # no copy of the output
+    assert not res[1].flags.writeable
+    for p in [3.0, 4.0]:
+        # the in-place consumer gets a private copy: the cached output stays intact
+        pip.parameters = {"mutating_add": {"p": p}}
+        res = pip.run()
+        assert np.allclose(res[1], input_image)
+        assert np.allclose(res[2], input_image + p)
+    assert counters == {"first": 1}
+
+
+def test_freeze_inputs_hands_out_views_instead_of_copies(tmp_path):
+    received = []
+
+    def spy(img, p=5.0):
+        received.append(img)
+        return [img + p]
+
+    source = input_image.copy()
+    mapped = np.memmap(tmp_path / "raw.bin", dtype=np.float64, mode="w+", shape=input_image.shape)
+    mapped[:] = input_image
+    filters = [
+        FilterCore(apply_fn=spy, inputs=[0], outputs=[2]),
+        FilterCore(apply_fn=spy, name="spy_mapped", inputs=[1], outputs=[3]),
+        FilterCore(apply_fn=mutating_add, inputs=[0], outputs=[4], inplace=True),
+    ]
+    pip = PipelineCore(filters=filters, inputs=[0, 1], outputs=[2, 3, 4], readonly_inputs=False, freeze_inputs=True)
+    pip.inputs = [source, mapped]
+    res = pip.run()
+    assert np.shares_memory(received[0], source)  # no copy
+    assert isinstance(received[1], np.memmap) and np.shares_memory(received[1], mapped)
+    with pytest.raises(ValueError):
+        received[0] += 1  # read-only even with readonly_inputs=False
+    assert np.allclose(res[4], input_image + 5.0)  # inplace filters still get copies
+    assert np.allclose(source, input_image) and source.flags.writeable
+
+
 def test_readonly_inputs_protects_sibling_aliasing():
     """Two filters consuming the same buffer: the first one mutating it must raise
     instead of silently feeding the second one a modified image."""
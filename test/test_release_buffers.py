@@ -0,0 +1,147 @@
+"""Tests for buffer liveness (release_buffers=True).
+
+Covers:
+- intermediate buffers are dropped once their last consumer ran, outputs are kept
+- results match a run keeping every buffer, with the sequential and thread executors
+- peak_buffer_bytes reports the largest set of buffers alive at the same time
+- cached intermediates are still reused, entire_buffer=True keeps every buffer
+- configuration through the decorator
+"""
+
+import gc
+import weakref
+
+import numpy as np
+import pytest
+
+from interactive_pipe.core.filter import FilterCore
+from interactive_pipe.core.pipeline import PipelineCore
+from interactive_pipe.helper.pipeline_decorator import interactive_pipeline
+
+input_image = np.ones((100, 100), dtype=np.float64)  # 80 kB
+IMAGE_BYTES = input_image.nbytes
+
+alive = {}  # step name -> weak reference to its output
+counters = {"step": 0}
+
+
+class Buffer(np.ndarray):
+    """ndarray subclass, so that outputs can be weakly referenced."""
+
+
+def step(img, amount=1.0):
+    counters["step"] += 1
+    return [img + amount]
+
+
+def probe(img):
+    # outputs of the steps before the previous one should be gone by now
+    gc.collect()
+    return [{name: ref() is not None for name, ref in alive.items()}]
+
+
+@pytest.fixture(autouse=True)
+def reset_state():
+    alive.clear()
+    counters["step"] = 0
+
+
+def track(name):
+    def apply(img, amount=1.0):
+        out = step(img, amount)[0].view(Buffer)
+        alive[name] = weakref.ref(out)
+        return [out]
+
+    apply.__name__ = name
+    return apply
+
+
+def make_chain(num_steps=4, **kwargs):
+    """input 0 -> step_1 -> ... -> step_n -> probe (outputs: last step and probe)."""
+    filters = [
+        FilterCore(apply_fn=track(f"step_{idx}"), inputs=[idx - 1 if idx > 1 else 0], outputs=[idx])
+        for idx in range(1, num_steps + 1)
+    ]
+    filters.append(FilterCore(apply_fn=probe, inputs=[num_steps], outputs=["probe"]))
+    pip = PipelineCore(filters=filters, inputs=[0], outputs=[num_steps, "probe"], **kwargs)
+    pip.inputs = [input_image]
+    return pip
+
+
+@pytest.mark.parametrize("executor", ["sequential", "threads"])
+def test_dead_intermediates_are_released(executor):
+    pip = make_chain(release_buffers=True, executor=executor)
+    res = pip.run()
+    assert set(res) == {4, "probe"}
+    assert np.allclose(res[4], input_image + 4)
+    # while probe ran, only the output of the last step was still referenced
+    assert res["probe"] == {"step_1": False, "step_2": False, "step_3": False, "step_4": True}
+
+
+def test_every_buffer_is_kept_by_default():
+    pip = make_chain()
+    res = pip.run()
+    assert set(res) == {0, 1, 2, 3, 4, "probe"}
+    assert all(res["probe"].values())
+    assert pip.engine.peak_buffer_bytes is None
+
+
+def test_peak_buffer_bytes():
+    filters = [FilterCore(apply_fn=step, name=f"step_{idx}", inputs=[idx], outputs=[idx + 1]) for idx in range(6)]
+    pip = PipelineCore(filters=filters, inputs=[0], outputs=[6], release_buffers=True)
+    pip.inputs = [input_image]
+    pip.run()
+    # input and output of the running step, instead of the 7 buffers of the chain
+    assert pip.engine.peak_buffer_bytes == 2 * IMAGE_BYTES
+    assert set(pip.run(entire_buffer=True)) == set(range(7))
+
+
+def test_shared_buffer_is_counted_once():
+    def passthrough(img):
+        return [img, img]
+
+    filters = [
+        FilterCore(apply_fn=passthrough, inputs=[0], outputs=["a", "b"]),
+        FilterCore(apply_fn=step, inputs=["a"], outputs=["c"]),
+    ]
+    pip = PipelineCore(filters=filters, inputs=[0], outputs=["c"], release_buffers=True)
+    pip.inputs = [input_image]
+    res = pip.run()
+    assert set(res) == {"c"}
+    assert pip.engine.peak_buffer_bytes == 2 * IMAGE_BYTES
+
+
+def test_cached_intermediates_are_still_reused():
+    pip = make_chain(release_buffers=True, cache="graph")
+    pip.run()
+    pip.parameters = {"step_4": {"amount": 2.0}}
+    res = pip.run()
+    assert np.allclose(res[4], input_image + 5)
+    assert counters["step"] == 5
+
+
+def test_entire_buffer_keeps_every_buffer():
+    pip = make_chain(release_buffers=True)
+    res = pip.run(entire_buffer=True)
+    assert set(res) == {0, 1, 2, 3, 4, "probe"}
+
+
+def _amplify(img, gain=2.0):
+    return img * gain
+
+
+def _shift(img, offset=1.0):
+    return img + offset
+
+
+def _amplify_pipeline(img):
+    amplified = _amplify(img)
+    shifted = _shift(amplified)
+    return shifted
+
+
+def test_decorator_forwards_release_buffers():
+    pip = interactive_pipeline(gui=None, release_buffers=True)(_amplify_pipeline)
+    assert pip.engine.release_buffers
+    assert np.allclose(pip(input_image), 2 * input_image + 1)
+    assert pip.engine.peak_buffer_bytes == 2 * IMAGE_BYTES
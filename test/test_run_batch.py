@@ -0,0 +1,128 @@
+"""Tests for batch processing (HeadlessPipeline.run_batch).
+
+Covers:
+- batched filters are called once per chunk, others once per item, same outputs as run()
+- chunks of batch_size items, inputs of different shapes fall back to per-item calls
+- context written and read by consecutive per-item filters stays per item
+- multiple inputs, errors
+"""
+
+import numpy as np
+import pytest
+
+from interactive_pipe.core.context import context
+from interactive_pipe.core.engine import FilterError
+from interactive_pipe.headless.pipeline import HeadlessPipeline
+from interactive_pipe.helper.filter_decorator import interactive
+
+counters = {"develop": 0, "measure": 0, "normalize": 0}
+
+
+@interactive(batched=True, gain=(2.0, [0.0, 4.0]))
+def develop(img, gain=2.0):
+    counters["develop"] += 1
+    return img * gain
+
+
+def measure(img):
+    counters["measure"] += 1
+    context["peak"] = float(img.max())
+    return img
+
+
+@interactive(batched=True)
+def normalize(img):
+    counters["normalize"] += 1
+    return img - 1.0
+
+
+def scale_by_peak(img):
+    return img / context["peak"]
+
+
+def processing(img):
+    developed = develop(img)
+    measured = measure(developed)
+    scaled = scale_by_peak(measured)
+    normalized = normalize(scaled)
+    return normalized
+
+
+def blend(img, other):
+    return (img + other) / 2
+
+
+def two_inputs(img, other):
+    developed = develop(img)
+    blended = blend(developed, other)
+    return blended
+
+
+@pytest.fixture(autouse=True)
+def reset_counters():
+    for name in counters:
+        counters[name] = 0
+
+
+def images(count, shape=(2, 3)):
+    return [np.full(shape, float(index + 1)) for index in range(count)]
+
+
+def expected(img, gain=2.0):
+    developed = img * gain
+    return developed / developed.max() - 1.0
+
+
+def test_batched_filters_run_once_per_chunk():
+    pip = HeadlessPipeline.from_function(processing)
+    inputs = images(10)
+    results = list(pip.run_batch(inputs, batch_size=4))
+    assert len(results) == 10
+    for img, (normalized,) in zip(inputs, results):
+        assert np.allclose(normalized, expected(img))
+    assert counters == {"develop": 3, "measure": 10, "normalize": 3}
+
+
+def test_same_outputs_as_run():
+    pip = HeadlessPipeline.from_function(processing)
+    img = images(3)[2]
+    pip.inputs = [img]
+    reference = pip.run()
+    (batched,) = list(pip.run_batch([img]))
+    assert np.allclose(batched[0], reference[0])
+
+
+def test_inputs_of_different_shapes_run_per_item():
+    pip = HeadlessPipeline.from_function(processing)
+    inputs = images(2) + images(2, shape=(4, 4))
+    results = list(pip.run_batch(inputs, batch_size=4))
+    assert [res[0].shape for res in results] == [(2, 3), (2, 3), (4, 4), (4, 4)]
+    assert counters["develop"] == 4
+
+
+def test_current_parameters_are_used():
+    pip = HeadlessPipeline.from_function(processing)
+    (gain,) = pip.controls
+    gain.update(3.0)
+    try:
+        img = images(1)[0]
+        results = list(pip.run_batch([img, img], batch_size=2))
+    finally:
+        gain.update(2.0)  # the control is shared with the other tests
+    assert np.allclose(results[1][0], expected(img, gain=3.0))
+
+
+def test_multiple_inputs():
+    pip = HeadlessPipeline.from_function(two_inputs)
+    inputs = [(img, img + 1) for img in images(3)]
+    results = list(pip.run_batch(inputs, batch_size=3))
+    for (img, other), (blended,) in zip(inputs, results):
+        assert np.allclose(blended, (img * 2 + other) / 2)
+
+
+def test_errors():
+    pip = HeadlessPipeline.from_function(processing)
+    with pytest.raises(ValueError, match="batch_size"):
+        pip.run_batch(images(2), batch_size=0)
+    with pytest.raises(FilterError, match="can't multiply"):
+        list(pip.run_batch(["not an image", "not an image either"]))
@@ -0,0 +1,98 @@
+"""Tests for frame streaming (HeadlessPipeline.stream).
+
+Covers:
+- outputs per frame, filters which do not depend on the frames run once per sequence
+- frames pulled ahead on a background thread, at most prefetch frames ahead
+- errors of the frame iterator reach the consumer, stopping early stops the thread
+- the pipeline is left untouched
+"""
+
+import threading
+
+import numpy as np
+import pytest
+
+from interactive_pipe.core.engine import FilterError
+from interactive_pipe.headless.pipeline import HeadlessPipeline
+from interactive_pipe.helper.filter_decorator import interactive
+
+counters = {"build_lut": 0, "apply_lut": 0}
+
+
+@interactive(levels=(4, [2, 16]))
+def build_lut(levels=4):
+    counters["build_lut"] += 1
+    return np.linspace(0.0, 1.0, levels)
+
+
+def apply_lut(img, lut):
+    counters["apply_lut"] += 1
+    if np.isnan(img).any():
+        raise ValueError("corrupted frame")
+    return lut[np.clip(img, 0, len(lut) - 1).astype(int)]
+
+
+def processing(img):
+    lut = build_lut()
+    toned = apply_lut(img, lut)
+    return toned
+
+
+@pytest.fixture(autouse=True)
+def reset_counters():
+    for name in counters:
+        counters[name] = 0
+
+
+def frames(count, pulled=None):
+    for index in range(count):
+        if pulled is not None:
+            pulled.append((index, threading.current_thread()))
+        yield np.full((2, 3), index % 4, dtype=np.float64)
+
+
+@pytest.mark.parametrize("prefetch", [0, 2])
+def test_frame_independent_filters_run_once(prefetch):
+    pip = HeadlessPipeline.from_function(processing)
+    results = list(pip.stream(frames(6), prefetch=prefetch))
+    assert len(results) == 6
+    lut = np.linspace(0.0, 1.0, 4)
+    for index, (toned,) in enumerate(results):
+        assert np.allclose(toned, lut[index % 4])
+    assert counters == {"build_lut": 1, "apply_lut": 6}
+
+
+def test_frames_are_pulled_ahead_on_a_thread():
+    pip = HeadlessPipeline.from_function(processing)
+    pulled = []
+    outputs = pip.stream(frames(50, pulled), prefetch=3)
+    next(outputs)
+    assert len(pulled) <= 1 + 3 + 1  # consumed, queued, waiting to be queued
+    assert all(thread is not threading.main_thread() for _, thread in pulled)
+    outputs.close()
+    assert not any(thread.name == "interactive_pipe-prefetch" for thread in threading.enumerate())
+
+
+def test_errors_reach_the_consumer():
+    def broken_frames():
+        yield np.zeros((2, 3))
+        raise OSError("cannot decode frame 1")
+
+    pip = HeadlessPipeline.from_function(processing)
+    with pytest.raises(OSError, match="cannot decode"):
+        list(pip.stream(broken_frames()))
+    with pytest.raises(FilterError, match="corrupted frame"):
+        list(pip.stream([np.zeros((2, 3)), np.full((2, 3), np.nan)]))
+    with pytest.raises(ValueError, match="prefetch"):
+        pip.stream(frames(1), prefetch=-1)
+
+
+def test_pipeline_is_left_untouched():
+    pip = HeadlessPipeline.from_function(processing, cache=True)
+    pip.inputs = [np.ones((2, 3))]
+    pip.run()
+    list(pip.stream(frames(3)))
+    assert np.allclose(pip.inputs["img"], 1.0)
+    assert counters == {"build_lut": 2, "apply_lut": 4}
+    pip.run()  # served from its own cache
+    assert counters == {"build_lut": 2, "apply_lut": 4}
@@ -0,0 +1,133 @@
+"""Tests for parameter sweeps (HeadlessPipeline.sweep).
+
+Covers:
+- grid, random and sobol strategies, values taken from the controls
+- points ordered for cache reuse: upstream parameters vary slowest
+- the swept pipeline is left untouched, results match single evaluations
+- worker processes, errors
+"""
+
+import numpy as np
+import pytest
+
+from interactive_pipe.core.engine import FilterError
+from interactive_pipe.headless.pipeline import HeadlessPipeline
+from interactive_pipe.headless.sweep import sobol_points
+from interactive_pipe.helper.filter_decorator import interactive
+
+input_image = np.arange(6, dtype=np.float64).reshape(2, 3)
+
+counters = {"develop": 0, "tone": 0}
+
+
+@interactive(gain=(1.0, [0.0, 2.0]))
+def develop(img, gain=1.0):
+    counters["develop"] += 1
+    return img * gain
+
+
+@interactive(mode=("linear", ["linear", "square"]), offset=(0, [0, 3]))
+def tone(img, mode="linear", offset=0):
+    counters["tone"] += 1
+    out = img if mode == "linear" else img**2
+    if offset < 0:
+        raise ValueError("negative offset")
+    return out + offset
+
+
+def processing(img):
+    developed = develop(img)
+    toned = tone(developed)
+    return toned
+
+
+@pytest.fixture(autouse=True)
+def reset_counters():
+    for name in counters:
+        counters[name] = 0
+
+
+def make_pipeline():
+    pip = HeadlessPipeline.from_function(processing, cache=True)
+    pip.inputs = [input_image]
+    return pip
+
+
+def expected(gain, mode="linear", offset=0):
+    developed = input_image * gain
+    return (developed if mode == "linear" else developed**2) + offset
+
+
+def test_grid_sweep():
+    pip = make_pipeline()
+    results = list(pip.sweep({"offset": [0, 1, 2], "gain": [0.5, 1.5]}))
+    assert len(results) == 6
+    # upstream parameter (gain) varies slowest
+    assert [res.parameters["gain"] for res in results] == [0.5] * 3 + [1.5] * 3
+    assert [res.coordinates for res in results][:3] == [(0, 0), (1, 0), (2, 0)]
+    for res in results:
+        assert np.allclose(res.outputs["toned"], expected(res.parameters["gain"], offset=res.parameters["offset"]))
+    assert counters == {"develop": 2, "tone": 6}  # develop reused from cache
+    assert pip.parameters["develop"] == {"gain": 1.0}
+
+
+def test_control_values_are_swept_when_none():
+    pip = make_pipeline()
+    results = list(pip.sweep({"mode": None, "offset": None}))
+    assert sorted((res.parameters["mode"], res.parameters["offset"]) for res in results) == [
+        (mode, offset) for mode in ("linear", "square") for offset in range(4)
+    ]
+
+
+@pytest.mark.parametrize("strategy", ["random", "sobol"])
+def test_sampled_sweeps(strategy):
+    pip = make_pipeline()
+    space = {"gain": list(np.linspace(0.0, 2.0, 9)), "offset": [0, 1, 2, 3]}
+    results = list(pip.sweep(space, strategy=strategy, samples=16, seed=0))
+    assert len(results) == 16
+    for res in results:
+        assert res.parameters["gain"] == space["gain"][res.coordinates[0]]
+        assert np.allclose(res.outputs["toned"], expected(res.parameters["gain"], offset=res.parameters["offset"]))
+    gains = [res.parameters["gain"] for res in results]
+    assert gains == sorted(gains)
+    again = list(pip.sweep(space, strategy=strategy, samples=16, seed=0))
+    assert [res.coordinates for res in again] == [res.coordinates for res in results]
+
+
+def test_sobol_points_cover_the_unit_square():
+    points = sobol_points(16, 2)
+    assert points.shape == (16, 2)
+    # one point per cell of a 4x4 partition
+    cells = {(int(x * 4), int(y * 4)) for x, y in points}
+    assert len(cells) == 16
+
+
+def test_sweep_on_worker_processes():
+    pip = make_pipeline()
+    space = {"gain": [0.5, 1.0, 1.5], "mode": ["linear", "square"], "offset": [0, 2]}
+    results = list(pip.sweep(space, workers=2))
+    assert len(results) == 12
+    assert len({res.coordinates for res in results}) == 12
+    for res in results:
+        params = res.parameters
+        assert np.allclose(res.outputs["toned"], expected(params["gain"], params["mode"], params["offset"]))
+
+
+def test_filter_errors_reach_the_caller():
+    pip = make_pipeline()
+    with pytest.raises(FilterError, match="negative offset"):
+        list(pip.sweep({"offset": [0, -1]}))
+    with pytest.raises(FilterError, match="negative offset"):
+        list(pip.sweep({"offset": [0, -1]}, workers=2))
+
+
+def test_invalid_sweeps():
+    pip = make_pipeline()
+    with pytest.raises(ValueError, match="neither a parameter nor a control"):
+        pip.sweep({"unknown": [1, 2]})
+    with pytest.raises(ValueError, match="Unknown sweep strategy"):
+        pip.sweep({"gain": [1.0]}, strategy="latin")
+    with pytest.raises(ValueError, match="samples"):
+        pip.sweep({"gain": [1.0]}, strategy="random")
+    with pytest.raises(ValueError, match="samples only applies"):
+        pip.sweep({"gain": [1.0]}, samples=3)
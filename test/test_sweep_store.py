@@ -0,0 +1,222 @@
+"""Tests for the on-disk sweep store (sweep(..., store=...), use_sweep_store).
+
+Covers:
+- outputs written as one memory-mapped array per output, indexed by the sweep coordinates
+- points off the swept values, or not swept yet (sampled sweeps), are not found
+- a pipeline browsing the store serves swept points without running its filters
+- other inputs or other unswept parameters run the pipeline
+- outputs which cannot be stored, the decorator argument
+- missing digests: no store is created or served, never a match
+- the context is not digested: a store serves results computed with another context
+"""
+
+import json
+
+import numpy as np
+import pytest
+
+import interactive_pipe.headless.pipeline as headless_pipeline
+from interactive_pipe.core.context import context
+from interactive_pipe.headless.pipeline import HeadlessPipeline
+from interactive_pipe.headless.sweep_store import MANIFEST, SweepStore
+from interactive_pipe.helper.filter_decorator import interactive
+from interactive_pipe.helper.pipeline_decorator import interactive_pipeline
+
+input_image = np.arange(6, dtype=np.float64).reshape(2, 3)
+
+counters = {"develop": 0, "tone": 0}
+
+
+@interactive(gain=(1.0, [0.0, 2.0]))
+def develop(img, gain=1.0):
+    counters["develop"] += 1
+    return img * gain
+
+
+@interactive(mode=("linear", ["linear", "square"]), offset=(0, [0, 3]))
+def tone(img, mode="linear", offset=0):
+    counters["tone"] += 1
+    return (img if mode == "linear" else img**2) + offset
+
+
+def processing(img):
+    developed = develop(img)
+    toned = tone(developed)
+    return toned
+
+
+def describe(img):
+    return {"mean": float(img.mean())}
+
+
+def scale(img):
+    return img * context.get("scale", 1.0)
+
+
+def processing_with_context(img):
+    developed = develop(img)
+    scaled = scale(developed)
+    return scaled
+
+
+def processing_with_description(img):
+    developed = develop(img)
+    description = describe(developed)
+    return developed, description
+
+
+@pytest.fixture(autouse=True)
+def reset_counters():
+    for name in counters:
+        counters[name] = 0
+
+
+def make_pipeline(function=processing):
+    pip = HeadlessPipeline.from_function(function, cache=True)
+    for control in pip.controls:
+        control.reset()  # the @interactive controls are shared with the pipelines of other tests
+    pip.inputs = [input_image]
+    return pip
+
+
+def set_control(pip, parameter_name, value):
+    control = next(ctrl for ctrl in pip.controls if ctrl.parameter_name_to_connect == parameter_name)
+    control.update(value)
+
+
+def expected(gain, mode="linear", offset=0):
+    developed = input_image * gain
+    return (developed if mode == "linear" else developed**2) + offset
+
+
+def test_sweep_is_written_to_the_store(tmp_path):
+    pip = make_pipeline()
+    space = {"gain": [0.5, 1.5], "offset": [0, 1, 2]}
+    results = list(pip.sweep(space, store=tmp_path / "sweep"))
+    store = SweepStore.open(tmp_path / "sweep")
+    assert store.shape == (2, 3)
+    assert store.outputs == ["toned"]
+    assert store._arrays["toned"].shape == (2, 3) + input_image.shape
+    assert isinstance(store._arrays["toned"], np.memmap)
+    assert store.filled.all()
+    for res in results:
+        stored = store.lookup(
+            {"develop": {"gain": res.parameters["gain"]}, "tone": {"offset": res.parameters["offset"]}}
+        )
+        assert np.allclose(stored["toned"], res.outputs["toned"])
+    assert store.lookup({"develop": {"gain": 1.0}, "tone": {"offset": 0}}) is None  # off the swept values
+    with pytest.raises(RuntimeError, match="read-only"):
+        store.write(results[0])
+
+
+def test_sampled_sweep_fills_part_of_the_store(tmp_path):
+    pip = make_pipeline()
+    space = {"gain": list(np.linspace(0.0, 2.0, 5)), "offset": [0, 1, 2, 3]}
+    results = list(pip.sweep(space, strategy="random", samples=6, seed=0, store=tmp_path))
+    store = SweepStore.open(tmp_path)
+    assert store.filled.sum() == 6
+    assert all(store.filled[res.coordinates] for res in results)
+
+
+def test_browsing_serves_swept_points_without_running(tmp_path):
+    pip = make_pipeline()
+    list(pip.sweep({"gain": [0.5, 1.5], "offset": [0, 1, 2]}, store=tmp_path))
+    pip.use_sweep_store(tmp_path)
+    counters["develop"] = counters["tone"] = 0
+    set_control(pip, "gain", 1.5)
+    set_control(pip, "offset", 2)
+    res = pip.run()
+    assert np.allclose(res[0], expected(1.5, offset=2))
+    assert counters == {"develop": 0, "tone": 0}
+    set_control(pip, "gain", 1.0)  # off the swept values: runs
+    res = pip.run()
+    assert np.allclose(res[0], expected(1.0, offset=2))
+    assert counters == {"develop": 1, "tone": 1}
+    pip.use_sweep_store(None)
+    set_control(pip, "gain", 1.5)
+    pip.run()
+    assert counters == {"develop": 2, "tone": 2}
+
+
+def test_other_inputs_or_unswept_parameters_run(tmp_path):
+    pip = make_pipeline()
+    list(pip.sweep({"gain": [0.5, 1.5]}, store=tmp_path))
+    pip.use_sweep_store(tmp_path)
+    set_control(pip, "gain", 0.5)
+    set_control(pip, "mode", "square")  # not swept, differs from the sweep
+    res = pip.run()
+    assert np.allclose(res[0], expected(0.5, mode="square"))
+    assert counters["tone"] == 3
+    set_control(pip, "mode", "linear")
+    pip.inputs = [input_image + 1]
+    res = pip.run()
+    assert np.allclose(res[0], (input_image + 1) * 0.5)
+    assert counters["tone"] == 4
+    pip.inputs = [input_image]
+    pip.run()
+    assert counters["tone"] == 4  # served from the store
+
+
+def test_outputs_which_cannot_be_stored_are_dropped(tmp_path):
+    pip = make_pipeline(processing_with_description)
+    list(pip.sweep({"gain": [0.5, 1.5]}, store=tmp_path))
+    store = SweepStore.open(tmp_path)
+    assert store.outputs == ["developed"]
+    assert store.manifest["dropped"] == ["description"]
+    pip.use_sweep_store(store)
+    set_control(pip, "gain", 0.5)
+    res = pip.run()  # an output is missing from the store: runs
+    assert res[1] == {"mean": float((input_image * 0.5).mean())}
+
+
+def test_decorator_opens_the_store(tmp_path):
+    list(make_pipeline().sweep({"gain": [0.5, 1.5]}, store=tmp_path))
+    pip = interactive_pipeline(gui=None, sweep_store=tmp_path)(processing)
+    assert pip.sweep_store.path == tmp_path
+    with pytest.raises(FileNotFoundError, match="No sweep store"):
+        interactive_pipeline(gui=None, sweep_store=tmp_path / "missing")(processing)
+
+
+def test_missing_digests_are_refused(tmp_path, monkeypatch):
+    pip = make_pipeline()
+    monkeypatch.setattr(headless_pipeline, "inputs_digest", lambda inputs: None)
+    with pytest.raises(ValueError, match="inputs cannot be digested"):
+        pip.sweep({"gain": [0.5, 1.5]}, store=tmp_path / "sweep")
+    assert not (tmp_path / "sweep").exists()
+    with pytest.raises(ValueError, match="inputs and parameters cannot be digested"):
+        SweepStore.create(tmp_path / "sweep", [], inputs=None, parameters=None)
+    monkeypatch.undo()
+    list(pip.sweep({"gain": [0.5, 1.5]}, store=tmp_path))
+    manifest = json.loads((tmp_path / MANIFEST).read_text())
+    manifest["parameters"] = None
+    (tmp_path / MANIFEST).write_text(json.dumps(manifest))
+    with pytest.raises(ValueError, match="parameters cannot be digested"):
+        SweepStore.open(tmp_path)
+
+
+def test_missing_digest_never_matches(tmp_path, monkeypatch):
+    pip = make_pipeline()
+    list(pip.sweep({"gain": [0.5, 1.5]}, store=tmp_path))
+    pip.use_sweep_store(tmp_path)
+    pip.sweep_store.manifest["inputs"] = None  # a store written before digests were required
+    monkeypatch.setattr(headless_pipeline, "inputs_digest", lambda inputs: None)
+    set_control(pip, "gain", 0.5)
+    counters["tone"] = 0
+    res = pip.run()
+    assert np.allclose(res[0], expected(0.5))
+    assert counters["tone"] == 1
+
+
+def test_context_is_not_digested(tmp_path):
+    """Known limitation: the manifest does not tell results computed with another context apart."""
+    pip = make_pipeline(processing_with_context)
+    pip.update_user_context({"scale": 1.0})
+    list(pip.sweep({"gain": [0.5, 1.5]}, store=tmp_path))
+    pip.use_sweep_store(tmp_path)
+    pip.update_user_context({"scale": 3.0})
+    set_control(pip, "gain", 0.5)
+    res = pip.run()
+    assert np.allclose(res[0], input_image * 0.5)  # computed with scale 1.0
+    pip.use_sweep_store(None)
+    res = pip.run()
+    assert np.allclose(res[0], input_image * 0.5 * 3.0)
@@ -0,0 +1,114 @@
+"""Tests for vectorized filters (@interactive(vectorized=True)).
+
+Covers:
+- run_vectorized: one call for a batch of values, parameters broadcast against the inputs
+- other filters are called once per values, outputs without a batch axis are rejected
+- sweeps evaluate the values of a vectorized filter in one call, with the same results
+- the prefetched outputs are only served for the values of the batch
+"""
+
+import numpy as np
+import pytest
+
+from interactive_pipe.core.filter import FilterCore
+from interactive_pipe.headless.pipeline import HeadlessPipeline
+from interactive_pipe.helper.filter_decorator import interactive
+
+input_image = np.arange(6, dtype=np.float64).reshape(2, 3)
+
+counters = {"develop": 0, "tone": 0, "blend": 0}
+
+
+@interactive(gain=(1.0, [0.0, 2.0]))
+def develop(img, gain=1.0):
+    counters["develop"] += 1
+    return img * gain
+
+
+@interactive(vectorized=True, gamma=(1.0, [0.5, 2.0]), offset=(0.0, [0.0, 1.0]))
+def tone(img, gamma=1.0, offset=0.0):
+    counters["tone"] += 1
+    return img**gamma + offset
+
+
+@interactive(amount=(0.5, [0.0, 1.0]))
+def blend(img, toned, amount=0.5):
+    counters["blend"] += 1
+    return (1 - amount) * img + amount * toned
+
+
+def processing(img):
+    developed = develop(img)
+    toned = tone(developed)
+    blended = blend(developed, toned)
+    return blended
+
+
+@pytest.fixture(autouse=True)
+def reset_counters():
+    for name in counters:
+        counters[name] = 0
+
+
+def expected(gain=1.0, gamma=1.0, offset=0.0, amount=0.5):
+    developed = input_image * gain
+    return (1 - amount) * developed + amount * (developed**gamma + offset)
+
+
+def test_run_vectorized_calls_the_filter_once():
+    filt = FilterCore(apply_fn=tone, inputs=[0], outputs=[1], vectorized=True)
+    batch = [{"gamma": 0.5}, {"gamma": 1.0}, {"gamma": 2.0, "offset": 1.0}]
+    outputs = filt.run_vectorized(input_image, batch=batch)
+    assert counters["tone"] == 1
+    assert len(outputs) == 3
+    for values, (out,) in zip(batch, outputs):
+        assert out.shape == input_image.shape
+        assert np.allclose(out, input_image ** values["gamma"] + values.get("offset", 0.0))
+
+
+def test_run_vectorized_of_other_filters_loops():
+    filt = FilterCore(apply_fn=develop, inputs=[0], outputs=[1])
+    outputs = filt.run_vectorized(input_image, batch=[{"gain": 2.0}, {"gain": 3.0}])
+    assert counters["develop"] == 2
+    assert np.allclose(outputs[1][0], input_image * 3.0)
+
+
+def test_outputs_without_batch_axis_are_rejected():
+    def measure(img, gain=1.0):
+        return [float(np.mean(img * gain))]
+
+    filt = FilterCore(apply_fn=measure, inputs=[0], outputs=[1], vectorized=True)
+    with pytest.raises(ValueError, match="batch of 2 values"):
+        filt.run_vectorized(input_image, batch=[{"gain": 2.0}, {"gain": 3.0}])
+
+
+def test_decorator_flag_reaches_the_pipeline_filter():
+    pip = HeadlessPipeline.from_function(processing)
+    assert [filt.vectorized for filt in pip.filters] == [False, True, False]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_sweep_batches_the_vectorized_filter(workers):
+    pip = HeadlessPipeline.from_function(processing, cache=True)
+    pip.inputs = [input_image]
+    space = {"gain": [1.0, 2.0], "gamma": [0.5, 1.0, 1.5, 2.0]}
+    results = list(pip.sweep(space, workers=workers))
+    assert len(results) == 8
+    for res in results:
+        assert np.allclose(res.outputs["blended"], expected(res.parameters["gain"], res.parameters["gamma"]))
+    if workers == 1:
+        assert counters == {"develop": 2, "tone": 2, "blend": 8}  # one tone call per gain value
+
+
+def test_prefetch_only_serves_the_batch_values():
+    filt = FilterCore(apply_fn=tone, inputs=[0], outputs=[1], vectorized=True)
+    filt.prefetch([{"gamma": 0.5}, {"gamma": 2.0}])
+    filt.values = {"gamma": 2.0}
+    assert np.allclose(filt.run(input_image)[0], input_image**2.0)
+    filt.values = {"gamma": 0.5}
+    assert np.allclose(filt.run(input_image)[0], input_image**0.5)
+    assert counters["tone"] == 1
+    filt.values = {"gamma": 1.0}  # not in the batch: computed, the prefetch is dropped
+    assert np.allclose(filt.run(input_image)[0], input_image)
+    assert counters["tone"] == 2
+    assert filt._prefetched is None